@@ -0,0 +1,61 @@
+# accounts/consumers.py
+from asgiref.sync import sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from backend_project.metrics import WEBSOCKET_CONNECTIONS
+
+from . import presence
+
+
+class PresenceConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Replaces the HTTP ping and the admins' users/ polling.
+
+    Every signed-in client keeps one socket open: connecting marks the user
+    online, ``{"type": "heartbeat"}`` frames keep them online and closing
+    their last socket marks them offline. Admin sockets also join the
+    presence group: they get the users online now on connect, then every
+    change as it happens.
+    """
+
+    async def connect(self):
+        self.user = self.scope.get("user")
+        if not self.user or self.user.is_anonymous:
+            await self.close(code=4001)
+            return
+
+        await self.accept()
+        WEBSOCKET_CONNECTIONS.inc(kind="presence")
+        self.counted = True
+        await sync_to_async(presence.socket_opened)(self.user.id)
+
+        # Join before taking the snapshot so no change falls in between
+        self.is_admin = self.user.role == "admin"
+        if self.is_admin:
+            await self.channel_layer.group_add(presence.PRESENCE_GROUP, self.channel_name)
+            online = await sync_to_async(presence.online_users)()
+            await self.send_json({
+                "type": "presence_snapshot",
+                "users": [
+                    {"id": uid, "is_online": True, "last_seen": last_seen.isoformat()}
+                    for uid, last_seen in online.items()
+                ],
+            })
+
+    async def disconnect(self, close_code):
+        if not getattr(self, "counted", False):
+            return
+        if self.is_admin:
+            await self.channel_layer.group_discard(presence.PRESENCE_GROUP, self.channel_name)
+        WEBSOCKET_CONNECTIONS.dec(kind="presence")
+        await sync_to_async(presence.socket_closed)(self.user.id)
+
+    async def receive_json(self, content, **kwargs):
+        if isinstance(content, dict) and content.get("type") == "heartbeat":
+            await sync_to_async(presence.mark_online)(self.user.id)
+
+    async def presence_changed(self, event):
+        await self.send_json({
+            "type": "presence",
+            "users": event["users"],
+        })
@@ -6,6 +6,7 @@ from datetime import timedelta
 from django.db.models import Q
 from accounts.models import User
 from files.models import SystemSettings
+from files.dashboard import invalidate_dashboard_stats
 
 
 class Command(BaseCommand):
@@ -33,6 +34,9 @@ class Command(BaseCommand):
 
         count = inactive_users.count()
         inactive_users.update(is_active=False)
+        if count:
+            # QuerySet.update() skips post_save, so refresh the dashboard by hand
+            invalidate_dashboard_stats()
 
         if count > 0:
             self.stdout.write(self.style.SUCCESS(f"✅ Disabled {count} inactive user(s)."))
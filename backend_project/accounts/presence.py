@@ -0,0 +1,261 @@
+# accounts/presence.py
+"""
+Presence tracking without a user-table UPDATE per heartbeat.
+
+Heartbeats, logins and logouts only touch a presence store: Redis when
+PRESENCE_REDIS_URL is set (shared by every web process and the Celery
+workers), otherwise a process-local dict for single-process development.
+A user is online while their last heartbeat is younger than
+ONLINE_TIMEOUT.
+
+``flush_presence`` (run by Celery beat, see accounts.tasks; skipped with
+the local store) writes the changes collected since the previous flush to User.last_seen/is_online
+with one bulk UPDATE, and marks users whose heartbeats stopped as offline.
+Readers that need live state (list_users) should ask the store.
+
+Users coming online or going offline are pushed to the "presence" group
+(admin sockets of accounts.consumers.PresenceConsumer). Heartbeats from a
+user who is already online are not broadcast.
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+ONLINE_TIMEOUT = timedelta(minutes=5)
+
+SEEN_KEY = "presence:seen"    # sorted set: user id -> last heartbeat (epoch seconds)
+DIRTY_KEY = "presence:dirty"  # hash: user id -> "<epoch>:<1 online|0 offline>", not yet flushed
+SOCKETS_KEY = "presence:sockets"  # hash: user id -> open presence sockets
+
+PRESENCE_GROUP = "presence"
+
+
+def _to_datetime(epoch):
+    return datetime.fromtimestamp(float(epoch), dt_timezone.utc)
+
+
+class LocalPresenceStore:
+    """Process-local store for development and tests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seen = {}
+        self._dirty = {}
+        self._sockets = {}
+
+    def touch(self, user_id, now):
+        """Record a heartbeat; returns the previous one (None if there was none)."""
+        with self._lock:
+            previous = self._seen.get(user_id)
+            self._seen[user_id] = now
+            self._dirty[user_id] = (now, True)
+        return previous
+
+    def leave(self, user_id, now):
+        with self._lock:
+            previous = self._seen.pop(user_id, None)
+            self._dirty[user_id] = (now, False)
+        return previous
+
+    def add_socket(self, user_id, delta):
+        """Adjust the user's open socket count by ``delta``; returns the new count."""
+        with self._lock:
+            count = max(self._sockets.get(user_id, 0) + delta, 0)
+            if count:
+                self._sockets[user_id] = count
+            else:
+                self._sockets.pop(user_id, None)
+        return count
+
+    def online(self, cutoff):
+        with self._lock:
+            return {uid: ts for uid, ts in self._seen.items() if ts > cutoff}
+
+    def pending(self):
+        with self._lock:
+            return dict(self._dirty)
+
+    def drain(self, cutoff):
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            self._seen = {uid: ts for uid, ts in self._seen.items() if ts > cutoff}
+        return dirty
+
+
+class RedisPresenceStore:
+    """Shared store; each call is a single pipelined round trip."""
+
+    def __init__(self, url):
+        import redis
+
+        self.redis = redis.Redis.from_url(url)
+
+    def touch(self, user_id, now):
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zscore(SEEN_KEY, user_id)
+        pipe.zadd(SEEN_KEY, {user_id: now})
+        pipe.hset(DIRTY_KEY, user_id, f"{now}:1")
+        previous, _, _ = pipe.execute()
+        return previous
+
+    def leave(self, user_id, now):
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zscore(SEEN_KEY, user_id)
+        pipe.zrem(SEEN_KEY, user_id)
+        pipe.hset(DIRTY_KEY, user_id, f"{now}:0")
+        previous, _, _ = pipe.execute()
+        return previous
+
+    def add_socket(self, user_id, delta):
+        count = self.redis.hincrby(SOCKETS_KEY, user_id, delta)
+        if count <= 0:
+            # A process that died with sockets open can leave the count off;
+            # heartbeat expiry still takes those users offline
+            self.redis.hdel(SOCKETS_KEY, user_id)
+        return max(count, 0)
+
+    def online(self, cutoff):
+        rows = self.redis.zrangebyscore(SEEN_KEY, f"({cutoff}", "+inf", withscores=True)
+        return {int(uid): ts for uid, ts in rows}
+
+    @staticmethod
+    def _decode(dirty):
+        decoded = {}
+        for uid, value in dirty.items():
+            ts, online = value.decode().split(":")
+            decoded[int(uid)] = (float(ts), online == "1")
+        return decoded
+
+    def pending(self):
+        return self._decode(self.redis.hgetall(DIRTY_KEY))
+
+    def drain(self, cutoff):
+        # Read and clear atomically so a heartbeat can't slip between the two
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hgetall(DIRTY_KEY)
+        pipe.delete(DIRTY_KEY)
+        pipe.zremrangebyscore(SEEN_KEY, "-inf", cutoff)
+        dirty, _, _ = pipe.execute()
+        return self._decode(dirty)
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        url = getattr(settings, "PRESENCE_REDIS_URL", "")
+        _store = RedisPresenceStore(url) if url else LocalPresenceStore()
+    return _store
+
+
+def _cutoff():
+    return time.time() - ONLINE_TIMEOUT.total_seconds()
+
+
+def notify_presence(changes):
+    """Push ``[(user_id, is_online, last_seen), ...]`` to the presence group."""
+    channel_layer = get_channel_layer()
+    if channel_layer is None or not changes:
+        return
+    async_to_sync(channel_layer.group_send)(PRESENCE_GROUP, {
+        "type": "presence.changed",
+        "users": [
+            {"id": uid, "is_online": is_online, "last_seen": last_seen.isoformat()}
+            for uid, is_online, last_seen in changes
+        ],
+    })
+
+
+def mark_online(user_id):
+    """Record a heartbeat (or login). Returns the recorded last_seen."""
+    now = time.time()
+    previous = get_store().touch(user_id, now)
+    last_seen = _to_datetime(now)
+    if previous is None or previous <= _cutoff():
+        notify_presence([(user_id, True, last_seen)])
+    return last_seen
+
+
+def mark_offline(user_id):
+    now = time.time()
+    previous = get_store().leave(user_id, now)
+    last_seen = _to_datetime(now)
+    if previous is not None and previous > _cutoff():
+        notify_presence([(user_id, False, last_seen)])
+    return last_seen
+
+
+def socket_opened(user_id):
+    """A presence socket connected: the user is online."""
+    get_store().add_socket(user_id, 1)
+    return mark_online(user_id)
+
+
+def socket_closed(user_id):
+    """A presence socket closed: the user is offline once their last one is."""
+    if get_store().add_socket(user_id, -1) == 0:
+        mark_offline(user_id)
+
+
+def online_users():
+    """``{user_id: last_seen}`` for every user seen within ONLINE_TIMEOUT."""
+    cutoff = _cutoff()
+    return {uid: _to_datetime(ts) for uid, ts in get_store().online(cutoff).items()}
+
+
+def apply_presence(rows):
+    """
+    Overlay live presence on ``rows`` of user dicts (with "id", "is_online"
+    and "last_seen" from the database) in place, and return them.
+    """
+    online = online_users()
+    pending = get_store().pending()
+    for row in rows:
+        uid = row["id"]
+        if uid in pending:
+            row["last_seen"] = _to_datetime(pending[uid][0])
+        if uid in online:
+            row["last_seen"] = online[uid]
+        row["is_online"] = uid in online
+    return rows
+
+
+def flush_presence():
+    """
+    Write presence changes since the previous flush to the user table.
+    Returns the number of users updated.
+    """
+    User = get_user_model()
+    cutoff = _cutoff()
+    dirty = get_store().drain(cutoff)
+    online = set(get_store().online(cutoff))
+
+    users = [
+        User(id=uid, last_seen=_to_datetime(ts), is_online=is_online and uid in online)
+        for uid, (ts, is_online) in dirty.items()
+    ]
+    # bulk_update skips ids that no longer exist
+    User.objects.bulk_update(users, ["last_seen", "is_online"], batch_size=500)
+
+    # Heartbeats stopped without a logout (closed tab, lost connection)
+    stale = list(
+        User.objects.filter(is_online=True)
+        .exclude(id__in=online)
+        .exclude(id__in=list(dirty))
+        .values_list("id", "last_seen")
+    )
+    if stale:
+        User.objects.filter(id__in=[uid for uid, _ in stale]).update(is_online=False)
+
+    notify_presence(
+        [(u.id, False, u.last_seen) for u in users if dirty[u.id][1] and not u.is_online]
+        + [(uid, False, last_seen or _to_datetime(cutoff)) for uid, last_seen in stale]
+    )
+    return len(users) + len(stale)
@@ -0,0 +1,9 @@
+# accounts/routing.py
+
+from django.urls import re_path
+from . import consumers
+
+websocket_urlpatterns = [
+    # Online status: heartbeats from every client, live updates for admins
+    re_path(r"^ws/presence/$", consumers.PresenceConsumer.as_asgi()),
+]
@@ -2,7 +2,8 @@
 
 from django.contrib.auth.signals import user_logged_in, user_logged_out
 from django.dispatch import receiver
-from django.utils import timezone
+
+from . import presence
 
 
 @receiver(user_logged_in)
@@ -11,9 +12,7 @@ def mark_online(sender, user, request, **kwargs):
     Mark user as online on login.
     """
     if user.is_authenticated:
-        user.is_online = True
-        user.last_seen = timezone.now()
-        user.save(update_fields=["is_online", "last_seen"])
+        presence.mark_online(user.id)
 
 
 @receiver(user_logged_out)
@@ -21,7 +20,5 @@ def mark_offline(sender, user, request, **kwargs):
     """
     Mark user as offline on logout.
     """
-    if user.is_authenticated:
-        user.is_online = False
-        user.last_seen = timezone.now()
-        user.save(update_fields=["is_online", "last_seen"])
+    if user and user.is_authenticated:
+        presence.mark_offline(user.id)
@@ -2,6 +2,8 @@
 
 from django.core.management import call_command
 
+from .presence import LocalPresenceStore, flush_presence, get_store
+
 try:
     from celery import shared_task
 except ImportError:
@@ -15,3 +17,18 @@ def disable_inactive_users_task():
     Example: python manage.py shell -c "from accounts.tasks import disable_inactive_users_task; disable_inactive_users_task()"
     """
     call_command("disable_inactive_users")
+
+
+@shared_task
+def flush_presence_task():
+    """
+    Write buffered heartbeats to User.last_seen/is_online (scheduled in
+    CELERY_BEAT_SCHEDULE).
+
+    Skipped with the process-local store: the worker's store is not the one
+    the web process records heartbeats in, so flushing it would mark every
+    user offline.
+    """
+    if isinstance(get_store(), LocalPresenceStore):
+        return 0
+    return flush_presence()
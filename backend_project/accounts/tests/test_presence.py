@@ -0,0 +1,136 @@
+# accounts/tests/test_presence.py
+import time
+
+import pytest
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.test import APIClient
+from accounts import presence
+from accounts.consumers import PresenceConsumer
+from accounts.models import User
+from accounts.tasks import flush_presence_task
+
+@pytest.fixture(autouse=True)
+def presence_store(monkeypatch):
+    store = presence.LocalPresenceStore()
+    monkeypatch.setattr(presence, "_store", store)
+    return store
+
+@pytest.fixture
+def admin(user_factory):
+    return user_factory(username="presence_admin", role="admin")
+
+@pytest.mark.django_db
+def test_ping_does_not_touch_the_user_table(user_factory, django_assert_num_queries):
+    user = user_factory()
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    with django_assert_num_queries(0):
+        response = client.post("/api/auth/ping/")
+
+    assert response.status_code == 200
+    user.refresh_from_db()
+    assert user.is_online is False
+
+@pytest.mark.django_db
+def test_list_users_reads_live_presence(user_factory, admin):
+    pinged, idle = user_factory(), user_factory()
+    client = APIClient()
+    client.force_authenticate(user=pinged)
+    client.post("/api/auth/ping/")
+
+    client.force_authenticate(user=admin)
+    rows = {row["id"]: row for row in client.get("/api/auth/users/").data}
+
+    assert rows[pinged.id]["is_online"] is True
+    assert rows[pinged.id]["last_seen"] is not None
+    assert rows[idle.id]["is_online"] is False
+
+@pytest.mark.django_db
+def test_flush_writes_changes_in_bulk(user_factory, django_assert_num_queries):
+    users = [user_factory() for _ in range(5)]
+    for user in users:
+        presence.mark_online(user.id)
+    presence.mark_offline(users[0].id)
+
+    # One bulk UPDATE plus the stale-online sweep
+    with django_assert_num_queries(2):
+        assert presence.flush_presence() == 5
+
+    online = {u.id: u.is_online for u in type(users[0]).objects.filter(id__in=[u.id for u in users])}
+    assert online == {users[0].id: False, **{u.id: True for u in users[1:]}}
+
+    # Nothing changed since: nothing to write
+    assert presence.flush_presence() == 0
+
+@pytest.mark.django_db
+def test_flush_marks_silent_users_offline(user_factory, presence_store):
+    user = user_factory(is_online=True)
+    presence_store.touch(user.id, time.time() - presence.ONLINE_TIMEOUT.total_seconds() - 1)
+
+    presence.flush_presence()
+
+    user.refresh_from_db()
+    assert user.is_online is False
+    assert user.id not in presence.online_users()
+
+@pytest.mark.django_db
+def test_flush_task_skips_the_local_store(user_factory, django_assert_num_queries):
+    # A Celery worker's local store never sees the web process's heartbeats
+    user = user_factory(is_online=True)
+
+    with django_assert_num_queries(0):
+        assert flush_presence_task() == 0
+
+    user.refresh_from_db()
+    assert user.is_online is True
+
+async def connect_presence(user):
+    communicator = WebsocketCommunicator(PresenceConsumer.as_asgi(), "/ws/presence/")
+    communicator.scope["user"] = user
+    connected, _ = await communicator.connect()
+    assert connected
+    return communicator
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_presence_socket_pushes_changes_to_admins():
+    admin = await sync_to_async(User.objects.create_user)(username="presence_ws_admin", role="admin")
+    clerk = await sync_to_async(User.objects.create_user)(username="presence_ws_clerk")
+
+    dashboard = await connect_presence(admin)
+    snapshot = await dashboard.receive_json_from()
+    assert snapshot["type"] == "presence_snapshot"
+    assert admin.id in {row["id"] for row in snapshot["users"]}
+
+    first_tab = await connect_presence(clerk)
+    pushed = await dashboard.receive_json_from()
+    assert pushed["users"][0]["id"] == clerk.id and pushed["users"][0]["is_online"] is True
+
+    # Heartbeats and a second tab of an online user are not broadcast
+    second_tab = await connect_presence(clerk)
+    await first_tab.send_json_to({"type": "heartbeat"})
+    await second_tab.disconnect()
+    assert await dashboard.receive_nothing()
+    assert clerk.id in presence.online_users()
+
+    await first_tab.disconnect()
+    pushed = await dashboard.receive_json_from()
+    assert pushed["users"][0] == {**pushed["users"][0], "id": clerk.id, "is_online": False}
+    assert clerk.id not in presence.online_users()
+
+    # Non-admin sockets never receive presence updates
+    await connect_presence(clerk)
+    await dashboard.receive_json_from()
+    assert await first_tab.receive_nothing()
+    await dashboard.disconnect()
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_presence_socket_rejects_anonymous():
+    communicator = WebsocketCommunicator(PresenceConsumer.as_asgi(), "/ws/presence/")
+    communicator.scope["user"] = AnonymousUser()
+    connected, _ = await communicator.connect()
+    assert not connected
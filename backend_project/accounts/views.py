@@ -1,8 +1,6 @@
 # accounts/views.py
 
-from datetime import timedelta
 from django.contrib.auth import authenticate, get_user_model
-from django.contrib.auth.models import update_last_login
 from django.db.models import Count, Q
 from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
 from django.http import HttpResponse
@@ -19,11 +17,10 @@ from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 from .models import User
 from .serializers import UserSerializer, RegisterSerializer
+from . import presence
 from files.utils import log_action
 from files.utils import get_client_ip
 
-# Timeout used for determining online status
-ONLINE_TIMEOUT = timedelta(minutes=5)
 User = get_user_model()
 
 class AdminUserDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -77,11 +74,9 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         data = super().validate(attrs)
         user = self.user
 
-        # Update online state
-        user.is_online = True
-        user.last_seen = timezone.now()
-        user.save(update_fields=["is_online", "last_seen"])
-        update_last_login(None, user)
+        user.last_login = timezone.now()
+        user.save(update_fields=["last_login"])
+        presence.mark_online(user.id)
 
         # ✅ AUDIT LOG HERE
         log_action(
@@ -115,10 +110,9 @@ def custom_login(request):
     if not user:
         return Response({"detail": "Invalid credentials."}, status=401)
 
-    user.is_online = True
-    user.last_seen = timezone.now()
-    user.save(update_fields=["is_online", "last_seen"])
-    update_last_login(None, user)
+    user.last_login = timezone.now()
+    user.save(update_fields=["last_login"])
+    presence.mark_online(user.id)
 
     # ✅ AUDIT LOG HERE
     log_action(
@@ -160,27 +154,13 @@ class AdminUserListView(generics.ListAPIView):
 def list_users(request):
     """
     Admin-only: Get all users with online/offline status.
+    Online state and last_seen come from the presence store, not the table.
     """
-    now = timezone.now()
-    users = User.objects.all()
-
-    data = []
-    for u in users:
-        is_online = bool(
-            u.is_online and u.last_seen and now - u.last_seen <= ONLINE_TIMEOUT
-        )
-        data.append({
-            "id": u.id,
-            "username": u.username,
-            "email": u.email,
-            "role": u.role,
-            "is_active": u.is_active,
-            "last_login": u.last_login,
-            "is_online": is_online,
-            "last_seen": u.last_seen,
-        })
-
-    return Response(data)
+    users = list(User.objects.order_by("id").values(
+        "id", "username", "email", "role", "is_active",
+        "last_login", "is_online", "last_seen",
+    ))
+    return Response(presence.apply_presence(users))
 
 @api_view(["GET"])
 @permission_classes([IsAdminUser])
@@ -211,10 +191,7 @@ def custom_logout(request):
     """
     Mark user as offline and record timestamp.
     """
-    user = request.user
-    user.is_online = False
-    user.last_seen = timezone.now()
-    user.save(update_fields=["is_online", "last_seen"])
+    presence.mark_offline(request.user.id)
     return Response({"message": "Logged out successfully"})
 
 @api_view(["POST"])
@@ -222,12 +199,11 @@ def custom_logout(request):
 def user_ping(request):
     """
     Update user's last_seen timestamp (used for real-time dashboards).
+    Recorded in the presence store; the user table is updated in bulk later.
+    Fallback for clients without a presence socket (ws/presence/).
     """
-    user = request.user
-    user.is_online = True
-    user.last_seen = timezone.now()
-    user.save(update_fields=["last_seen", "is_online"])
-    return Response({"status": "ok", "last_seen": user.last_seen})
+    last_seen = presence.mark_online(request.user.id)
+    return Response({"status": "ok", "last_seen": last_seen})
 
 @csrf_exempt
 def create_test_admin(request):
@@ -18,14 +18,20 @@ os.environ.setdefault(
 django.setup()
 
 from chat.middleware import JWTAuthMiddleware  # after django.setup()
-from chat.routing import websocket_urlpatterns
+from accounts.routing import websocket_urlpatterns as accounts_websocket_urlpatterns
+from chat.routing import websocket_urlpatterns as chat_websocket_urlpatterns
+from files.routing import websocket_urlpatterns as files_websocket_urlpatterns
 
 # Define ASGI protocol router
 application = ProtocolTypeRouter({
     "http": get_asgi_application(),
     "websocket": AllowedHostsOriginValidator(
         JWTAuthMiddleware(
-            URLRouter(websocket_urlpatterns)
+            URLRouter(
+                accounts_websocket_urlpatterns
+                + chat_websocket_urlpatterns
+                + files_websocket_urlpatterns
+            )
         )
     ),
 })
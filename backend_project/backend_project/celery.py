@@ -1,6 +1,13 @@
 # backend_project/celery.py
+import logging
 import os
+import time
+
+from billiard.process import current_process
 from celery import Celery
+from celery.signals import task_postrun, task_prerun, worker_process_init, worker_ready
+
+from .metrics import TASK_DURATION, start_metrics_server
 
 # Set default Django settings module for 'celery' program
 os.environ.setdefault(
@@ -16,8 +23,52 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 # Auto-discover tasks from all registered Django app configs
 app.autodiscover_tasks()
 
+logger = logging.getLogger(__name__)
+
 
 @app.task(bind=True)
 def debug_task(self):
     """Simple debug task to verify Celery is running."""
-    print(f"Request: {self.request!r}")
+    logger.info("Request: %r", self.request)
+
+
+# ---------- Worker metrics ----------
+# Task timings are recorded in the process that runs the task, so every
+# process serves its own registry: the main worker process on
+# CELERY_METRICS_PORT (queue depths, solo/threads pools) and each prefork
+# child on CELERY_METRICS_PORT + 1 + its pool index.
+_task_started = {}
+
+
+@task_prerun.connect
+def _task_prerun(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        TASK_DURATION.observe(time.perf_counter() - started, task=task.name, state=state or "UNKNOWN")
+
+
+def _serve_worker_metrics(offset):
+    from django.conf import settings
+
+    port = getattr(settings, "CELERY_METRICS_PORT", 0)
+    if not port:
+        return
+    try:
+        start_metrics_server(port + offset, getattr(settings, "CELERY_METRICS_ADDR", "127.0.0.1"))
+    except OSError as exc:
+        logger.warning("Worker metrics endpoint not started on port %s: %s", port + offset, exc)
+
+
+@worker_ready.connect
+def _worker_ready(**kwargs):
+    _serve_worker_metrics(0)
+
+
+@worker_process_init.connect
+def _worker_process_init(**kwargs):
+    _serve_worker_metrics(1 + getattr(current_process(), "index", 0))
@@ -0,0 +1,43 @@
+# backend_project/channel_layers.py
+"""
+Channel layer settings.
+
+Listing several Redis hosts shards the layer: channels_redis hashes every
+group and channel name onto a fixed ring (CRC32, 4096 slots) split between
+the hosts, so each chat_<room> group, and the global "rooms" group, lives
+on one shard and their traffic spreads over all of them. Every process
+must list the same hosts in the same order.
+
+The "pubsub" backend (RedisPubSubChannelLayer) uses Redis PUBLISH instead
+of per-channel lists: fewer round trips per fan-out and no capacity limit,
+but a message is lost if its consumer isn't subscribed at that moment.
+"""
+
+CHANNEL_LAYER_BACKENDS = {
+    "core": "channels_redis.core.RedisChannelLayer",
+    "pubsub": "channels_redis.pubsub.RedisPubSubChannelLayer",
+}
+
+
+def parse_hosts(value):
+    """``"redis://a:6379/0,redis://b:6379/0"`` -> ``["redis://a:6379/0", "redis://b:6379/0"]``."""
+    return [host.strip() for host in value.split(",") if host.strip()]
+
+
+def channel_layers_config(hosts, backend="core", capacity=None):
+    """Build settings.CHANNEL_LAYERS for Redis ``hosts`` (one per shard)."""
+    if backend not in CHANNEL_LAYER_BACKENDS:
+        raise ValueError(f"Unknown channel layer backend {backend!r}, expected one of {sorted(CHANNEL_LAYER_BACKENDS)}")
+    if not hosts:
+        raise ValueError("At least one channel layer Redis host is required")
+
+    layer_config = {"hosts": list(hosts)}
+    if backend == "core" and capacity:
+        # Messages a channel may queue before sends to it are dropped
+        layer_config["capacity"] = capacity
+    return {
+        "default": {
+            "BACKEND": CHANNEL_LAYER_BACKENDS[backend],
+            "CONFIG": layer_config,
+        },
+    }
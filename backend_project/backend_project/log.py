@@ -0,0 +1,130 @@
+# backend_project/log.py
+"""
+Logging plumbing referenced from settings.LOGGING.
+
+``QueueStreamHandler`` keeps stream writes off the request path: the
+calling thread (a Daphne worker, the event loop, a Celery task) only puts
+the record on an in-memory queue, and a background listener thread
+formats it and writes it to the stream. When the queue is full, records
+are dropped and counted rather than blocking the caller.
+
+``JsonFormatter`` renders one JSON object per line, including anything
+passed with ``extra=`` (e.g. the profiler's ``profile`` dict).
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc_info"] = record.exc_text
+        if record.stack_info:
+            payload["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class QueueStreamHandler(QueueHandler):
+    """Non-blocking stream handler: formatting and I/O happen on a listener thread."""
+
+    def __init__(self, stream=None, maxsize=10000):
+        self.stream = stream
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.target = logging.StreamHandler(stream)
+        super().__init__(None)
+        self._start_listener()
+        atexit.register(self.close)
+        # Forked children (Celery prefork, gunicorn) inherit the queue but not the thread
+        os.register_at_fork(after_in_child=self._start_listener)
+
+    def _start_listener(self):
+        self.queue = queue.Queue(self.maxsize)
+        self.listener = QueueListener(self.queue, self.target, respect_handler_level=False)
+        self.listener.start()
+
+    def setFormatter(self, fmt):
+        # Format on the listener thread, not in the caller
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Freeze the message now: args may be mutated once the call returns.
+        # exc_info stays attached so the formatter can render the traceback.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self.listener._thread is not None:
+            self.listener.stop()  # drains what is already queued
+        if self.dropped:
+            self.target.handle(logging.makeLogRecord({
+                "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING",
+                "msg": "%d log records dropped: queue full", "args": (self.dropped,),
+            }))
+            self.dropped = 0
+        super().close()
+
+
+def logging_config(level="INFO", fmt="json", module_levels=None):
+    """
+    Build settings.LOGGING. ``module_levels`` maps logger names to levels,
+    e.g. ``{"chat.middleware": "DEBUG", "django.db.backends": "WARNING"}``.
+    """
+    # Listing "django" drops Django's own unbuffered console handler for it
+    loggers = {"django": {"level": level}}
+    for name, module_level in (module_levels or {}).items():
+        loggers[name] = {"level": module_level}
+
+    return {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "formatters": {
+            "json": {"()": "backend_project.log.JsonFormatter"},
+            "text": {"format": "%(asctime)s %(levelname)s %(name)s: %(message)s"},
+        },
+        "handlers": {
+            "console": {
+                "()": "backend_project.log.QueueStreamHandler",
+                "stream": "ext://sys.stdout",
+                "formatter": fmt,
+            },
+        },
+        "root": {"level": level, "handlers": ["console"]},
+        "loggers": loggers,
+    }
+
+
+def parse_module_levels(value):
+    """``"chat.middleware=DEBUG, files=WARNING"`` -> ``{"chat.middleware": "DEBUG", "files": "WARNING"}``"""
+    levels = {}
+    for item in value.split(","):
+        name, sep, level = item.partition("=")
+        if sep and name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
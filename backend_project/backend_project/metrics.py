@@ -0,0 +1,300 @@
+# backend_project/metrics.py
+"""
+In-process metrics in the Prometheus text exposition format.
+
+A deliberately small registry (counters, gauges, histograms and
+scrape-time collectors) so metrics work locally and in CI without a
+Prometheus client library or any external service. Values live in the
+process that records them: the web process serves them on /metrics/,
+each Celery worker process on its own port (see backend_project.celery).
+
+    DTR_ROWS_INGESTED.inc(len(entries), source="parse")
+    with PARSE_DURATION.time():
+        ...
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; tuned for API calls and Excel parses rather than microbenchmarks
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple((name, str(labels[name])) for name in self.labelnames)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                for bound, count in zip(self.buckets, counts):
+                    samples.append((f"{self.name}_bucket", key + (("le", _format_value(bound)),), count))
+                samples.append((f"{self.name}_sum", key, total))
+                samples.append((f"{self.name}_count", key, counts[-1]))
+        return samples
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def add_collector(self, collector):
+        """
+        ``collector()`` is called on every scrape and yields
+        ``(name, type, documentation, [(labels_dict, value), ...])``.
+        A collector that raises is logged and skipped.
+        """
+        self._collectors.append(collector)
+        return collector
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as exc:
+                # No traceback: a down broker would otherwise flood the log on every scrape
+                logger.warning("Metrics collector %s failed: %s", collector.__name__, exc)
+                continue
+            for name, metric_type, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# ---------- HTTP ----------
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by route.", ["route", "method", "status"],
+)
+
+# ---------- DTR ingestion ----------
+PARSE_DURATION = Histogram(
+    "dtr_parse_duration_seconds", "Time to parse an uploaded DTR workbook.", ["outcome"],
+)
+DTR_ROWS_INGESTED = Counter(
+    "dtr_rows_ingested_total", "DTR entry rows written; rate() gives rows per second.", ["source"],
+)
+
+# ---------- WebSockets ----------
+# Labelled by consumer kind (chat, rooms, presence, dashboard), never by room:
+# room group names are unbounded and private ones carry user ids
+WEBSOCKET_CONNECTIONS = Gauge(
+    "websocket_connections", "Open WebSocket connections per consumer kind.", ["kind"],
+)
+
+# ---------- Celery ----------
+TASK_DURATION = Histogram(
+    "celery_task_duration_seconds", "Celery task run time.", ["task", "state"],
+)
+
+
+@REGISTRY.add_collector
+def database_connections():
+    """Server-side view of this database's connections, by state."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COALESCE(state, 'unknown'), COUNT(*) FROM pg_stat_activity "
+            "WHERE datname = current_database() GROUP BY 1"
+        )
+        rows = cursor.fetchall()
+    yield (
+        "db_connections", "gauge", "Database connections by state (pg_stat_activity).",
+        [({"state": state}, count) for state, count in rows],
+    )
+    yield (
+        "db_connections_max_age_seconds", "gauge", "Configured CONN_MAX_AGE (0 = new connection per request).",
+        [({}, connection.settings_dict.get("CONN_MAX_AGE") or 0)],
+    )
+
+
+@REGISTRY.add_collector
+def celery_queue_depths():
+    """Messages waiting in each configured Celery queue; skipped when the broker is down."""
+    from backend_project import celery_app
+
+    queues = getattr(settings, "METRICS_CELERY_QUEUES", ["celery"])
+    with celery_app.connection_for_read() as conn:
+        conn.ensure_connection(max_retries=0)
+        channel = conn.default_channel
+        depths = [
+            ({"queue": queue}, channel.queue_declare(queue=queue, passive=True).message_count)
+            for queue in queues
+        ]
+    yield ("celery_queue_length", "gauge", "Messages waiting in a Celery queue.", depths)
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Scrapers send ``Authorization: Bearer
+    <METRICS_TOKEN>``; admin sessions are let in too. METRICS_PUBLIC opens it
+    to anyone when no token is set.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    allowed = (
+        (token and request.headers.get("Authorization") == f"Bearer {token}")
+        or request.user.is_superuser  # admins; every user is is_staff here
+        or (not token and getattr(settings, "METRICS_PUBLIC", False))
+    )
+    if not allowed:
+        return HttpResponse(status=401 if token else 403)
+    return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
+class MetricsMiddleware:
+    """Observe every request in REQUEST_LATENCY, labelled by URL name rather than raw path."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        match = getattr(request, "resolver_match", None)
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - started,
+            route=(match.view_name if match else "unmatched"),
+            method=request.method,
+            status=response.status_code,
+        )
+        return response
+
+
+class _ScrapeHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        try:
+            body = REGISTRY.render().encode()
+        finally:
+            # Each scrape runs in a new thread; don't leave its DB connection open
+            connection.close()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would drown the worker log
+
+
+def start_metrics_server(port, addr="127.0.0.1"):
+    """Serve REGISTRY on ``addr:port`` from a daemon thread (used by Celery workers)."""
+    server = ThreadingHTTPServer((addr, port), _ScrapeHandler)
+    threading.Thread(target=server.serve_forever, name=f"metrics-{port}", daemon=True).start()
+    return server
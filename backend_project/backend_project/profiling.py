@@ -0,0 +1,165 @@
+# backend_project/profiling.py
+"""
+Opt-in, sampled per-request profiling.
+
+A sampled request reports its wall time, SQL query count and time, the
+named stages timed with ``profile_stage`` (Excel parsing, exports, ...)
+and, with PROFILING_TRACE_MEMORY, the peak memory allocated while it ran.
+The numbers go out as a ``Server-Timing`` header (visible in the browser
+devtools) and as one structured log record on the
+``backend_project.profiling`` logger.
+
+PROFILING_SAMPLE_RATE is the percentage of requests to profile; 0, the
+default, leaves every request untouched apart from one random() call.
+"""
+import logging
+import random
+import threading
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("backend_project.profiling")
+
+_current_profile = ContextVar("current_profile", default=None)
+
+_tracing_lock = threading.Lock()
+_tracing_requests = 0    # sampled requests currently tracing memory
+_tracing_started = False  # whether we, rather than e.g. PYTHONTRACEMALLOC, started tracemalloc
+
+
+class RequestProfile:
+    """Counters collected for one sampled request."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.stages = {}  # stage name -> seconds, summed over repeats
+
+    def __call__(self, execute, sql, params, many, context):
+        # Installed with connection.execute_wrapper(), so it works with DEBUG off
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - started
+
+
+@contextmanager
+def profile_stage(name):
+    """
+    Time a named stage of the current request, e.g.::
+
+        with profile_stage("read_excel"):
+            sheets = pd.read_excel(path, sheet_name=None)
+
+    Does nothing when the request is not being profiled.
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.stages[name] = profile.stages.get(name, 0.0) + time.perf_counter() - started
+
+
+@contextmanager
+def _trace_memory():
+    """
+    Trace allocations while a sampled request runs and yield a callable that
+    returns the peak so far (bytes). tracemalloc slows down every allocation
+    in the process, so it only runs while at least one sampled request does.
+    """
+    global _tracing_requests, _tracing_started
+    with _tracing_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_started = True
+        _tracing_requests += 1
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+    try:
+        yield lambda: tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        with _tracing_lock:
+            _tracing_requests -= 1
+            if _tracing_requests == 0 and _tracing_started:
+                tracemalloc.stop()
+                _tracing_started = False
+
+
+def server_timing(total, profile, peak_memory=None):
+    """Render the profile as a Server-Timing header value (durations in ms)."""
+    metrics = [
+        f"total;dur={total * 1000:.1f}",
+        f'db;dur={profile.db_seconds * 1000:.1f};desc="{profile.queries} queries"',
+    ]
+    metrics += [f"{name};dur={seconds * 1000:.1f}" for name, seconds in profile.stages.items()]
+    if peak_memory is not None:
+        metrics.append(f'mem;desc="peak {peak_memory / 1024:.0f} KiB"')
+    return ", ".join(metrics)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles PROFILING_SAMPLE_RATE percent of requests. Keep it first in
+    MIDDLEWARE so the wall time covers the rest of the stack.
+
+    Memory is measured with tracemalloc, only while a sampled request runs.
+    It is process-wide: with concurrent requests in one process the peak
+    includes their allocations.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = getattr(settings, "PROFILING_SAMPLE_RATE", 0)
+        if rate <= 0 or random.random() * 100 >= rate:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+
+        memory_peak = None
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                if getattr(settings, "PROFILING_TRACE_MEMORY", False):
+                    memory_peak = stack.enter_context(_trace_memory())
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                response = self.get_response(request)
+                peak_memory = memory_peak() if memory_peak else None
+        finally:
+            _current_profile.reset(token)
+        total = time.perf_counter() - started
+
+        response["Server-Timing"] = server_timing(total, profile, peak_memory)
+        logger.info(
+            "%s %s %s in %.1fms (%d queries, %.1fms db)",
+            request.method, request.path, response.status_code,
+            total * 1000, profile.queries, profile.db_seconds * 1000,
+            extra={
+                "profile": {
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "duration_ms": round(total * 1000, 1),
+                    "db_queries": profile.queries,
+                    "db_ms": round(profile.db_seconds * 1000, 1),
+                    "stages_ms": {name: round(s * 1000, 1) for name, s in profile.stages.items()},
+                    "peak_memory_bytes": peak_memory,
+                }
+            },
+        )
+        return response
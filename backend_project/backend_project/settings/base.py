@@ -3,6 +3,8 @@ from pathlib import Path
 import os
 from decouple import config
 from dotenv import load_dotenv
+from backend_project.channel_layers import channel_layers_config, parse_hosts
+from backend_project.log import logging_config, parse_module_levels
 
 # Load environment variables
 load_dotenv()
@@ -40,6 +42,8 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = "accounts.User"
 
 MIDDLEWARE = [
+    'backend_project.profiling.ProfilingMiddleware',  # keep first: times the whole stack
+    'backend_project.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -52,6 +56,24 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'backend_project.urls'
 
+# Request profiling (Server-Timing header + log line); percent of requests, 0 = off
+PROFILING_SAMPLE_RATE = config("PROFILING_SAMPLE_RATE", default=0.0, cast=float)
+PROFILING_TRACE_MEMORY = config("PROFILING_TRACE_MEMORY", default=False, cast=bool)
+
+# ---------- Logging (JSON lines to stdout, written off the request thread) ----------
+LOG_LEVEL = config("LOG_LEVEL", default="INFO")
+LOG_FORMAT = config("LOG_FORMAT", default="json")  # "json" or "text"
+# Per-module overrides, e.g. LOG_LEVELS="chat.middleware=DEBUG,django.db.backends=WARNING"
+LOG_LEVELS = config("LOG_LEVELS", default="", cast=parse_module_levels)
+LOGGING = logging_config(LOG_LEVEL, LOG_FORMAT, LOG_LEVELS)
+
+# ---------- Metrics (/metrics/, Prometheus text format) ----------
+# Scrapers send "Authorization: Bearer <METRICS_TOKEN>"; without a token only
+# admin sessions may read /metrics/, unless METRICS_PUBLIC opens it to anyone
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+METRICS_PUBLIC = config("METRICS_PUBLIC", default=False, cast=bool)
+METRICS_CELERY_QUEUES = config("METRICS_CELERY_QUEUES", default="celery", cast=lambda v: [q.strip() for q in v.split(",") if q.strip()])
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -71,10 +93,23 @@ WSGI_APPLICATION = 'backend_project.wsgi.application'
 ASGI_APPLICATION = 'backend_project.asgi.application'
 
 # Channels / WebSockets
-CHANNEL_LAYERS = {
+# Comma-separated Redis URLs, one per shard (backend_project.channel_layers)
+CHANNEL_LAYERS = channel_layers_config(
+    parse_hosts(config(
+        "CHANNEL_REDIS_HOSTS", default=f"redis://{config('REDIS_HOST', default='localhost')}:6379",
+    )),
+    backend=config("CHANNEL_LAYER_BACKEND", default="core"),
+    capacity=config("CHANNEL_LAYER_CAPACITY", default=100, cast=int),
+)
+
+# Cache (dashboard counters, etc.)
+CACHES = {
     "default": {
-        "BACKEND": "channels_redis.core.RedisChannelLayer",
-        "CONFIG": {"hosts": [(config("REDIS_HOST", default="localhost"), 6379)]},
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": config(
+            "REDIS_CACHE_URL",
+            default=f"redis://{config('REDIS_HOST', default='localhost')}:6379/1",
+        ),
     },
 }
 
@@ -145,6 +180,40 @@ MEDIA_ROOT = BASE_DIR / 'media'
 CELERY_BROKER_URL = config("CELERY_BROKER_URL", default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = config("CELERY_RESULT_BACKEND", default='redis://localhost:6379/0')
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+CELERY_BEAT_SCHEDULE = {
+    "flush-presence": {
+        "task": "accounts.tasks.flush_presence_task",
+        "schedule": config("PRESENCE_FLUSH_INTERVAL", default=60, cast=int),  # seconds
+    },
+}
+# Worker scrape port (0, the default, disables it); prefork children use the
+# following ports. The listener has no auth, so it binds to localhost unless
+# CELERY_METRICS_ADDR says otherwise.
+CELERY_METRICS_PORT = config("CELERY_METRICS_PORT", default=0, cast=int)
+CELERY_METRICS_ADDR = config("CELERY_METRICS_ADDR", default="127.0.0.1")
+
+# Presence (accounts.presence): heartbeats go to Redis, flushed to the user table by beat
+# Its own Redis database, so clearing the cache doesn't drop everyone's presence
+PRESENCE_REDIS_URL = config(
+    "PRESENCE_REDIS_URL",
+    default=f"redis://{config('REDIS_HOST', default='localhost')}:6379/2",
+)
+
+# Chat: broadcast messages immediately and write them in batches (chat.persistence)
+CHAT_WRITE_BEHIND = config("CHAT_WRITE_BEHIND", default=False, cast=bool)
+CHAT_WRITE_BEHIND_BATCH_SIZE = config("CHAT_WRITE_BEHIND_BATCH_SIZE", default=500, cast=int)
+CHAT_WRITE_BEHIND_INTERVAL = config("CHAT_WRITE_BEHIND_INTERVAL", default=0.05, cast=float)  # seconds
+# How far back a reconnect sync starts under write-behind, to cover rows written
+# late (the batch interval plus retries while the database is down)
+CHAT_SYNC_OVERLAP = config("CHAT_SYNC_OVERLAP", default=10, cast=float)  # seconds
+
+# Chat sockets using the compact protocol (chat.compact): messages arriving within
+# the window are sent as one frame, up to the batch size
+CHAT_COMPACT_BATCH_WINDOW = config("CHAT_COMPACT_BATCH_WINDOW", default=0.05, cast=float)  # seconds; 0 disables
+CHAT_COMPACT_BATCH_SIZE = config("CHAT_COMPACT_BATCH_SIZE", default=100, cast=int)
+
+# WebSocket auth: seconds a token's user is cached per process (chat.middleware); 0 disables
+WS_USER_CACHE_TTL = config("WS_USER_CACHE_TTL", default=60, cast=int)
 
 # Custom User
 AUTH_USER_MODEL = 'accounts.User'
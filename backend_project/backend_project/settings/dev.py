@@ -9,4 +9,10 @@ CHANNEL_LAYERS = {
     "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"},
 }
 
+# Local-memory cache, no Redis needed
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+PRESENCE_REDIS_URL = ""  # process-local presence store
+
 CORS_ALLOW_ALL_ORIGINS = True
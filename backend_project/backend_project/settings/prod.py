@@ -19,14 +19,20 @@ DATABASES = {
 }
 
 # Channels
-CHANNEL_LAYERS = {
+CHANNEL_LAYERS = channel_layers_config(
+    parse_hosts(os.getenv("CHANNEL_REDIS_HOSTS", os.getenv("REDIS_URL", "redis://redis:6379/0"))),
+    backend=os.getenv("CHANNEL_LAYER_BACKEND", "core"),
+    capacity=int(os.getenv("CHANNEL_LAYER_CAPACITY", "100")),
+)
+
+# Cache
+CACHES = {
     "default": {
-        "BACKEND": "channels_redis.core.RedisChannelLayer",
-        "CONFIG": {
-            "hosts": [(os.getenv("REDIS_URL", "redis://redis:6379/0"))],
-        },
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("REDIS_CACHE_URL", "redis://redis:6379/1"),
     },
 }
+PRESENCE_REDIS_URL = os.getenv("PRESENCE_REDIS_URL", "redis://redis:6379/2")  # not the cache's db
 
 # Celery
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0")
@@ -7,6 +7,7 @@ from django.conf.urls.static import static
 from django.http import HttpResponse
 from accounts.views import MyTokenObtainPairView, user_stats
 from files.views import file_stats, compare_employees
+from backend_project.metrics import metrics_view
 
 def health_check(request):
     """Simple endpoint to verify server is running."""
@@ -16,6 +17,7 @@ urlpatterns = [
     # Health check / root route
     path("", health_check, name="health_check"),
     path("api/health/", health_check, name="health_check_api"),
+    path("metrics/", metrics_view, name="metrics"),
 
     # Admin panel
     path("admin/", admin.site.urls),
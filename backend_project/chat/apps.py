@@ -0,0 +1,9 @@
+# chat/apps.py
+from django.apps import AppConfig
+
+class ChatConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'chat'
+
+    def ready(self):
+        import chat.signals
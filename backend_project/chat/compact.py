@@ -0,0 +1,94 @@
+# chat/compact.py
+"""
+Compact binary protocol for chat sockets, for clients on slow links.
+
+Clients opt in with a WebSocket subprotocol:
+
+- ``chat.compact``: msgpack frames
+- ``chat.compact.deflate``: msgpack frames, deflated when worth it
+
+Every binary frame is one flag byte and a msgpack payload: ``0x00`` plain,
+``0x01`` raw DEFLATE compressed with one compression context per socket,
+flushed after every frame (like permessage-deflate with context takeover).
+The client keeps one inflate context for the socket, so usernames and keys
+repeated across frames cost almost nothing. This is done in the
+application because Daphne does not negotiate permessage-deflate; uvicorn
+does, and it can be combined with plain ``chat.compact``.
+
+Messages from a burst are batched into one frame::
+
+    {"t": "m", "m": [[id, uid, sender_id, message, timestamp_ms], ...],
+     "u": {sender_id: username}}
+
+``u`` only lists senders this socket hasn't been told about yet; clients
+keep the id -> username dictionary for the life of the socket. Other
+frames (unread counts, read receipts) are the JSON payloads, msgpack'd.
+Clients may send msgpack frames (the same dicts as JSON clients) or text.
+"""
+import zlib
+from datetime import datetime
+
+import msgpack
+
+SUBPROTOCOL = "chat.compact"
+SUBPROTOCOL_DEFLATE = "chat.compact.deflate"
+SUBPROTOCOLS = (SUBPROTOCOL_DEFLATE, SUBPROTOCOL)
+
+PLAIN = b"\x00"
+DEFLATED = b"\x01"
+DEFLATE_MIN_SIZE = 64  # bytes; smaller payloads are sent as they are
+SYNC_FLUSH_TAIL = b"\x00\x00\xff\xff"
+
+
+def choose_subprotocol(requested):
+    """The first compact subprotocol in the client's preference order, or None."""
+    for subprotocol in requested or ():
+        if subprotocol in SUBPROTOCOLS:
+            return subprotocol
+    return None
+
+
+def timestamp_ms(iso_timestamp):
+    return int(datetime.fromisoformat(iso_timestamp).timestamp() * 1000)
+
+
+class CompactEncoder:
+    """Per-socket encoder: keeps the deflate context and the senders already sent."""
+
+    def __init__(self, deflate=False):
+        self.compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS) if deflate else None
+        self.known_senders = set()
+
+    def encode(self, payload):
+        packed = msgpack.packb(payload)
+        if self.compressor is None or len(packed) < DEFLATE_MIN_SIZE:
+            return PLAIN + packed
+        compressed = self.compressor.compress(packed) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        # Like permessage-deflate, drop the empty block's marker; the client appends it back
+        return DEFLATED + compressed[:-len(SYNC_FLUSH_TAIL)]
+
+    def encode_messages(self, events):
+        """One frame for a batch of chat_message events."""
+        new_senders = {}
+        for event in events:
+            if event["sender_id"] not in self.known_senders:
+                self.known_senders.add(event["sender_id"])
+                new_senders[event["sender_id"]] = event["sender"]
+
+        payload = {
+            "t": "m",
+            "m": [
+                [event["id"], event["uid"], event["sender_id"], event["message"], timestamp_ms(event["timestamp"])]
+                for event in events
+            ],
+        }
+        if new_senders:
+            payload["u"] = new_senders
+        return self.encode(payload)
+
+
+def decode(data):
+    """Decode a frame from a compact client (uncompressed msgpack, flag byte optional)."""
+    if data[:1] == PLAIN:
+        data = data[1:]
+    return msgpack.unpackb(data, strict_map_key=False)
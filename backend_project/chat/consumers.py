@@ -1,126 +1,211 @@
 # chat/consumers.py
+import asyncio
 import json
+import logging
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer, AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
-from .models import ChatMessage, Room
+from .models import ChatMessage
+from .compact import SUBPROTOCOL_DEFLATE, CompactEncoder, choose_subprotocol, decode
+from .membership import join_room, normalize_room_name
+from .persistence import get_message_writer
+from .unread import mark_read, read_receipt_event, unread_count
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from backend_project.metrics import WEBSOCKET_CONNECTIONS
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.user = self.scope.get("user")
         if not self.user or self.user.is_anonymous:
-            print("❌ WS Auth failed:", self.user)
+            logger.info("Rejected unauthenticated chat socket")
             await self.close(code=4001)
             return
 
-        self.room_name = self.scope["url_route"]["kwargs"]["room_name"]
+        # room_7_3 and room_3_7 are the same room, so they must share a group
+        self.room_name = normalize_room_name(self.scope["url_route"]["kwargs"]["room_name"])
         self.room_group_name = f"chat_{self.room_name}"
-
-        # Ensure room exists and the user is a participant
-        await self.ensure_room_participation()
+        # Unread counts and read receipts are opt-in (?receipts=1): older
+        # clients treat every frame as a chat message
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        self.receipts = query.get("receipts", ["0"])[0] == "1"
+        # Binary msgpack frames with batched messages, if asked for (chat.compact)
+        subprotocol = choose_subprotocol(self.scope.get("subprotocols"))
+        self.encoder = CompactEncoder(deflate=subprotocol == SUBPROTOCOL_DEFLATE) if subprotocol else None
+        self.pending = []
+        self.flush_task = None
+        self.unread_count = 0
+
+        # Resolve the room once (cached across connections); messages then only INSERT
+        self.room_id = await database_sync_to_async(join_room)(self.room_name, self.user)
 
         # Add user to WebSocket group
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
-        await self.accept()
-        print(f"✅ {self.user.username} connected to {self.room_name}")
+        await self.accept(subprotocol=subprotocol)
+        WEBSOCKET_CONNECTIONS.inc(kind="chat")
+        self.counted = True
+        logger.debug("%s connected to %s", self.user.username, self.room_name)
+        if self.receipts:
+            await self.send_unread_count()
 
     async def disconnect(self, close_code):
         if hasattr(self, "room_group_name"):
             await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+        if getattr(self, "counted", False):
+            WEBSOCKET_CONNECTIONS.dec(kind="chat")
+        if getattr(self, "flush_task", None) is not None:
+            self.flush_task.cancel()
+        if settings.CHAT_WRITE_BEHIND:
+            # Don't leave this connection's messages only in memory
+            await get_message_writer().flush()
         user = self.scope.get("user")
         room = getattr(self, "room_name", "unknown")
-        print(f"{getattr(user, 'username', 'Anonymous')} disconnected from {room}")
+        logger.debug("%s disconnected from %s", getattr(user, "username", "Anonymous"), room)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        """Receive a message (or, with "type": "read", a read receipt) from WebSocket."""
+        data = decode(bytes_data) if bytes_data is not None else json.loads(text_data)
+        if not isinstance(data, dict):
+            return
+        if data.get("type") == "read":
+            await self.receive_read(data)
+            return
 
-    async def receive(self, text_data):
-        """Receive a message from WebSocket."""
-        data = json.loads(text_data)
         message = data.get("message", "").strip()
         if not message:
             return
 
-        # Save message to DB
-        chat_message = await self.save_message(message)
+        if settings.CHAT_WRITE_BEHIND:
+            # uid and timestamp are assigned now; the row is written in a later batch
+            chat_message = ChatMessage(room_id=self.room_id, sender=self.user, message=message)
+            get_message_writer().submit(chat_message)
+        else:
+            chat_message = await self.save_message(message)
 
         # Broadcast to all participants in the room
         await self.channel_layer.group_send(
             self.room_group_name,
             {
                 "type": "chat_message",
-                "id": chat_message.id,
+                "id": chat_message.id,  # None until written in write-behind mode
+                "uid": chat_message.uid,
                 "message": chat_message.message,
                 "sender": self.user.username,
+                "sender_id": self.user.id,
                 "timestamp": chat_message.timestamp.isoformat(),
             }
         )
 
     async def chat_message(self, event):
         """Send a message to WebSocket clients."""
+        if self.encoder is not None:
+            await self.queue_compact(event)
+            return
         await self.send(text_data=json.dumps({
             "id": event["id"],
+            "uid": event["uid"],
             "sender": event["sender"],
             "message": event["message"],
             "timestamp": event["timestamp"],
         }))
+        if self.count_unread([event]):
+            await self.send_payload({"type": "unread", "unread_count": self.unread_count})
 
-    @database_sync_to_async
-    def ensure_room_participation(self):
+    def count_unread(self, events):
         """
-        Ensure the room exists and the current user (and counterpart) are participants.
-        Handles private rooms (room_<id1>_<id2>) and normal rooms.
+        Add other people's new messages to the socket's unread count, without
+        a query per message. Returns whether the count changed.
         """
-        if self.room_name.startswith("room_"):
-            parts = self.room_name.split("_")
-            if len(parts) == 3:
-                user_ids = sorted([int(parts[1]), int(parts[2])])
-                room, _ = Room.objects.get_or_create(
-                    name=f"room_{user_ids[0]}_{user_ids[1]}",
-                    defaults={"created_by": User.objects.get(id=user_ids[0])}
-                )
-                # Always ensure both users are participants
-                for u in User.objects.filter(id__in=user_ids):
-                    if not room.participants.filter(id=u.id).exists():
-                        room.participants.add(u)
-        else:
-            room, _ = Room.objects.get_or_create(
-                name=self.room_name,
-                defaults={"created_by": self.user}
+        if not self.receipts:
+            return False
+        new = sum(1 for event in events if event["sender_id"] != self.user.id)
+        self.unread_count += new
+        return new > 0
+
+    async def receive_read(self, data):
+        """
+        ``{"type": "read", "message_id" | "uid": ...}`` (default: the latest
+        message): move the read cursor and tell the room. The reader's
+        sockets get their new unread count with the receipt (read_receipt).
+        """
+        if settings.CHAT_WRITE_BEHIND:
+            # The message being read may still be queued
+            await get_message_writer().flush()
+        try:
+            message = await database_sync_to_async(mark_read)(
+                self.user, self.room_id, message_id=data.get("message_id"), uid=data.get("uid"),
             )
-            if not room.participants.filter(id=self.user.id).exists():
-                room.participants.add(self.user)
+        except ValueError as e:
+            logger.info("Ignoring read receipt from %s: %s", self.user.username, e)
+            return
+        if message is None:
+            return
+        await self.channel_layer.group_send(self.room_group_name, read_receipt_event(self.user, message))
+
+    async def queue_compact(self, event):
+        """Batch messages for compact clients: a burst goes out as one frame."""
+        self.pending.append(event)
+        window = getattr(settings, "CHAT_COMPACT_BATCH_WINDOW", 0.05)
+        if window <= 0 or len(self.pending) >= getattr(settings, "CHAT_COMPACT_BATCH_SIZE", 100):
+            await self.flush_compact()
+        elif self.flush_task is None:
+            self.flush_task = asyncio.create_task(self.flush_compact_later(window))
+
+    async def flush_compact_later(self, window):
+        await asyncio.sleep(window)
+        self.flush_task = None
+        await self.flush_compact()
+
+    async def flush_compact(self):
+        if not self.pending:
+            return
+        events, self.pending = self.pending, []
+        await self.send(bytes_data=self.encoder.encode_messages(events))
+        if self.count_unread(events):
+            await self.send_payload({"type": "unread", "unread_count": self.unread_count})
+
+    async def send_payload(self, payload):
+        if self.encoder is not None:
+            await self.send(bytes_data=self.encoder.encode(payload))
+        else:
+            await self.send(text_data=json.dumps(payload))
 
+    async def send_unread_count(self):
+        self.unread_count = await database_sync_to_async(unread_count)(self.user, self.room_id)
+        await self.send_payload({"type": "unread", "unread_count": self.unread_count})
+
+    async def read_receipt(self, event):
+        if not self.receipts:
+            return
+        await self.send_payload({
+            "type": "read_receipt",
+            "user": event["user"],
+            "message_id": event["message_id"],
+            "uid": event["uid"],
+            "timestamp": event["timestamp"],
+        })
+        if event["user_id"] == self.user.id:
+            # This user's cursor moved (from this socket or another tab)
+            await self.send_unread_count()
 
     @database_sync_to_async
     def save_message(self, message):
         """Persist message to database."""
-        # Determine room
-        if self.room_name.startswith("room_"):
-            parts = self.room_name.split("_")
-            if len(parts) == 3:
-                user_ids = sorted([int(parts[1]), int(parts[2])])
-                room, created = Room.objects.get_or_create(
-                    name=f"room_{user_ids[0]}_{user_ids[1]}",
-                    defaults={"created_by": User.objects.get(id=user_ids[0])}
-                )
-                if created:
-                    for u in User.objects.filter(id__in=user_ids):
-                        room.participants.add(u)
-        else:
-            room = Room.objects.filter(name=self.room_name).first()
-            if not room:
-                raise ValueError(f"Room {self.room_name} does not exist")
-
-        return ChatMessage.objects.create(room=room, sender=self.user, message=message)
+        return ChatMessage.objects.create(room_id=self.room_id, sender=self.user, message=message)
 
 
 class RoomConsumer(AsyncJsonWebsocketConsumer):
     async def connect(self):
         await self.accept()
         await self.channel_layer.group_add("rooms", self.channel_name)
+        WEBSOCKET_CONNECTIONS.inc(kind="rooms")
 
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard("rooms", self.channel_name)
+        WEBSOCKET_CONNECTIONS.dec(kind="rooms")
 
     async def room_created(self, event):
         await self.send_json({
@@ -0,0 +1,192 @@
+# chat/management/commands/chat_fanout_benchmark.py
+
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import aiohttp
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from chat.models import Room
+
+ROOM_PREFIX = "fanout_bench_"
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark chat fan-out over real WebSockets: start a local Daphne (or use --url), "
+        "connect N clients spread over rooms, send messages in every room and report "
+        "send-to-receive latency percentiles. Use --redis-hosts/--layer to try sharded "
+        "or pub/sub channel layers against local Redis servers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=200)
+        parser.add_argument("--rooms", type=int, default=10)
+        parser.add_argument("--messages", type=int, default=20, help="Messages sent in each room.")
+        parser.add_argument("--interval", type=float, default=0.05, help="Seconds between sends in a room.")
+        parser.add_argument("--url", help="Base URL of a running server, e.g. ws://127.0.0.1:8000. Default: start Daphne.")
+        parser.add_argument("--port", type=int, default=8765, help="Port for the Daphne started by the benchmark.")
+        parser.add_argument(
+            "--redis-hosts",
+            help="Comma-separated Redis URLs (one per shard) for the started server's channel layer "
+                 "(sets CHANNEL_REDIS_HOSTS; needs a settings module that reads it, e.g. base or prod).",
+        )
+        parser.add_argument("--layer", choices=["core", "pubsub"], help="Channel layer backend for the started server.")
+        parser.add_argument(
+            "--idle", type=float, default=5,
+            help="Stop waiting for deliveries after this many quiet seconds (dropped broadcasts never arrive).",
+        )
+
+    def handle(self, *args, **options):
+        if options["clients"] < options["rooms"]:
+            raise CommandError("Need at least one client per room.")
+
+        users = [
+            User.objects.get_or_create(username=f"fanout_{i}", defaults={"role": "client"})[0]
+            for i in range(options["clients"])
+        ]
+        tokens = [str(AccessToken.for_user(user)) for user in users]
+        Room.objects.filter(name__startswith=ROOM_PREFIX).delete()
+
+        server = None
+        url = options["url"]
+        if not url:
+            server = self.start_daphne(options)
+            url = f"ws://127.0.0.1:{options['port']}"
+        try:
+            result = asyncio.run(self.run(url, tokens, options))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=10)
+            Room.objects.filter(name__startswith=ROOM_PREFIX).delete()
+
+        self.report(result, options)
+
+    def start_daphne(self, options):
+        env = dict(os.environ)
+        if options["redis_hosts"]:
+            env["CHANNEL_REDIS_HOSTS"] = options["redis_hosts"]
+        if options["layer"]:
+            env["CHANNEL_LAYER_BACKEND"] = options["layer"]
+
+        server = subprocess.Popen(
+            [sys.executable, "-m", "daphne", "-b", "127.0.0.1", "-p", str(options["port"]),
+             "backend_project.asgi:application"],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"Daphne exited with code {server.returncode}")
+            try:
+                socket.create_connection(("127.0.0.1", options["port"]), timeout=1).close()
+                return server
+            except OSError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError("Daphne did not start listening within 30s")
+
+    async def run(self, url, tokens, options):
+        rooms = options["rooms"]
+        sent = {}                       # message tag -> perf_counter() when sent
+        received = defaultdict(list)    # message tag -> latency (s) per recipient
+        members = defaultdict(int)      # room -> connected clients
+        last_delivery = [time.perf_counter()]
+
+        async def listen(ws):
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    break
+                tag = json.loads(msg.data).get("message", "")
+                if tag in sent:
+                    now = time.perf_counter()
+                    received[tag].append(now - sent[tag])
+                    last_delivery[0] = now
+
+        async with aiohttp.ClientSession() as session:
+            started = time.perf_counter()
+            sockets = []
+            for i, token in enumerate(tokens):
+                room = f"{ROOM_PREFIX}{i % rooms}"
+                ws = await session.ws_connect(f"{url}/ws/chat/{room}/?token={token}", origin=url.replace("ws", "http", 1))
+                sockets.append((room, ws))
+                members[room] += 1
+            connect_seconds = time.perf_counter() - started
+            listeners = [asyncio.create_task(listen(ws)) for _, ws in sockets]
+
+            async def send(room, ws):
+                for n in range(options["messages"]):
+                    tag = f"{room}:{n}"
+                    sent[tag] = time.perf_counter()
+                    await ws.send_str(json.dumps({"message": tag}))
+                    await asyncio.sleep(options["interval"])
+
+            # The first client of each room sends
+            senders = {}
+            for room, ws in sockets:
+                senders.setdefault(room, ws)
+            await asyncio.gather(*(send(room, ws) for room, ws in senders.items()))
+
+            expected = sum(members[tag.split(":")[0]] for tag in sent)
+            while sum(len(v) for v in received.values()) < expected:
+                if time.perf_counter() - last_delivery[0] > options["idle"]:
+                    break
+                await asyncio.sleep(0.05)
+
+            for _, ws in sockets:
+                await ws.close()
+            for task in listeners:
+                task.cancel()
+            await asyncio.gather(*listeners, return_exceptions=True)
+
+        return {
+            "connect_seconds": connect_seconds,
+            "sent": len(sent),
+            "expected": expected,
+            "latencies": sorted(latency for values in received.values() for latency in values),
+            # Time until the last recipient had each message
+            "fanout": sorted(max(values) for values in received.values() if values),
+        }
+
+    def report(self, result, options):
+        layer = options["layer"] or "configured"
+        shards = len(options["redis_hosts"].split(",")) if options["redis_hosts"] else None
+        self.stdout.write(
+            f"{options['clients']} clients in {options['rooms']} rooms, {result['sent']} messages, "
+            f"{layer} channel layer" + (f" on {shards} Redis shard(s)" if shards else "")
+        )
+        self.stdout.write(f"Connected in {result['connect_seconds']:.2f}s")
+
+        delivered = len(result["latencies"])
+        self.stdout.write(f"Delivered {delivered} of {result['expected']} broadcasts")
+        for label, values in (("Delivery latency", result["latencies"]), ("Fan-out completion", result["fanout"])):
+            self.stdout.write(
+                f"{label} (ms): " + ", ".join(
+                    f"p{pct} {percentile(values, pct) * 1000:.1f}" for pct in (50, 90, 99)
+                ) + f", max {(values[-1] if values else 0) * 1000:.1f}"
+            )
+
+        if delivered < result["expected"]:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ {result['expected'] - delivered} broadcasts never arrived (channel layer capacity?)."
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ Fan-out benchmark finished."))
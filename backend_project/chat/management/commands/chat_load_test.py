@@ -0,0 +1,131 @@
+# chat/management/commands/chat_load_test.py
+
+import asyncio
+import json
+import time
+
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from accounts.models import User
+from chat.consumers import ChatConsumer
+from chat.models import ChatMessage, Room
+from chat.persistence import get_message_writer
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate many chat clients in one room and report messages/second "
+        "(broadcast to every client, and written to the database). Runs the "
+        "consumer in-process against the configured channel layer and database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=50)
+        parser.add_argument("--messages", type=int, default=20, help="Messages sent by each client.")
+        parser.add_argument("--room", default="load-test")
+        parser.add_argument(
+            "--idle", type=float, default=2,
+            help="Stop waiting for a client's broadcasts after this many quiet seconds "
+                 "(broadcasts dropped by a full channel layer never arrive).",
+        )
+        parser.add_argument(
+            "--write-behind", action="store_true", dest="write_behind",
+            help="Use batched write-behind persistence (CHAT_WRITE_BEHIND).",
+        )
+
+    def handle(self, *args, **options):
+        users = [
+            User.objects.get_or_create(username=f"loadtest_{i}", defaults={"role": "client"})[0]
+            for i in range(options["clients"])
+        ]
+        Room.objects.filter(name=options["room"]).delete()
+
+        with override_settings(CHAT_WRITE_BEHIND=options["write_behind"]):
+            result = asyncio.run(self.run(users, options))
+
+        Room.objects.filter(name=options["room"]).delete()
+
+        mode = "write-behind" if options["write_behind"] else "synchronous"
+        sent = result["sent"]
+        self.stdout.write(f"Mode: {mode}, {len(users)} clients x {options['messages']} messages = {sent}")
+        expected = sent * len(users)
+        self.stdout.write(
+            f"Delivered {result['delivered']} of {expected} broadcasts in {result['delivery_seconds']:.2f}s "
+            f"({sent / result['delivery_seconds']:.0f} messages/s)"
+        )
+        if result["delivered"] < expected:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ {expected - result['delivered']} broadcasts were dropped (channel layer capacity)."
+            ))
+        self.stdout.write(
+            f"Persisted {result['persisted']} of {sent} in {result['persist_seconds']:.2f}s "
+            f"({result['persisted'] / result['persist_seconds']:.0f} messages/s)"
+        )
+        style = self.style.SUCCESS if result["persisted"] == sent else self.style.WARNING
+        self.stdout.write(style("✅ Load test finished." if result["persisted"] == sent else "⚠️ Some messages were not persisted."))
+
+    async def run(self, users, options):
+        room, per_client = options["room"], options["messages"]
+        clients = []
+        for user in users:
+            communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), f"/ws/chat/{room}/")
+            communicator.scope["user"] = user
+            communicator.scope["url_route"] = {"kwargs": {"room_name": room}}
+            connected, _ = await communicator.connect()
+            if not connected:
+                raise RuntimeError(f"{user.username} could not connect")
+            clients.append(communicator)
+
+        sent = len(clients) * per_client
+
+        async def receive_all(communicator):
+            received, last = 0, time.perf_counter()
+            while received < sent:
+                # Read the output queue directly: receive_from() cancels the consumer on timeout
+                try:
+                    await asyncio.wait_for(communicator.output_queue.get(), options["idle"])
+                except asyncio.TimeoutError:
+                    break
+                received, last = received + 1, time.perf_counter()
+            return received, last
+
+        async def send_all(index, communicator):
+            for n in range(per_client):
+                await communicator.send_to(text_data=json.dumps({"message": f"client {index} message {n}"}))
+
+        # Off the shared DB thread so polling doesn't slow down the consumers' writes
+        count_rows = database_sync_to_async(ChatMessage.objects.filter(room__name=room).count, thread_sensitive=False)
+
+        async def wait_persisted():
+            persisted = await count_rows()
+            while persisted < sent and (time.perf_counter() - started) < options["idle"] + delivery_seconds:
+                await asyncio.sleep(0.05)
+                persisted = await count_rows()
+            return persisted, time.perf_counter()
+
+        started = time.perf_counter()
+        delivery_seconds = float("inf")
+        receivers = [asyncio.create_task(receive_all(c)) for c in clients]
+        persister = asyncio.create_task(wait_persisted())
+        await asyncio.gather(*(send_all(i, c) for i, c in enumerate(clients)))
+        results = await asyncio.gather(*receivers)
+        delivered = sum(received for received, _ in results)
+        delivery_seconds = max(last for _, last in results) - started
+
+        await get_message_writer().flush()
+        persisted, persisted_at = await persister
+        persist_seconds = persisted_at - started
+
+        for communicator in clients:
+            await communicator.disconnect()
+
+        return {
+            "sent": sent,
+            "delivered": delivered,
+            "delivery_seconds": delivery_seconds,
+            "persisted": persisted,
+            "persist_seconds": persist_seconds,
+        }
@@ -0,0 +1,70 @@
+# chat/membership.py
+"""
+Room resolution for chat sockets.
+
+``join_room`` turns the room name from the WebSocket URL into a room id,
+creating the room and adding the participants the first time. The result
+is cached per (room name, user) in the shared cache, so reconnects skip
+the database entirely and ChatConsumer only has to INSERT messages.
+
+chat.signals drops the cached entries when a participant leaves or is
+removed, or when a room is renamed or deleted.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from .models import Room
+
+User = get_user_model()
+
+MEMBERSHIP_CACHE_TIMEOUT = 60 * 60  # seconds; invalidation normally comes first
+
+
+def membership_cache_key(room_name, user_id):
+    return f"chat:membership:{room_name}:{user_id}"
+
+
+def private_room_user_ids(room_name):
+    """``"room_7_3"`` -> ``[3, 7]``; None for names that are not private rooms."""
+    parts = room_name.split("_")
+    if len(parts) != 3 or parts[0] != "room":
+        return None
+    try:
+        return sorted([int(parts[1]), int(parts[2])])
+    except ValueError:
+        return None
+
+
+def normalize_room_name(room_name):
+    """The stored name of a room: private rooms list the lower user id first."""
+    user_ids = private_room_user_ids(room_name)
+    return f"room_{user_ids[0]}_{user_ids[1]}" if user_ids else room_name
+
+
+def join_room(room_name, user):
+    """
+    Return the id of ``room_name``, creating it and adding ``user`` (for a
+    private ``room_<id1>_<id2>`` room: both users) as participants if needed.
+    """
+    user_ids = private_room_user_ids(room_name)
+    room_name = normalize_room_name(room_name)
+
+    key = membership_cache_key(room_name, user.id)
+    room_id = cache.get(key)
+    if room_id is not None:
+        return room_id
+
+    if user_ids:
+        room, _ = Room.objects.get_or_create(name=room_name, defaults={"created_by_id": user_ids[0]})
+        # add() skips users that are already participants
+        room.participants.add(*user_ids)
+    else:
+        room, _ = Room.objects.get_or_create(name=room_name, defaults={"created_by": user})
+        room.participants.add(user)
+
+    cache.set(key, room.id, MEMBERSHIP_CACHE_TIMEOUT)
+    return room.id
+
+
+def forget_memberships(room_name, user_ids):
+    cache.delete_many([membership_cache_key(room_name, user_id) for user_id in user_ids])
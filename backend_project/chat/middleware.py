@@ -1,31 +1,99 @@
 # chat/middleware.py
+"""
+JWT authentication for WebSockets.
+
+Decoding a token needs no database, so it runs on the event loop. The
+user it names is cached in-process per (user id, token jti) for
+WS_USER_CACHE_TTL seconds: reconnects with the same token (e.g. every
+client after a deploy) are served without a thread hop or a query.
+chat.signals drops a user's entries when the user is saved or deleted;
+that only reaches this process, so other processes pick up a deactivation
+or role change within the TTL.
+"""
+import logging
+import time
+from collections import OrderedDict
 from urllib.parse import parse_qs
 from channels.middleware import BaseMiddleware
 from channels.db import database_sync_to_async
+from django.conf import settings
 from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import AccessToken
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
+
+USER_CACHE_MAX_SIZE = 10_000
+
+# (str(user_id), jti) -> (expires_at, user); oldest first
+_user_cache = OrderedDict()
+
+
+def _cache_get(key):
+    entry = _user_cache.get(key)
+    if entry is None:
+        return None
+    expires_at, user = entry
+    if expires_at <= time.monotonic():
+        _user_cache.pop(key, None)
+        return None
+    return user
+
+
+def _cache_set(key, user):
+    ttl = getattr(settings, "WS_USER_CACHE_TTL", 60)
+    if ttl <= 0:
+        return
+    _user_cache[key] = (time.monotonic() + ttl, user)
+    _user_cache.move_to_end(key)
+    while len(_user_cache) > USER_CACHE_MAX_SIZE:
+        _user_cache.popitem(last=False)
+
+
+def forget_user(user_id):
+    """Drop every cached entry for ``user_id``."""
+    user_id = str(user_id)
+    for key in [key for key in list(_user_cache) if key[0] == user_id]:
+        _user_cache.pop(key, None)
+
 
 @database_sync_to_async
-def get_user_from_token(token):
+def load_user(user_id):
+    # Same rule as JWTAuthentication: deactivated users can't authenticate
+    return User.objects.filter(id=user_id, is_active=True).first()
+
+
+async def get_user_from_token(token):
     """Return a User instance from JWT token or None."""
     try:
         access_token = AccessToken(token)
-        user_id = access_token["user_id"]
-        print(f"✅ JWTAuthMiddleware: Token decoded successfully. user_id={user_id}")
-        return User.objects.get(id=user_id)
-    except TokenError as e:
-        print(f"❌ JWTAuthMiddleware: Token error - {e}")
+        user_id = access_token[api_settings.USER_ID_CLAIM]
+        # The claim is a string in newer simplejwt versions
+        key = (str(user_id), access_token.get(api_settings.JTI_CLAIM))
+    except (TokenError, KeyError) as e:
+        logger.info("WebSocket token rejected: %s", e)
         return None
-    except User.DoesNotExist:
-        print(f"❌ JWTAuthMiddleware: No user found for token.")
+    except Exception:
+        logger.exception("Unexpected error decoding WebSocket token")
         return None
-    except Exception as e:
-        print(f"❌ JWTAuthMiddleware: Unexpected error - {e}")
+
+    user = _cache_get(key)
+    if user is not None:
+        return user
+
+    try:
+        user = await load_user(user_id)
+    except Exception:
+        logger.exception("Unexpected error loading WebSocket user_id=%s", user_id)
         return None
+    if user is None:
+        logger.info("WebSocket token for unknown or inactive user_id=%s", user_id)
+        return None
+    _cache_set(key, user)
+    return user
 
 
 class JWTAuthMiddleware(BaseMiddleware):
@@ -34,18 +102,16 @@ class JWTAuthMiddleware(BaseMiddleware):
         params = parse_qs(query_string)
         token = params.get("token", [None])[0]
 
-        print("🔹 Incoming WebSocket connection")
-        print(f"🔹 Query string: {query_string}")
-        print(f"🔹 Extracted token: {token[:20]}..." if token else "⚠️ No token provided")
-
         user = None
         if token:
             user = await get_user_from_token(token)
 
-        if user:
-            print(f"✅ Authenticated WebSocket user: {user.username}")
-        else:
-            print("❌ Authentication failed — using AnonymousUser")
+        # Never log the token itself, only whether one was sent
+        logger.debug(
+            "WebSocket %s: %s", scope.get("path"),
+            f"authenticated as {user.username}" if user else
+            "invalid token, using AnonymousUser" if token else "no token, using AnonymousUser",
+        )
 
         scope["user"] = user or AnonymousUser()
         return await super().__call__(scope, receive, send)
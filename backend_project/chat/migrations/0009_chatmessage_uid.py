@@ -0,0 +1,37 @@
+import chat.models
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def assign_uids(apps, schema_editor):
+    ChatMessage = apps.get_model("chat", "ChatMessage")
+    messages = list(ChatMessage.objects.only("id"))
+    for message in messages:
+        message.uid = chat.models.new_ulid()
+    ChatMessage.objects.bulk_update(messages, ["uid"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0008_alter_chatmessage_room'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='uid',
+            field=models.CharField(editable=False, max_length=26, null=True),
+        ),
+        migrations.RunPython(assign_uids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='uid',
+            field=models.CharField(default=chat.models.new_ulid, editable=False, max_length=26, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
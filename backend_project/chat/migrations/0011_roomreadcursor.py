@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0010_chatmessage_history_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomReadCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_at', models.DateTimeField()),
+                ('last_read_id', models.BigIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_cursors', to='chat.room')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='room_read_cursors', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'room'), name='chat_read_cursor_user_room_uniq')],
+            },
+        ),
+        # Existing participants have seen their rooms' history: without a
+        # cursor every message would show up as unread after the deploy
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO chat_roomreadcursor (user_id, room_id, last_read_at, last_read_id, updated_at)
+                SELECT participant.user_id, participant.room_id, latest.timestamp, latest.id, now()
+                FROM chat_room_participants AS participant
+                CROSS JOIN LATERAL (
+                    SELECT message.id, message.timestamp
+                    FROM chat_chatmessage AS message
+                    WHERE message.room_id = participant.room_id
+                    ORDER BY message.timestamp DESC, message.id DESC
+                    LIMIT 1
+                ) AS latest
+                ON CONFLICT (user_id, room_id) DO NOTHING;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -2,7 +2,8 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.conf import settings
-import secrets, string, random
+from django.utils import timezone
+import secrets, string, random, time, os
 
 User = get_user_model()
 
@@ -12,6 +13,23 @@ def generate_passkey(length: int = 6) -> str:
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
 
 
+CROCKFORD_BASE32 = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+
+def new_ulid() -> str:
+    """
+    26-character ULID: 48-bit millisecond timestamp + 80 random bits, Crockford
+    base32. Sorts by creation time, so it can be assigned (and broadcast)
+    before the message is written.
+    """
+    value = (int(time.time() * 1000) << 80) | int.from_bytes(os.urandom(10), "big")
+    chars = []
+    for _ in range(26):
+        value, index = divmod(value, 32)
+        chars.append(CROCKFORD_BASE32[index])
+    return "".join(reversed(chars))
+
+
 class Room(models.Model):
     """
     Represents a chat room. Each room can have multiple participants.
@@ -40,14 +58,42 @@ class Room(models.Model):
 class ChatMessage(models.Model):
     """
     Represents a single chat message sent by a user in a room.
+    - uid: server-generated ULID, known before the row is written (write-behind)
+      and used to make repeated writes of the same message a no-op
     """
+    uid = models.CharField(max_length=26, unique=True, default=new_ulid, editable=False)
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="messages", null=True, blank=True)
     sender = models.ForeignKey(User, on_delete=models.CASCADE)
     message = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ["timestamp"]
+        indexes = [
+            # Keyset pagination of a room's history (chat.pagination)
+            models.Index(fields=["room", "timestamp", "id"], name="chatmsg_room_ts_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.sender.username}: {self.message[:20]}"
+
+
+class RoomReadCursor(models.Model):
+    """
+    How far a user has read a room. Messages after (last_read_at,
+    last_read_id) in the room's (timestamp, id) order are unread; see
+    chat.unread.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="room_read_cursors")
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="read_cursors")
+    last_read_at = models.DateTimeField()
+    last_read_id = models.BigIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "room"], name="chat_read_cursor_user_room_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} read {self.room_id} up to {self.last_read_id}"
@@ -0,0 +1,159 @@
+# chat/pagination.py
+"""
+Keyset pagination for a room's message history.
+
+Pages are addressed by a position, ``(timestamp, id)`` of a message,
+instead of an offset, so every page is one range scan of the
+(room, timestamp, id) index however deep it is, and messages arriving
+meanwhile don't shift the pages.
+
+Query parameters (at most one position):
+
+- ``before=<cursor>``: the page of messages older than the cursor
+- ``after=<cursor>``: the page of messages newer than the cursor
+- ``since_id=<id>`` / ``since_uid=<uid>``: messages newer than that message
+- ``limit``: page size
+
+Responses are ``{"results": [...oldest first], "older", "newer", "has_more"}``.
+Pass ``older`` back as ``before`` to load older messages and ``newer`` as
+``after`` to fetch what arrived since; ``has_more`` is whether more pages
+exist in the requested direction.
+
+With ``CHAT_WRITE_BEHIND`` on, a message is stamped when it is broadcast but
+its row is written up to a batch interval (longer while retrying a database
+outage) later, so rows don't appear in ``(timestamp, id)`` order: a message
+can be written after a newer one that a client has already seen. A sync
+(``since_id`` / ``since_uid``) therefore starts ``CHAT_SYNC_OVERLAP`` seconds
+before the message it is given and repeats what the client may already
+have; clients dedupe by uid. ``after`` paging is not rewound, so following
+``newer`` always makes progress.
+"""
+import base64
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+from .models import CROCKFORD_BASE32, ChatMessage
+
+
+def encode_cursor(timestamp, message_id):
+    raw = f"{timestamp.isoformat()}|{message_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, message_id = raw.split("|")
+        return datetime.fromisoformat(timestamp), int(message_id)
+    except (ValueError, UnicodeDecodeError):
+        raise NotFound("Invalid cursor.")
+
+
+def ulid_timestamp(uid):
+    """The creation time embedded in a ULID (millisecond precision)."""
+    # 26 characters, the first at most "7" (the timestamp is 48 of its 50 bits)
+    if len(uid) != 26 or uid[0] > "7":
+        raise NotFound("Invalid uid.")
+    try:
+        value = 0
+        for char in uid[:10].upper():
+            value = value * 32 + CROCKFORD_BASE32.index(char)
+        return datetime.fromtimestamp(value / 1000, dt_timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        # Not Crockford base32, or a time datetime can't represent
+        raise NotFound("Invalid uid.")
+
+
+def older_than(timestamp, message_id):
+    # The redundant timestamp__lte bounds the index range scan
+    return Q(timestamp__lte=timestamp) & (Q(timestamp__lt=timestamp) | Q(id__lt=message_id))
+
+
+def newer_than(timestamp, message_id):
+    return Q(timestamp__gte=timestamp) & (Q(timestamp__gt=timestamp) | Q(id__gt=message_id))
+
+
+class MessageCursorPagination(BasePagination):
+    page_size = 50
+    max_page_size = 200
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get("limit", self.page_size))
+        except ValueError:
+            raise ValidationError({"limit": "Must be an integer."})
+        return max(1, min(limit, self.max_page_size))
+
+    def get_position(self, request, queryset):
+        """Return ``(direction, (timestamp, id))``, or ``("before", None)`` for the latest page."""
+        params = request.query_params
+        lookup = queryset.select_related(None).only("id", "timestamp")
+        if params.get("before"):
+            return "before", decode_cursor(params["before"])
+        if params.get("after"):
+            return "after", decode_cursor(params["after"])
+        if params.get("since_id"):
+            try:
+                message = lookup.get(id=params["since_id"])
+            except (ChatMessage.DoesNotExist, ValueError):
+                raise NotFound("Unknown message.")
+            return "after", (message.timestamp, message.id)
+        if params.get("since_uid"):
+            message = lookup.filter(uid=params["since_uid"]).first()
+            if message is not None:
+                return "after", (message.timestamp, message.id)
+            # Not written yet (write-behind): resume from the time in the ULID.
+            # This may repeat messages from that millisecond; clients dedupe by uid.
+            return "after", (ulid_timestamp(params["since_uid"]), 0)
+        return "before", None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        limit = self.get_limit(request)
+        direction, position = self.get_position(request, queryset)
+
+        if direction == "after":
+            rows = list(queryset.filter(newer_than(*position)).order_by("timestamp", "id")[:limit + 1])
+            self.has_more = len(rows) > limit
+            rows = rows[:limit]
+        else:
+            if position is not None:
+                queryset = queryset.filter(older_than(*position))
+            rows = list(queryset.order_by("-timestamp", "-id")[:limit + 1])
+            self.has_more = len(rows) > limit
+            rows = rows[:limit][::-1]
+
+        self.older = encode_cursor(rows[0].timestamp, rows[0].id) if rows else None
+        if direction == "before" and not self.has_more:
+            self.older = None
+        if rows:
+            self.newer = encode_cursor(rows[-1].timestamp, rows[-1].id)
+        else:
+            self.newer = encode_cursor(*position) if position is not None else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            "results": data,
+            "older": self.older,
+            "newer": self.newer,
+            "has_more": self.has_more,
+        })
+
+
+class MessageSyncPagination(MessageCursorPagination):
+    """Larger pages for filling the gap after a WebSocket reconnect."""
+    page_size = 500
+    max_page_size = 1000
+
+    def get_position(self, request, queryset):
+        direction, position = super().get_position(request, queryset)
+        params = request.query_params
+        if settings.CHAT_WRITE_BEHIND and not params.get("after") and position is not None:
+            # Catch messages stamped before the client's last one but written after it
+            position = (position[0] - timedelta(seconds=settings.CHAT_SYNC_OVERLAP), 0)
+        return direction, position
@@ -0,0 +1,111 @@
+# chat/persistence.py
+"""
+Write-behind persistence for chat messages (settings.CHAT_WRITE_BEHIND).
+
+ChatConsumer builds the ChatMessage in memory (its ULID ``uid`` and
+timestamp are assigned on construction), broadcasts it straight away and
+hands it to the process-wide MessageWriter. A background task on the
+event loop writes pending messages with one ``bulk_create`` per batch.
+
+Delivery to the database is at-least-once: a batch leaves the queue only
+after its write commits, failed writes are retried with backoff, and
+re-writing a message is a no-op because ``uid`` is unique. Messages still
+queued when the process dies are lost, so disconnecting consumers flush
+the queue before they go.
+"""
+import asyncio
+import logging
+from collections import deque
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .models import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_DELAY = 5  # seconds
+
+
+def write_messages(messages):
+    """Insert ``messages``; rows whose uid already exists are skipped."""
+    try:
+        with transaction.atomic():
+            ChatMessage.objects.bulk_create(messages, ignore_conflicts=True)
+    except IntegrityError:
+        # ignore_conflicts only covers uid; a bad row (e.g. its room was
+        # deleted meanwhile) must not hold back the rest of the batch
+        for message in messages:
+            try:
+                with transaction.atomic():
+                    ChatMessage.objects.bulk_create([message], ignore_conflicts=True)
+            except IntegrityError as exc:
+                logger.warning("Dropping chat message %s: %s", message.uid, exc)
+
+
+class MessageWriter:
+    def __init__(self, batch_size=500, interval=0.05):
+        self.batch_size = batch_size
+        self.interval = interval  # seconds a message may wait for its batch to fill
+        self.pending = deque()
+        self._flusher = None
+        self._wakeup = None
+        self._lock = None
+        self._loop = None
+
+    def submit(self, message):
+        """Queue ``message`` for writing; must be called from the event loop."""
+        self.pending.append(message)
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._lock = asyncio.Lock()
+            self._flusher = None
+        if self._flusher is None or self._flusher.done():
+            self._flusher = loop.create_task(self._run())
+        if len(self.pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _run(self):
+        delay = self.interval
+        while self.pending:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if await self.flush():
+                delay = self.interval
+            else:
+                delay = min(max(delay, self.interval) * 2, MAX_RETRY_DELAY)
+
+    async def flush(self):
+        """Write everything pending. Returns False if a write failed (the rows stay queued)."""
+        if self._lock is None:
+            return True
+        async with self._lock:
+            while self.pending:
+                batch = [self.pending[i] for i in range(min(self.batch_size, len(self.pending)))]
+                try:
+                    await database_sync_to_async(write_messages)(batch)
+                except Exception:
+                    logger.exception("Writing %d chat messages failed; will retry", len(batch))
+                    return False
+                for _ in batch:
+                    self.pending.popleft()
+        return True
+
+
+_writer = None
+
+
+def get_message_writer():
+    global _writer
+    if _writer is None:
+        _writer = MessageWriter(
+            batch_size=getattr(settings, "CHAT_WRITE_BEHIND_BATCH_SIZE", 500),
+            interval=getattr(settings, "CHAT_WRITE_BEHIND_INTERVAL", 0.05),
+        )
+    return _writer
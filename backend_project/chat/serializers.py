@@ -7,7 +7,7 @@ class ChatMessageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ChatMessage
-        fields = ["id", "sender", "message", "timestamp", "room"]
+        fields = ["id", "uid", "sender", "message", "timestamp", "room"]
 
 class RoomSerializer(serializers.ModelSerializer):
     participants = serializers.StringRelatedField(many=True, read_only=True)
@@ -24,15 +24,45 @@ class RoomSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_by", "created_at", "participants", "passkey"]
 
     def get_is_joined(self, obj):
+        if hasattr(obj, "is_joined"):
+            return obj.is_joined  # annotated by RoomViewSet
+        # Reuses the prefetched participants instead of one EXISTS per room
         user = self.context["request"].user
-        return obj.participants.filter(id=user.id).exists()
+        return any(p.id == user.id for p in obj.participants.all())
 
     def get_passkey(self, obj):
         user = self.context["request"].user
-        return obj.passkey if obj.created_by == user else None
+        return obj.passkey if obj.created_by_id == user.id else None
 
     def create(self, validated_data):
         user = self.context["request"].user
         room = Room.objects.create(created_by=user, **validated_data)
         room.participants.add(user)  
         return room
+
+
+class RoomListSerializer(RoomSerializer):
+    """
+    Room list entry built only from RoomViewSet's annotations: a participant
+    count instead of the participants, a preview of the last message and
+    the user's unread count.
+    """
+    participant_count = serializers.IntegerField(read_only=True)
+    unread_count = serializers.IntegerField(read_only=True)
+    last_message = serializers.SerializerMethodField()
+
+    class Meta(RoomSerializer.Meta):
+        fields = [
+            "id", "name", "created_by", "created_at", "participant_count",
+            "is_joined", "created_by_username", "passkey", "last_message",
+            "unread_count",
+        ]
+
+    def get_last_message(self, obj):
+        if obj.last_message_at is None:
+            return None
+        return {
+            "message": obj.last_message,
+            "sender": obj.last_message_sender,
+            "timestamp": serializers.DateTimeField().to_representation(obj.last_message_at),
+        }
@@ -0,0 +1,66 @@
+# chat/signals.py
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .membership import forget_memberships
+from .middleware import forget_user
+from .models import Room
+
+# Saves that can't change who a socket authenticates as
+USER_BOOKKEEPING_FIELDS = {"last_login", "last_seen", "is_online"}
+
+
+@receiver(m2m_changed, sender=Room.participants.through)
+def forget_removed_participants(sender, instance, action, reverse, pk_set, **kwargs):
+    """Leaving or being removed from a room must not survive in the membership cache."""
+    if action == "pre_clear":
+        # pk_set is None for clear(); remember who is about to go
+        if reverse:
+            instance._cleared_rooms = list(instance.chat_rooms.values_list("name", flat=True))
+        else:
+            instance._cleared_participants = list(instance.participants.values_list("id", flat=True))
+    elif action == "post_clear":
+        if reverse:
+            for name in getattr(instance, "_cleared_rooms", []):
+                forget_memberships(name, [instance.pk])
+        else:
+            forget_memberships(instance.name, getattr(instance, "_cleared_participants", []))
+    elif action == "post_remove":
+        if reverse:
+            for name in Room.objects.filter(pk__in=pk_set).values_list("name", flat=True):
+                forget_memberships(name, [instance.pk])
+        else:
+            forget_memberships(instance.name, pk_set)
+
+
+@receiver(pre_save, sender=Room)
+def forget_renamed_room(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is None or (update_fields is not None and "name" not in update_fields):
+        return
+    old_name = Room.objects.filter(pk=instance.pk).values_list("name", flat=True).first()
+    if old_name is not None and old_name != instance.name:
+        forget_memberships(old_name, instance.participants.values_list("id", flat=True))
+
+
+@receiver(pre_delete, sender=Room)
+def remember_deleted_room_participants(sender, instance, **kwargs):
+    instance._deleted_participants = list(instance.participants.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Room)
+def forget_deleted_room(sender, instance, **kwargs):
+    forget_memberships(instance.name, getattr(instance, "_deleted_participants", []))
+
+
+@receiver(post_save, sender=get_user_model())
+def forget_saved_user(sender, instance, update_fields=None, **kwargs):
+    """Deactivation, role changes etc. must not be served from the socket user cache."""
+    if update_fields is not None and set(update_fields) <= USER_BOOKKEEPING_FIELDS:
+        return
+    forget_user(instance.pk)
+
+
+@receiver(post_delete, sender=get_user_model())
+def forget_deleted_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
@@ -6,3 +6,12 @@ class CommandsTest(TestCase):
     def test_init_admin_creates_superuser(self):
         call_command("init_admin")
         self.assertTrue(User.objects.filter(username="admin").exists())
+
+class FanoutBenchmarkTest(TestCase):
+    def test_percentile_is_nearest_rank(self):
+        from chat.management.commands.chat_fanout_benchmark import percentile
+
+        values = [i / 1000 for i in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 0.05)
+        self.assertEqual(percentile(values, 99), 0.099)
+        self.assertEqual(percentile([], 90), 0.0)
@@ -0,0 +1,89 @@
+import json
+import zlib
+
+import msgpack
+import pytest
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from accounts.models import User
+from chat.compact import SUBPROTOCOL, SUBPROTOCOL_DEFLATE, CompactEncoder, choose_subprotocol
+from chat.consumers import ChatConsumer
+
+def event(n, sender_id=7, sender="alice"):
+    return {
+        "id": n, "uid": f"01J{n:023d}", "sender_id": sender_id, "sender": sender,
+        "message": "status update " * 5, "timestamp": "2026-01-01T08:00:00.250000+00:00",
+    }
+
+def test_choose_subprotocol_follows_client_preference():
+    assert choose_subprotocol([SUBPROTOCOL, SUBPROTOCOL_DEFLATE]) == SUBPROTOCOL
+    assert choose_subprotocol(["graphql-ws", SUBPROTOCOL_DEFLATE]) == SUBPROTOCOL_DEFLATE
+    assert choose_subprotocol(["graphql-ws"]) is None
+    assert choose_subprotocol(None) is None
+
+def test_batches_send_each_sender_name_once():
+    encoder = CompactEncoder()
+
+    first = msgpack.unpackb(encoder.encode_messages([event(1), event(2, 8, "bob")])[1:], strict_map_key=False)
+    assert first["t"] == "m"
+    assert first["u"] == {7: "alice", 8: "bob"}
+    assert first["m"][0] == [1, event(1)["uid"], 7, event(1)["message"], 1767254400250]
+
+    second = msgpack.unpackb(encoder.encode_messages([event(3)])[1:], strict_map_key=False)
+    assert "u" not in second
+
+def test_deflate_keeps_context_across_frames():
+    encoder = CompactEncoder(deflate=True)
+    inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+
+    def receive(frame):
+        assert frame[:1] == b"\x01"
+        return msgpack.unpackb(inflater.decompress(frame[1:] + b"\x00\x00\xff\xff"), strict_map_key=False)
+
+    first = encoder.encode_messages([event(1)])
+    second = encoder.encode_messages([event(2)])
+    assert receive(first)["m"][0][0] == 1
+    assert receive(second)["m"][0][0] == 2
+    # The repeated text is a back-reference into the previous frame
+    assert len(second) < len(first)
+    assert len(second) < len(CompactEncoder().encode_messages([event(2)])) // 2
+
+    # Small frames skip compression
+    assert encoder.encode({"type": "unread", "unread_count": 1})[:1] == b"\x00"
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_compact_socket_receives_batched_binary_frames(settings):
+    settings.CHAT_COMPACT_BATCH_WINDOW = 0.2
+    await sync_to_async(cache.clear)()
+    user = await sync_to_async(User.objects.create_user)(username="compact_user", password="1234")
+
+    async def connect(subprotocols):
+        communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), "/ws/chat/compact/", subprotocols=subprotocols)
+        communicator.scope["user"] = user
+        communicator.scope["url_route"] = {"kwargs": {"room_name": "compact"}}
+        connected, subprotocol = await communicator.connect()
+        assert connected
+        return communicator, subprotocol
+
+    compact, subprotocol = await connect([SUBPROTOCOL])
+    assert subprotocol == SUBPROTOCOL
+    legacy, _ = await connect(None)
+
+    # A msgpack frame and a text frame, in one burst
+    await compact.send_to(bytes_data=msgpack.packb({"message": "first"}))
+    await compact.send_to(text_data=json.dumps({"message": "second"}))
+
+    frame = await compact.receive_from()
+    assert isinstance(frame, bytes)
+    batch = msgpack.unpackb(frame[1:], strict_map_key=False)
+    assert [row[3] for row in batch["m"]] == ["first", "second"]
+    assert batch["u"] == {user.id: "compact_user"}
+
+    # JSON clients in the same room are unaffected
+    assert json.loads(await legacy.receive_from())["message"] == "first"
+    assert json.loads(await legacy.receive_from())["message"] == "second"
+
+    await compact.disconnect()
+    await legacy.disconnect()
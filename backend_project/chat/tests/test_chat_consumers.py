@@ -1,3 +1,5 @@
+import json
+
 import pytest
 from asgiref.sync import sync_to_async
 from channels.testing import WebsocketCommunicator
@@ -6,6 +8,8 @@ from backend_project.asgi import application
 from accounts.models import User
 from chat.models import Room
 from chat.consumers import ChatConsumer
+from chat.membership import join_room, membership_cache_key
+from django.core.cache import cache
 
 # ✅ Middleware to inject a test user into the scope
 class ForceAuthMiddleware:
@@ -17,6 +21,13 @@ class ForceAuthMiddleware:
         scope["user"] = self.user or AnonymousUser()
         return await self.inner(scope, receive, send)
 
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # join_room caches memberships; don't let room ids leak between tests
+    cache.clear()
+
+
 @pytest.mark.asyncio
 @pytest.mark.django_db
 async def test_chat_consumer_connect():
@@ -36,4 +47,70 @@ async def test_chat_consumer_connect():
 
     connected, _ = await communicator.connect()
     print("🔹 Incoming connection:", communicator.scope.get("user"))
-    assert connected
\ No newline at end of file
+    assert connected
+
+
+@pytest.mark.django_db
+def test_join_room_is_cached_until_participant_leaves(django_assert_num_queries):
+    user = User.objects.create_user(username="joiner", password="1234")
+
+    room_id = join_room("lobby", user)
+    assert Room.objects.get(pk=room_id).participants.filter(pk=user.pk).exists()
+
+    with django_assert_num_queries(0):
+        assert join_room("lobby", user) == room_id
+
+    Room.objects.get(pk=room_id).participants.remove(user)
+    assert cache.get(membership_cache_key("lobby", user.id)) is None
+
+
+@pytest.mark.django_db
+def test_join_private_room_adds_both_users():
+    first = User.objects.create_user(username="first", password="1234")
+    second = User.objects.create_user(username="second", password="1234")
+
+    # Either order resolves to the same room
+    room_id = join_room(f"room_{second.id}_{first.id}", second)
+    assert join_room(f"room_{first.id}_{second.id}", first) == room_id
+
+    room = Room.objects.get(pk=room_id)
+    assert room.name == f"room_{first.id}_{second.id}"
+    assert set(room.participants.values_list("id", flat=True)) == {first.id, second.id}
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_private_room_sockets_share_a_group_in_either_order():
+    first = await sync_to_async(User.objects.create_user)(username="left", password="1234")
+    second = await sync_to_async(User.objects.create_user)(username="right", password="1234")
+
+    async def connect(user, room_name):
+        communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), f"/ws/chat/{room_name}/")
+        communicator.scope["user"] = user
+        communicator.scope["url_route"] = {"kwargs": {"room_name": room_name}}
+        connected, _ = await communicator.connect()
+        assert connected
+        return communicator
+
+    sender = await connect(first, f"room_{second.id}_{first.id}")
+    receiver = await connect(second, f"room_{first.id}_{second.id}")
+
+    await sender.send_to(text_data=json.dumps({"message": "hi"}))
+    assert json.loads(await receiver.receive_from())["message"] == "hi"
+
+    await sender.disconnect()
+    await receiver.disconnect()
+
+
+@pytest.mark.django_db
+def test_sending_a_message_is_a_single_insert(django_assert_num_queries):
+    user = User.objects.create_user(username="sender", password="1234")
+    consumer = ChatConsumer()
+    consumer.user = user
+    consumer.room_id = join_room("busy", user)
+
+    # .func: the undecorated method, run on this thread's test connection
+    with django_assert_num_queries(1):
+        message = vars(ChatConsumer)["save_message"].func(consumer, "hello")
+
+    assert message.room_id == consumer.room_id
@@ -1,6 +1,6 @@
 import pytest
 import uuid
-from chat.middleware import JWTAuthMiddleware, get_user_from_token
+from chat.middleware import JWTAuthMiddleware, _user_cache, get_user_from_token
 from accounts.tests.conftest import user_factory
 from rest_framework_simplejwt.tokens import AccessToken
 from django.contrib.auth.models import AnonymousUser
@@ -54,3 +54,42 @@ async def test_jwt_auth_middleware_anonymous():
     await middleware(scope, receive, send)
 
     assert isinstance(scope["user"], AnonymousUser)
+
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_get_user_from_token_is_cached_until_user_changes(user_factory, monkeypatch):
+    username = f"user_{uuid.uuid4().hex}"
+    user = await database_sync_to_async(user_factory)(username=username)
+    token = str(AccessToken.for_user(user))
+
+    assert await get_user_from_token(token) == user
+    with monkeypatch.context() as mp:
+        # Served from the cache: no query and no thread hop
+        mp.setattr("chat.middleware.load_user", lambda user_id: pytest.fail("cache miss"))
+        assert await get_user_from_token(token) == user
+
+    # Login bookkeeping keeps the entry; deactivation drops it
+    await database_sync_to_async(user.save)(update_fields=["last_login"])
+    assert _user_cache.get((str(user.id), AccessToken(token)["jti"])) is not None
+
+    user.is_active = False
+    await database_sync_to_async(user.save)(update_fields=["is_active"])
+    assert await get_user_from_token(token) is None
+
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_get_user_from_token_caches_per_token(user_factory):
+    username = f"user_{uuid.uuid4().hex}"
+    user = await database_sync_to_async(user_factory)(username=username)
+    first, second = str(AccessToken.for_user(user)), str(AccessToken.for_user(user))
+
+    await get_user_from_token(first)
+    await get_user_from_token(second)
+    assert {key for key in _user_cache if key[0] == str(user.id)} == {
+        (str(user.id), AccessToken(first)["jti"]), (str(user.id), AccessToken(second)["jti"]),
+    }
+
+    await database_sync_to_async(user.delete)()
+    assert not any(key[0] == str(user.id) for key in _user_cache)
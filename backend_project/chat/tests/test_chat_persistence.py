@@ -0,0 +1,55 @@
+import json
+
+import pytest
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from accounts.models import User
+from chat.consumers import ChatConsumer
+from chat.models import ChatMessage, Room, new_ulid
+from chat.persistence import get_message_writer, write_messages
+
+@pytest.mark.django_db
+def test_ulids_sort_by_creation_time():
+    first = new_ulid()
+    second = new_ulid()
+    assert len(first) == 26
+    assert first[:10] <= second[:10]  # 48-bit millisecond prefix
+
+# transaction=True: foreign keys are checked when write_messages() commits
+@pytest.mark.django_db(transaction=True)
+def test_write_messages_is_idempotent_and_skips_bad_rows():
+    user = User.objects.create_user(username="batcher", password="1234")
+    room = Room.objects.create(name="batch-room", created_by=user)
+    good = ChatMessage(room=room, sender=user, message="kept")
+    orphan = ChatMessage(room_id=room.id + 1000, sender=user, message="room is gone")
+
+    write_messages([good, orphan])
+    write_messages([good])  # a retried batch
+
+    assert list(ChatMessage.objects.values_list("uid", flat=True)) == [good.uid]
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_write_behind_broadcasts_before_the_row_exists(settings):
+    settings.CHAT_WRITE_BEHIND = True
+    settings.CHAT_WRITE_BEHIND_INTERVAL = 60  # only the explicit flush writes
+    await sync_to_async(cache.clear)()
+    user = await sync_to_async(User.objects.create_user)(username="writebehind", password="1234")
+
+    communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), "/ws/chat/wb-room/")
+    communicator.scope["user"] = user
+    communicator.scope["url_route"] = {"kwargs": {"room_name": "wb-room"}}
+    connected, _ = await communicator.connect()
+    assert connected
+
+    await communicator.send_to(text_data=json.dumps({"message": "hello"}))
+    event = json.loads(await communicator.receive_from())
+    assert event["id"] is None
+    assert event["message"] == "hello"
+    assert not await sync_to_async(ChatMessage.objects.filter(uid=event["uid"]).exists)()
+
+    await get_message_writer().flush()
+    assert await sync_to_async(ChatMessage.objects.filter(uid=event["uid"], room__name="wb-room").exists)()
+
+    await communicator.disconnect()
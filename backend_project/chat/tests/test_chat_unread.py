@@ -0,0 +1,126 @@
+import importlib
+import json
+import uuid
+
+import pytest
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.db import connection
+from rest_framework.test import APIClient
+from accounts.models import User
+from chat.consumers import ChatConsumer
+from chat.models import ChatMessage, Room, RoomReadCursor
+from chat.unread import mark_read, unread_count
+
+@pytest.fixture
+def chat_room(db):
+    reader = User.objects.create_user(username=f"reader_{uuid.uuid4().hex[:8]}", password="1234")
+    writer = User.objects.create_user(username=f"writer_{uuid.uuid4().hex[:8]}", password="1234")
+    room = Room.objects.create(name=f"unread_{uuid.uuid4().hex[:8]}", created_by=writer)
+    room.participants.add(reader, writer)
+    messages = [ChatMessage.objects.create(room=room, sender=writer, message=f"m{i}") for i in range(5)]
+    return room, reader, writer, messages
+
+@pytest.mark.django_db
+def test_unread_count_follows_the_read_cursor(chat_room):
+    room, reader, writer, messages = chat_room
+    ChatMessage.objects.create(room=room, sender=reader, message="own messages are never unread")
+
+    assert unread_count(reader, room.id) == 5
+    assert unread_count(writer, room.id) == 1
+
+    assert mark_read(reader, room.id, message_id=messages[2].id) == messages[2]
+    assert unread_count(reader, room.id) == 2
+
+    # A late receipt for an older message doesn't move the cursor back
+    mark_read(reader, room.id, uid=messages[0].uid)
+    assert RoomReadCursor.objects.get(user=reader, room=room).last_read_id == messages[2].id
+
+    mark_read(reader, room.id)
+    assert unread_count(reader, room.id) == 0
+    for message_id in ("not-a-number", [1], {"id": 1}, True, 2 ** 63, 0):
+        with pytest.raises(ValueError):
+            mark_read(reader, room.id, message_id=message_id)
+    with pytest.raises(ValueError):
+        mark_read(reader, room.id, uid=["x"])
+
+@pytest.mark.django_db
+def test_migration_seeds_cursors_at_the_latest_message(chat_room):
+    room, reader, writer, messages = chat_room
+    RoomReadCursor.objects.filter(room=room).delete()
+    mark_read(writer, room.id, message_id=messages[1].id)
+
+    migration = importlib.import_module("chat.migrations.0011_roomreadcursor")
+    with connection.cursor() as cursor:
+        cursor.execute(migration.Migration.operations[-1].sql)
+
+    assert RoomReadCursor.objects.get(user=reader, room=room).last_read_id == messages[-1].id
+    assert unread_count(reader, room.id) == 0
+    # Cursors that already exist are left alone
+    assert RoomReadCursor.objects.get(user=writer, room=room).last_read_id == messages[1].id
+
+@pytest.mark.django_db
+def test_room_list_and_read_endpoint(chat_room):
+    room, reader, _, messages = chat_room
+    client = APIClient()
+    client.force_authenticate(user=reader)
+
+    rows = client.get("/api/chat/rooms/").data
+    rows = rows["results"] if isinstance(rows, dict) else rows
+    assert {row["name"]: row["unread_count"] for row in rows}[room.name] == 5
+
+    response = client.post(f"/api/chat/rooms/{room.id}/read/", {"message_id": messages[3].id}, format="json")
+    assert response.status_code == 200
+    assert response.data == {"last_read_id": messages[3].id, "unread_count": 1}
+
+    response = client.post(f"/api/chat/rooms/{room.id}/read/", {"uid": "unknown"}, format="json")
+    assert response.status_code == 404
+
+    for bad in ({"message_id": [1]}, {"message_id": {"id": 1}}, {"uid": 5}):
+        response = client.post(f"/api/chat/rooms/{room.id}/read/", bad, format="json")
+        assert response.status_code == 400
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_chat_socket_pushes_unread_counts_and_read_receipts():
+    await sync_to_async(cache.clear)()
+    reader = await sync_to_async(User.objects.create_user)(username="socket_reader", password="1234")
+    writer = await sync_to_async(User.objects.create_user)(username="socket_writer", password="1234")
+    room = await sync_to_async(Room.objects.create)(name="receipts", created_by=writer)
+    for i in range(3):
+        await sync_to_async(ChatMessage.objects.create)(room=room, sender=writer, message=f"m{i}")
+
+    async def connect(user, path):
+        communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), path)
+        communicator.scope["user"] = user
+        communicator.scope["url_route"] = {"kwargs": {"room_name": "receipts"}}
+        connected, _ = await communicator.connect()
+        assert connected
+        return communicator
+
+    legacy = await connect(writer, "/ws/chat/receipts/")
+    reading = await connect(reader, "/ws/chat/receipts/?receipts=1")
+    assert json.loads(await reading.receive_from()) == {"type": "unread", "unread_count": 3}
+
+    # A malformed receipt is ignored and the socket stays usable
+    await reading.send_to(text_data=json.dumps({"type": "read", "message_id": [1]}))
+    assert await reading.receive_nothing()
+
+    await reading.send_to(text_data=json.dumps({"type": "read"}))
+    frames = [json.loads(await reading.receive_from()) for _ in range(2)]
+    frames = {frame["type"]: frame for frame in frames}
+    assert frames["read_receipt"]["user"] == "socket_reader"
+    assert frames["unread"] == {"type": "unread", "unread_count": 0}
+
+    # New messages from others push the reader's count along with them
+    await legacy.send_to(text_data=json.dumps({"message": "new"}))
+    assert json.loads(await reading.receive_from())["message"] == "new"
+    assert json.loads(await reading.receive_from()) == {"type": "unread", "unread_count": 1}
+    assert json.loads(await legacy.receive_from())["message"] == "new"
+
+    # Sockets that didn't opt in only ever see chat messages
+    assert await legacy.receive_nothing()
+
+    await reading.disconnect()
+    await legacy.disconnect()
@@ -1,8 +1,12 @@
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from datetime import timedelta
+from django.utils import timezone
 from accounts.models import User
-from chat.models import Room
+from chat.models import ChatMessage, Room, new_ulid
 
 class ChatViewsTest(APITestCase):
     def setUp(self):
@@ -23,3 +27,135 @@ class ChatViewsTest(APITestCase):
         url = reverse("room-join", kwargs={"pk": self.room.id})
         response = self.client.post(url, {"passkey": self.room.passkey})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+class ChatMessageHistoryTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader", password="1234")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.room = Room.objects.create(name="history-room", created_by=self.user)
+        start = timezone.now() - timedelta(minutes=10)
+        # Two messages per timestamp, to exercise the id tie-break
+        ChatMessage.objects.bulk_create([
+            ChatMessage(room=self.room, sender=self.user, message=f"m{i}", timestamp=start + timedelta(seconds=i // 2))
+            for i in range(7)
+        ])
+        self.url = reverse("chat-message-history", kwargs={"room_name": self.room.name})
+
+    def messages(self, response):
+        return [m["message"] for m in response.data["results"]]
+
+    def test_pages_backwards_with_before(self):
+        response = self.client.get(self.url, {"limit": 3})
+        self.assertEqual(self.messages(response), ["m4", "m5", "m6"])
+        self.assertTrue(response.data["has_more"])
+
+        response = self.client.get(self.url, {"limit": 3, "before": response.data["older"]})
+        self.assertEqual(self.messages(response), ["m1", "m2", "m3"])
+
+        response = self.client.get(self.url, {"limit": 3, "before": response.data["older"]})
+        self.assertEqual(self.messages(response), ["m0"])
+        self.assertFalse(response.data["has_more"])
+        self.assertIsNone(response.data["older"])
+
+    def test_after_cursor_returns_new_messages(self):
+        newer = self.client.get(self.url, {"limit": 3}).data["newer"]
+        ChatMessage.objects.create(room=self.room, sender=self.user, message="late")
+
+        response = self.client.get(self.url, {"after": newer})
+        self.assertEqual(self.messages(response), ["late"])
+
+    def test_sync_since_id_and_since_uid(self):
+        seen = ChatMessage.objects.get(message="m3")
+        sync_url = reverse("chat-message-sync", kwargs={"room_name": self.room.name})
+
+        response = self.client.get(sync_url, {"since_id": seen.id})
+        self.assertEqual(self.messages(response), ["m4", "m5", "m6"])
+
+        response = self.client.get(sync_url, {"since_uid": seen.uid})
+        self.assertEqual(self.messages(response), ["m4", "m5", "m6"])
+
+        # A uid that was broadcast but not written yet resumes from its ULID time
+        response = self.client.get(sync_url, {"since_uid": new_ulid()})
+        self.assertEqual(self.messages(response), [])
+
+        self.assertEqual(self.client.get(sync_url).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sync_overlaps_late_writes_under_write_behind(self):
+        seen = ChatMessage.objects.get(message="m6")
+        # Stamped before m6 but written after it, as a write-behind batch can be
+        ChatMessage.objects.create(
+            room=self.room, sender=self.user, message="late", timestamp=seen.timestamp - timedelta(seconds=1)
+        )
+        sync_url = reverse("chat-message-sync", kwargs={"room_name": self.room.name})
+
+        with self.settings(CHAT_WRITE_BEHIND=False):
+            response = self.client.get(sync_url, {"since_uid": seen.uid})
+            self.assertEqual(self.messages(response), [])
+
+        with self.settings(CHAT_WRITE_BEHIND=True, CHAT_SYNC_OVERLAP=2):
+            for params in ({"since_uid": seen.uid}, {"since_id": seen.id}):
+                response = self.client.get(sync_url, params)
+                self.assertEqual(self.messages(response), ["m2", "m3", "m4", "m5", "late", "m6"])
+
+            # Paging on with after= is not rewound
+            response = self.client.get(sync_url, {"after": response.data["newer"]})
+            self.assertEqual(self.messages(response), [])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {"before": "garbage"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_since_uid(self):
+        sync_url = reverse("chat-message-sync", kwargs={"room_name": self.room.name})
+        # Too far in the future for datetime, out of ULID range, wrong length, not base32
+        for uid in ("7" + "Z" * 25, "Z" * 26, "8" + "0" * 25, "0" * 25, "U" * 26, "7" + "!" * 25):
+            response = self.client.get(sync_url, {"since_uid": uid})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, uid)
+
+class RoomListTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="lister", password="1234")
+        self.other = User.objects.create_user(username="other-lister", password="1234")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.room_count = 0
+
+    def make_rooms(self, count):
+        for i in range(count):
+            room = Room.objects.create(name=f"list-{self.room_count}", created_by=self.other)
+            self.room_count += 1
+            room.participants.add(self.user, self.other)
+            ChatMessage.objects.create(room=room, sender=self.other, message="x" * 150)
+            ChatMessage.objects.create(room=room, sender=self.user, message=f"latest {i}")
+
+    def test_room_list_uses_annotations(self):
+        self.make_rooms(1)
+        Room.objects.create(name="not-joined", created_by=self.other).participants.add(self.other)
+
+        response = self.client.get(reverse("room-list"))
+        rows = response.data["results"] if isinstance(response.data, dict) else response.data
+        self.assertEqual([row["name"] for row in rows], ["list-0"])
+        row = rows[0]
+        self.assertTrue(row["is_joined"])
+        self.assertEqual(row["participant_count"], 2)
+        self.assertNotIn("participants", row)
+        self.assertIsNone(row["passkey"])
+        self.assertEqual(row["last_message"]["message"], "latest 0")
+        self.assertEqual(row["last_message"]["sender"], "lister")
+
+    def test_room_list_query_count_does_not_grow_with_rooms(self):
+        self.make_rooms(2)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(reverse("room-list"))
+        self.make_rooms(10)
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(reverse("room-list"))
+        self.assertEqual(len(few), len(many))
+
+    def test_room_detail_still_lists_participants(self):
+        self.make_rooms(1)
+        room = Room.objects.get(name="list-0")
+        response = self.client.get(reverse("room-detail", kwargs={"pk": room.id}))
+        self.assertEqual(sorted(response.data["participants"]), ["lister (viewer)", "other-lister (viewer)"])
+        self.assertTrue(response.data["is_joined"])
@@ -0,0 +1,129 @@
+# chat/unread.py
+"""
+Unread counts and read receipts.
+
+Each user has a RoomReadCursor per room: the (timestamp, id) position of
+the last message they have read. A room's unread count is the number of
+other people's messages after that position, counted on the
+(room, timestamp, id) index; nothing has to be maintained per message,
+so write-behind batches (which bypass model signals) are covered too.
+Users without a cursor have read nothing; migration 0011 gave everyone
+who was already in a room a cursor at its latest message.
+
+Cursors only ever move forward, so receipts arriving out of order (two
+tabs, a slow REST call) can't mark read messages unread again.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import connection
+from django.db.models import Count, DateTimeField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import ChatMessage, Room, RoomReadCursor
+from .pagination import newer_than
+
+NEVER_READ = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def annotate_unread(queryset, user):
+    """Annotate rooms in ``queryset`` with ``unread_count`` for ``user``."""
+    cursor = RoomReadCursor.objects.filter(room=OuterRef("pk"), user=user)
+    queryset = queryset.annotate(
+        read_at=Coalesce(
+            Subquery(cursor.values("last_read_at")), Value(NEVER_READ), output_field=DateTimeField()
+        ),
+        read_id=Coalesce(Subquery(cursor.values("last_read_id")), Value(0)),
+    )
+    unread = (
+        ChatMessage.objects.filter(room=OuterRef("pk"))
+        .filter(newer_than(OuterRef("read_at"), OuterRef("read_id")))
+        .exclude(sender=user)
+        .order_by()
+        .values("room")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    return queryset.annotate(unread_count=Coalesce(Subquery(unread), 0))
+
+
+def unread_count(user, room_id):
+    return annotate_unread(Room.objects.filter(pk=room_id), user).values_list("unread_count", flat=True).first() or 0
+
+
+MAX_MESSAGE_ID = 2 ** 63 - 1  # bigint
+
+
+def read_target(message_id=None, uid=None):
+    """
+    Validate the message a read request points at (from JSON or form data).
+    Returns ``(message_id, uid)``; raises ValueError for anything else.
+    """
+    if message_id is not None:
+        if isinstance(message_id, bool) or not isinstance(message_id, (int, str)):
+            raise ValueError("message_id must be an integer.")
+        try:
+            message_id = int(message_id)
+        except ValueError:
+            raise ValueError("message_id must be an integer.")
+        if not 0 < message_id <= MAX_MESSAGE_ID:
+            raise ValueError("message_id is out of range.")
+    if uid is not None and not isinstance(uid, str):
+        raise ValueError("uid must be a string.")
+    return message_id, uid
+
+
+def mark_read(user, room_id, message_id=None, uid=None):
+    """
+    Move ``user``'s cursor in the room up to the message given by id or uid
+    (default: the latest one). Returns that message, or None if there is none.
+    Raises ValueError for a malformed id or uid (see read_target).
+    """
+    message_id, uid = read_target(message_id, uid)
+    messages = ChatMessage.objects.filter(room_id=room_id).only("id", "uid", "timestamp")
+    if message_id is not None:
+        message = messages.filter(id=message_id).first()
+    elif uid is not None:
+        message = messages.filter(uid=uid).first()
+    else:
+        message = messages.order_by("-timestamp", "-id").first()
+    if message is None:
+        return None
+
+    # One atomic upsert; the WHERE keeps a cursor that is already further along
+    table = RoomReadCursor._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (user_id, room_id, last_read_at, last_read_id, updated_at)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (user_id, room_id) DO UPDATE SET
+                last_read_at = EXCLUDED.last_read_at,
+                last_read_id = EXCLUDED.last_read_id,
+                updated_at = EXCLUDED.updated_at
+            WHERE ({table}.last_read_at, {table}.last_read_id)
+                < (EXCLUDED.last_read_at, EXCLUDED.last_read_id)
+            """,
+            [user.id, room_id, message.timestamp, message.id, timezone.now()],
+        )
+    return message
+
+
+def read_receipt_event(user, message):
+    """Channel layer event telling a room that ``user`` has read up to ``message``."""
+    return {
+        "type": "read_receipt",
+        "user": user.username,
+        "user_id": user.id,
+        "message_id": message.id,
+        "uid": message.uid,
+        "timestamp": message.timestamp.isoformat(),
+    }
+
+
+def broadcast_read_receipt(room_name, user, message):
+    channel_layer = get_channel_layer()
+    if channel_layer is not None:
+        async_to_sync(channel_layer.group_send)(f"chat_{room_name}", read_receipt_event(user, message))
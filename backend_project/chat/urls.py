@@ -2,7 +2,7 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ChatMessageListView, get_messages, RoomViewSet
+from .views import ChatMessageListView, ChatMessageHistoryView, ChatMessageSyncView, get_messages, RoomViewSet
 
 # Router for RoomViewSet (handles CRUD operations on rooms)
 router = DefaultRouter()
@@ -13,6 +13,10 @@ urlpatterns = [
     path("messages/<str:room_name>/", ChatMessageListView.as_view(), name="chat-messages"),
     path("messages-alt/<str:room_name>/", get_messages, name="chat-messages-alt"),
 
+    # Keyset-paginated history and reconnect sync (chat.pagination)
+    path("messages/<str:room_name>/history/", ChatMessageHistoryView.as_view(), name="chat-message-history"),
+    path("messages/<str:room_name>/sync/", ChatMessageSyncView.as_view(), name="chat-message-sync"),
+
     # Include all ViewSet routes (rooms/)
     path("", include(router.urls)),
 ]
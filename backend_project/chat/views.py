@@ -3,8 +3,12 @@ from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from .models import ChatMessage, Room
-from .serializers import ChatMessageSerializer, RoomSerializer
+from .serializers import ChatMessageSerializer, RoomListSerializer, RoomSerializer
+from .pagination import MessageCursorPagination, MessageSyncPagination
+from .unread import annotate_unread, broadcast_read_receipt, mark_read, unread_count
 from rest_framework import generics, viewsets, permissions, status
+from django.db.models import Count, Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Substr
 from django.shortcuts import get_object_or_404
 from accounts.serializers import UserSerializer
 from accounts.models import User
@@ -15,16 +19,56 @@ class ChatMessageListView(generics.ListAPIView):
 
     def get_queryset(self):
         room_name = self.kwargs["room_name"]
-        return ChatMessage.objects.filter(room__name=room_name).order_by("timestamp")
+        return (
+            ChatMessage.objects.filter(room__name=room_name)
+            .select_related("sender")
+            .order_by("timestamp")
+        )
+
+class ChatMessageHistoryView(generics.ListAPIView):
+    """
+    Keyset-paginated history: the latest page by default, then
+    ?before=<older> for older pages or ?after=<newer> / ?since_id= /
+    ?since_uid= for newer ones (see chat.pagination).
+    """
+    serializer_class = ChatMessageSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = MessageCursorPagination
+
+    def get_queryset(self):
+        room = get_object_or_404(Room.objects.only("id"), name=self.kwargs["room_name"])
+        return ChatMessage.objects.filter(room_id=room.id).select_related("sender")
+
+
+class ChatMessageSyncView(ChatMessageHistoryView):
+    """
+    Everything newer than the last message a client saw, for filling the gap
+    after a WebSocket reconnect. Requires ?after=, ?since_id= or ?since_uid=;
+    repeat with ?after=<newer> while has_more is true.
+
+    Under CHAT_WRITE_BEHIND, since_id/since_uid start CHAT_SYNC_OVERLAP seconds
+    early so messages written late aren't skipped; the overlap repeats messages
+    the client already has, which it drops by uid (see chat.pagination).
+    """
+    pagination_class = MessageSyncPagination
+
+    def list(self, request, *args, **kwargs):
+        if not any(request.query_params.get(p) for p in ("after", "since_id", "since_uid")):
+            return Response(
+                {"detail": "Provide after, since_id or since_uid."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return super().list(request, *args, **kwargs)
+
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_messages(request, room_name):
-    """Fallback API if you want manual responses (optional)."""
+    """Fallback API: the latest messages of a room, newest first (history/ pages further back)."""
     messages = (
-        ChatMessage.objects.filter(room=room_name)
+        ChatMessage.objects.filter(room__name=room_name)
         .select_related("sender")
-        .order_by("-timestamp")
+        .order_by("-timestamp", "-id")[:MessageCursorPagination.max_page_size]
     )
     serializer = ChatMessageSerializer(messages, many=True)
     return Response(serializer.data)
@@ -35,7 +79,11 @@ class IsCreatorOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
         return obj.created_by == request.user
-    
+
+
+LAST_MESSAGE_PREVIEW_LENGTH = 100
+
+
 class RoomViewSet(viewsets.ModelViewSet):
     queryset = Room.objects.all()
     serializer_class = RoomSerializer
@@ -43,12 +91,39 @@ class RoomViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
-        # Include only public or joined rooms
-        return (
-            Room.objects.filter(participants=user)
+        membership = Room.participants.through.objects.filter(room=OuterRef("pk"))
+        # Newest first along the (room, timestamp, id) index: one probe per room
+        last_message = ChatMessage.objects.filter(room=OuterRef("pk")).order_by("-timestamp", "-id")[:1]
+
+        # Include only joined rooms; everything the list shows comes from
+        # subqueries, so it is one query however many rooms there are
+        queryset = (
+            Room.objects.annotate(
+                is_joined=Exists(membership.filter(user=user)),
+                participant_count=Coalesce(Subquery(
+                    membership.order_by().values("room").annotate(count=Count("*")).values("count")
+                ), 0),
+                last_message=Subquery(last_message.values(
+                    preview=Substr("message", 1, LAST_MESSAGE_PREVIEW_LENGTH)
+                )),
+                last_message_sender=Subquery(last_message.values("sender__username")),
+                last_message_at=Subquery(last_message.values("timestamp")),
+            )
+            .filter(is_joined=True)
             .exclude(name__startswith="room_")  # hide private rooms
-            .distinct()
+            .select_related("created_by")
+            .order_by("id")  # stable pages
         )
+        if self.action == "list":
+            return annotate_unread(queryset, user)
+        if self.action == "read":
+            return queryset
+        return queryset.prefetch_related("participants")
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return RoomListSerializer
+        return RoomSerializer
     
     @action(detail=True, methods=["post"])
     def join(self, request, pk=None):
@@ -113,3 +188,27 @@ class RoomViewSet(viewsets.ModelViewSet):
             {"message": f"{user_to_remove.username} removed from room."},
             status=200
         )
+
+    # Any participant may mark a room read; get_queryset only has joined rooms
+    @action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated])
+    def read(self, request, pk=None):
+        """
+        Mark the room read up to ``message_id`` or ``uid`` (default: the
+        latest message) and tell the room's sockets.
+        """
+        room = self.get_object()
+        try:
+            message = mark_read(
+                request.user, room.id,
+                message_id=request.data.get("message_id"), uid=request.data.get("uid"),
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if message is None:
+            return Response({"error": "Message not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        broadcast_read_receipt(room.name, request.user, message)
+        return Response({
+            "last_read_id": message.id,
+            "unread_count": unread_count(request.user, room.id),
+        })
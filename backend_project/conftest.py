@@ -1,6 +1,12 @@
 import os
 import django
+import pytest
 
 def pytest_configure():
     os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend_project.settings")
     django.setup()
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    """Files saved by tests go to a temp dir, not the real media/."""
+    settings.MEDIA_ROOT = tmp_path
@@ -0,0 +1,122 @@
+# files/attendance.py
+"""
+Keeps the DTRAttendance fact table in step with DTREntry.daily_data.
+
+Every write path that touches daily_data or employee_no (parse, manual,
+update_rows, patch-cells, the entry API) calls ``sync_attendance`` with the
+affected entry ids; it replaces their fact rows with one DELETE and one
+``bulk_create`` per batch.
+"""
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+
+from .models import DTREntry, DTRAttendance
+
+ATTENDANCE_BATCH_SIZE = 1000
+
+# Hours beyond this in a single day count as overtime in summaries
+REGULAR_HOURS_PER_DAY = Decimal("8")
+
+ABSENCE_CODES = ("A", "ABS", "ABSENT", "AWOL")
+
+_MAX_VALUE = Decimal("10000")  # DecimalField(max_digits=6, decimal_places=2)
+
+
+def parse_attendance_day(key):
+    """daily_data key ("2025-09-01", "2025-09-01 00:00:00") -> date or None."""
+    if isinstance(key, date):
+        return key
+    try:
+        return datetime.strptime(str(key).strip()[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def parse_attendance_cell(raw):
+    """
+    Split a daily_data cell into ``(value, code)``.
+    Returns None for empty cells, which get no fact row.
+    """
+    if raw is None or isinstance(raw, bool):
+        return None
+
+    text = str(raw).strip()
+    if not text:
+        return None
+
+    try:
+        value = Decimal(text)
+    except InvalidOperation:
+        return None, text.upper()[:20]
+
+    if not value.is_finite() or abs(value) >= _MAX_VALUE:
+        return None, text[:20]
+    return value.quantize(Decimal("0.01")), ""
+
+
+def attendance_rows(entry_id, employee_no_int, daily_data, model=DTRAttendance):
+    """Unsaved fact rows for one entry; ``model`` lets migrations pass their historical model."""
+    rows = []
+    if not isinstance(daily_data, dict):
+        return rows
+
+    for key, raw in daily_data.items():
+        day = parse_attendance_day(key)
+        cell = parse_attendance_cell(raw)
+        if day is None or cell is None:
+            continue
+        value, code = cell
+        rows.append(model(
+            entry_id=entry_id,
+            employee_no_int=employee_no_int,
+            date=day,
+            value=value,
+            code=code,
+        ))
+    return rows
+
+
+def sync_attendance(entry_ids):
+    """Rebuild the fact rows of the given entries. Returns the number written."""
+    entry_ids = list(entry_ids)
+    written = 0
+
+    with transaction.atomic():
+        for start in range(0, len(entry_ids), ATTENDANCE_BATCH_SIZE):
+            batch = entry_ids[start:start + ATTENDANCE_BATCH_SIZE]
+            DTRAttendance.objects.filter(entry_id__in=batch).delete()
+
+            facts = []
+            entries = DTREntry.objects.filter(id__in=batch).values_list("id", "employee_no_int", "daily_data")
+            for entry_id, employee_no_int, daily_data in entries:
+                # Duplicate keys for one day ("2025-09-01" and "2025-09-01 00:00:00") keep the last
+                by_day = {row.date: row for row in attendance_rows(entry_id, employee_no_int, daily_data)}
+                facts.extend(by_day.values())
+
+            DTRAttendance.objects.bulk_create(facts, batch_size=ATTENDANCE_BATCH_SIZE)
+            written += len(facts)
+
+    return written
+
+
+def attendance_summary(queryset):
+    """
+    Per-employee attendance totals over a DTRAttendance queryset,
+    computed with a single GROUP BY.
+    """
+    overtime = F("value") - REGULAR_HOURS_PER_DAY
+    return (
+        queryset.values("employee_no_int")
+        .annotate(
+            days_worked=Count("id", filter=Q(value__gt=0)),
+            absences=Count("id", filter=Q(code__in=ABSENCE_CODES)),
+            total_hours=Sum("value"),
+            overtime_hours=Sum(overtime, filter=Q(value__gt=REGULAR_HOURS_PER_DAY)),
+            first_day=Min("date"),
+            last_day=Max("date"),
+        )
+        .order_by("employee_no_int")
+    )
@@ -0,0 +1,447 @@
+# files/bulk.py
+"""
+Set-based import helpers.
+
+The upload views used to walk DataFrames row by row and issue one
+``update_or_create`` per employee. These helpers normalise the whole frame
+with vectorised pandas operations and write it back with a handful of
+``bulk_create``/``bulk_update`` statements instead.
+"""
+import json
+
+import pandas as pd
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+
+from .models import EmployeeDirectory, Employee, DTREntry, normalize_employee_no
+from .attendance import sync_attendance
+from .summaries import refresh_period_summaries
+
+BULK_BATCH_SIZE = 1000
+
+# Payroll Excel header -> EmployeeDirectory numeric field
+EMPLOYEE_EXCEL_NUMERIC_COLUMNS = {
+    "Total Hours": "total_hours",
+    "ND Reg Hrs": "nd_reg_hrs",
+    "Absences": "absences",
+    "Tardiness": "tardiness",
+    "Undertime": "undertime",
+    "OTRegular": "ot_regular",
+    "ND OT Reg": "nd_ot_reg",
+    "OT Restday": "ot_restday",
+    "ND Restday": "nd_restday",
+    "OT RestExcess": "ot_rest_excess",
+    "ND Restday Excess": "nd_rest_excess",
+    "OTSpecialHday": "ot_special_hday",
+    "ND SpecialHday": "nd_special_hday",
+    "OT SHdayExcess": "ot_shday_excess",
+    "ND SHday Excess": "nd_shday_excess",
+    "OT LegalHoliday": "ot_legal_holiday",
+    "Special Holiday": "special_holiday",
+    "OTLegHol Excess": "ot_leghol_excess",
+    "ND LegHol Excess": "nd_leghol_excess",
+    "OT SHday on Rest": "ot_sh_on_rest",
+    "ND SH on Rest": "nd_sh_on_rest",
+    "OT SH on Rest Excess": "ot_sh_on_rest_excess",
+    "ND SH on Rest Excess": "nd_sh_on_rest_excess",
+    "LegH on Rest Day": "leg_h_on_rest_day",
+    "ND LegH on Restday": "nd_leg_h_on_restday",
+    "OT LegH on Rest Excess": "ot_leg_h_on_rest_excess",
+    "ND LegH on Rest Excess": "nd_leg_h_on_rest_excess",
+    "VacLeave_Applied": "vacleave_applied",
+    "SickLeave_Applied": "sickleave_applied",
+    "Back Pay VL": "back_pay_vl",
+    "Back Pay SL": "back_pay_sl",
+    "OTRegular Excess": "ot_regular_excess",
+    "ND OT Reg Excess": "nd_ot_reg_excess",
+    "Legal Holiday": "legal_holiday",
+    "ND Legal Holiday": "nd_legal_holiday",
+    "Overnight Rate": "overnight_rate",
+}
+
+EMPLOYEE_EXCEL_TEXT_COLUMNS = {
+    "EmployeeName": "employee_name",
+    "PROJECT": "project",
+}
+
+EMPLOYEE_EXCEL_FIELDS = (
+    list(EMPLOYEE_EXCEL_TEXT_COLUMNS.values())
+    + list(EMPLOYEE_EXCEL_NUMERIC_COLUMNS.values())
+)
+
+# Columns DTRFileViewSet.sync_all_files writes from verified DTR totals
+DIRECTORY_SYNC_FIELDS = [
+    "employee_name", "project", "total_hours", "undertime", "ot_regular",
+    "legal_holiday", "special_holiday", "nd_reg_hrs", "date_covered",
+]
+
+
+def _nullable(series):
+    """Turn NaN into None so the column can be handed straight to the ORM."""
+    return series.astype(object).where(series.notna(), None)
+
+
+def employee_frame_from_excel(df):
+    """
+    Map a raw payroll sheet (read with ``dtype=str``) onto EmployeeDirectory
+    field names in one pass per column. Missing headers become empty columns.
+    """
+    df = df.rename(columns=lambda col: str(col).strip())
+    frame = pd.DataFrame(index=df.index)
+
+    codes = df["Employee Code"] if "Employee Code" in df.columns else pd.Series(None, index=df.index, dtype=object)
+    frame["employee_code"] = codes.str.strip().str.zfill(5).fillna("")
+
+    for header, field in EMPLOYEE_EXCEL_TEXT_COLUMNS.items():
+        if header in df.columns:
+            frame[field] = df[header].fillna("").astype(str).str.strip()
+        else:
+            frame[field] = ""
+
+    for header, field in EMPLOYEE_EXCEL_NUMERIC_COLUMNS.items():
+        if header in df.columns:
+            frame[field] = _nullable(pd.to_numeric(df[header], errors="coerce"))
+        else:
+            frame[field] = None
+
+    return frame
+
+
+def _count_sequential(keys, existing):
+    """
+    Count adds/updates the way a row-by-row upsert would: the first time an
+    unseen key appears it is an add, every later occurrence is an update.
+    """
+    seen = set(existing)
+    added = updated = 0
+    for key in keys:
+        if key in seen:
+            updated += 1
+        else:
+            added += 1
+            seen.add(key)
+    return added, updated
+
+
+def bulk_upsert_employee_directory(frame):
+    """
+    Upsert a frame produced by ``employee_frame_from_excel``.
+    Returns ``(added, updated)``.
+    """
+    return upsert_employee_directory_records(frame.to_dict("records"), EMPLOYEE_EXCEL_FIELDS)
+
+
+def upsert_employee_directory_records(records, update_fields):
+    """
+    Upsert EmployeeDirectory from dicts holding ``employee_code`` plus
+    ``update_fields``; other columns of existing rows are left alone.
+
+    Rows with an employee code go through a single
+    ``INSERT ... ON CONFLICT (employee_code) DO UPDATE``; rows without one are
+    matched on name against existing blank-code rows, as before.
+
+    Returns ``(added, updated)``.
+    """
+    coded = [r for r in records if r["employee_code"]]
+    blank = [r for r in records if not r["employee_code"]]
+
+    codes = [r["employee_code"] for r in coded]
+    existing_codes = EmployeeDirectory.objects.only("employee_code").in_bulk(
+        set(codes), field_name="employee_code"
+    )
+    added, updated = _count_sequential(codes, existing_codes)
+
+    names = [r["employee_name"] for r in blank]
+    existing_blank = {
+        obj.employee_name: obj
+        for obj in EmployeeDirectory.objects.filter(employee_code="", employee_name__in=set(names))
+    }
+    blank_added, blank_updated = _count_sequential(names, existing_blank)
+
+    # ON CONFLICT cannot touch the same row twice in one statement,
+    # so keep the last occurrence of every key (last write wins).
+    latest_coded = {r["employee_code"]: r for r in coded}
+    latest_blank = {r["employee_name"]: r for r in blank}
+
+    to_update, to_create = [], []
+    for name, record in latest_blank.items():
+        obj = existing_blank.get(name)
+        if obj is None:
+            to_create.append(EmployeeDirectory(**record))
+            continue
+        for field in update_fields:
+            setattr(obj, field, record[field])
+        to_update.append(obj)
+
+    with transaction.atomic():
+        EmployeeDirectory.objects.bulk_create(
+            [EmployeeDirectory(**record) for record in latest_coded.values()],
+            update_conflicts=True,
+            unique_fields=["employee_code"],
+            update_fields=update_fields,
+            batch_size=BULK_BATCH_SIZE,
+        )
+        if to_update:
+            EmployeeDirectory.objects.bulk_update(to_update, update_fields, batch_size=BULK_BATCH_SIZE)
+        if to_create:
+            EmployeeDirectory.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+
+    return added + blank_added, updated + blank_updated
+
+
+def bulk_upsert_employees(rows):
+    """
+    Upsert ``{"employee_no", "employee_name"}`` rows into Employee with one
+    ``INSERT ... ON CONFLICT (employee_no) DO UPDATE`` per BULK_BATCH_SIZE rows.
+
+    Returns ``(created, updated)``.
+    """
+    numbers = [r["employee_no"] for r in rows]
+    existing = set(
+        Employee.objects.filter(employee_no__in=set(numbers)).values_list("employee_no", flat=True)
+    )
+    created, updated = _count_sequential(numbers, existing)
+
+    latest = {r["employee_no"]: r["employee_name"] for r in rows}
+    Employee.objects.bulk_create(
+        [Employee(employee_no=no, employee_name=name) for no, name in latest.items()],
+        update_conflicts=True,
+        unique_fields=["employee_no"],
+        update_fields=["employee_name", "updated_at"],
+        batch_size=BULK_BATCH_SIZE,
+    )
+
+    return created, updated
+
+
+# Grid columns a supervisor may edit through DTRFileViewSet.update_rows
+DTR_EDITABLE_FIELDS = [
+    "full_name", "employee_no", "daily_data",
+    "total_days", "total_hours", "regular_ot", "legal_holiday",
+    "unworked_reg_holiday", "special_holiday", "night_diff", "undertime_minutes",
+]
+
+
+def _clean_dtr_row(row):
+    """
+    Coerce the editable fields present in ``row`` with the model fields'
+    own ``to_python``. Returns ``(values, errors)``.
+    """
+    values, errors = {}, {}
+    for name in DTR_EDITABLE_FIELDS:
+        if name not in row:
+            continue
+        field = DTREntry._meta.get_field(name)
+        try:
+            value = field.to_python(row[name])
+        except ValidationError as e:
+            errors[name] = e.messages
+            continue
+        if value is None and not field.null:
+            errors[name] = ["This field may not be null."]
+            continue
+        values[name] = value
+    return values, errors
+
+
+def bulk_update_dtr_entries(dtr_file, rows):
+    """
+    Apply grid edits to ``dtr_file``'s entries in one transaction.
+
+    Existing rows are fetched with a single locked ``in_bulk`` and only the
+    fields whose value actually changed are written, grouped so every distinct
+    set of changed columns becomes one ``bulk_update``. Rows without an ``id``
+    are inserted with ``bulk_create``.
+
+    Returns ``{"created", "updated", "unchanged", "conflicts"}`` where each
+    conflict is ``{"index", "id", "error"[, "fields"]}``.
+    """
+    conflicts = []
+    cleaned = []
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            conflicts.append({"index": index, "id": None, "error": "invalid row"})
+            continue
+        entry_id = row.get("id")
+        if entry_id:
+            try:
+                entry_id = int(entry_id)
+            except (TypeError, ValueError):
+                conflicts.append({"index": index, "id": entry_id, "error": "invalid id"})
+                continue
+        version = row.get("version")
+        if version is not None:
+            try:
+                version = int(version)
+            except (TypeError, ValueError):
+                conflicts.append({"index": index, "id": entry_id, "error": "invalid version"})
+                continue
+        values, errors = _clean_dtr_row(row)
+        if errors:
+            conflicts.append({"index": index, "id": entry_id, "error": "invalid value", "fields": errors})
+            continue
+        cleaned.append((index, entry_id, version, values))
+
+    ids = {entry_id for _, entry_id, _, _ in cleaned if entry_id}
+    changed = {}
+    to_create = []
+
+    with transaction.atomic():
+        existing = (
+            dtr_file.entries.select_for_update()
+            .only("id", "dtr_file_id", "employee_no_int", "version", *DTR_EDITABLE_FIELDS)
+            .in_bulk(ids)
+        ) if ids else {}
+
+        for index, entry_id, version, values in cleaned:
+            if not entry_id:
+                entry = DTREntry(dtr_file=dtr_file, **values)
+                entry.employee_no_int = normalize_employee_no(entry.employee_no)
+                to_create.append(entry)
+                continue
+
+            entry = existing.get(entry_id)
+            if entry is None:
+                conflicts.append({"index": index, "id": entry_id, "error": "not found"})
+                continue
+
+            if version is not None and version != entry.version:
+                conflicts.append({
+                    "index": index, "id": entry_id, "error": "version mismatch", "version": entry.version,
+                })
+                continue
+
+            fields = changed.setdefault(entry.pk, set())
+            for name, value in values.items():
+                if getattr(entry, name) != value:
+                    setattr(entry, name, value)
+                    fields.add(name)
+            if "employee_no" in fields:
+                entry.employee_no_int = normalize_employee_no(entry.employee_no)
+                fields.add("employee_no_int")
+            if fields:
+                entry.version += 1
+                fields.add("version")
+
+        groups = {}
+        for pk, fields in changed.items():
+            if fields:
+                groups.setdefault(frozenset(fields), []).append(existing[pk])
+        for fields, entries in groups.items():
+            DTREntry.objects.bulk_update(entries, sorted(fields), batch_size=BULK_BATCH_SIZE)
+
+        if to_create:
+            DTREntry.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+
+        stale_attendance = [
+            pk for pk, fields in changed.items() if fields & {"daily_data", "employee_no"}
+        ] + [entry.pk for entry in to_create]
+        if stale_attendance:
+            sync_attendance(stale_attendance)
+
+        if dtr_file.status == "verified" and (to_create or any(changed.values())):
+            refresh_period_summaries([dtr_file.id])
+
+    versions = {pk: existing[pk].version for pk in changed}
+    updated = sum(1 for fields in changed.values() if fields)
+    return {
+        "created": len(to_create),
+        "updated": updated,
+        "unchanged": len(changed) - updated,
+        "versions": versions,
+        "conflicts": conflicts,
+    }
+
+
+def patch_dtr_cells(dtr_file, patches):
+    """
+    Merge per-day cell changes into ``daily_data`` server-side.
+
+    ``patches`` is a list of ``{"id", "cells": {day: value}, "version"?}``.
+    All patches are applied by a single ``UPDATE ... SET daily_data =
+    daily_data || cells`` joined against the patch list; a patch with a
+    ``version`` only applies if it still matches, so concurrent editors get
+    a conflict instead of overwriting each other. Patches for the same id
+    are merged in order (the first given version is checked).
+
+    Returns ``{"updated": [{"id", "version"}], "conflicts": [...]}`` where a
+    conflict carries the row's current ``version`` and ``daily_data``.
+    """
+    conflicts = []
+    merged = {}  # entry id -> [indexes, version, cells]
+
+    for index, patch in enumerate(patches):
+        if not isinstance(patch, dict):
+            conflicts.append({"index": index, "id": None, "error": "invalid patch"})
+            continue
+        entry_id, version, cells = patch.get("id"), patch.get("version"), patch.get("cells")
+        try:
+            entry_id = int(entry_id)
+            version = int(version) if version is not None else None
+        except (TypeError, ValueError):
+            conflicts.append({"index": index, "id": entry_id, "error": "invalid id or version"})
+            continue
+        if not isinstance(cells, dict) or not cells:
+            conflicts.append({"index": index, "id": entry_id, "error": "cells must be a non-empty object"})
+            continue
+
+        if entry_id in merged:
+            indexes, first_version, first_cells = merged[entry_id]
+            indexes.append(index)
+            merged[entry_id] = [indexes, first_version if first_version is not None else version, {**first_cells, **cells}]
+        else:
+            merged[entry_id] = [[index], version, dict(cells)]
+
+    applied = {}
+    current = {}
+    with transaction.atomic():
+        if merged:
+            table = DTREntry._meta.db_table
+            rows = ", ".join(["(%s::bigint, %s::jsonb, %s::integer)"] * len(merged))
+            params = []
+            for entry_id, (_, version, cells) in merged.items():
+                params += [entry_id, json.dumps(cells), version]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    UPDATE {table} AS entry
+                    SET daily_data = entry.daily_data || patch.cells,
+                        version = entry.version + 1
+                    FROM (VALUES {rows}) AS patch (id, cells, version)
+                    WHERE entry.id = patch.id
+                      AND entry.dtr_file_id = %s
+                      AND (patch.version IS NULL OR entry.version = patch.version)
+                    RETURNING entry.id, entry.version
+                    """,
+                    params + [dtr_file.id],
+                )
+                applied = dict(cursor.fetchall())
+
+        if applied:
+            sync_attendance(set(applied))
+            if dtr_file.status == "verified":
+                refresh_period_summaries([dtr_file.id])
+
+        attempted = [entry_id for entry_id in merged if entry_id not in applied]
+        if attempted:
+            current = dtr_file.entries.only("id", "dtr_file_id", "version", "daily_data").in_bulk(attempted)
+
+    for entry_id in attempted:
+        entry = current.get(entry_id)
+        for index in merged[entry_id][0]:
+            if entry is None:
+                conflicts.append({"index": index, "id": entry_id, "error": "not found"})
+            else:
+                conflicts.append({
+                    "index": index,
+                    "id": entry_id,
+                    "error": "version mismatch",
+                    "version": entry.version,
+                    "daily_data": entry.daily_data,
+                })
+
+    conflicts.sort(key=lambda conflict: conflict["index"])
+    return {
+        "updated": [{"id": entry_id, "version": version} for entry_id, version in applied.items()],
+        "conflicts": conflicts,
+    }
@@ -0,0 +1,40 @@
+# files/consumers.py
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from channels.db import database_sync_to_async
+
+from backend_project.metrics import WEBSOCKET_CONNECTIONS
+
+from .dashboard import DASHBOARD_GROUP, get_dashboard_stats
+
+
+class DashboardConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Pushes dashboard counters to admin dashboards: the current values on
+    connect, then every update broadcast by files.dashboard.
+    """
+
+    async def connect(self):
+        self.user = self.scope.get("user")
+        if not self.user or self.user.is_anonymous:
+            await self.close(code=4001)
+            return
+
+        await self.channel_layer.group_add(DASHBOARD_GROUP, self.channel_name)
+        await self.accept()
+        WEBSOCKET_CONNECTIONS.inc(kind="dashboard")
+        self.counted = True
+        await self.send_json({
+            "type": "dashboard_stats",
+            "stats": await database_sync_to_async(get_dashboard_stats)(),
+        })
+
+    async def disconnect(self, close_code):
+        await self.channel_layer.group_discard(DASHBOARD_GROUP, self.channel_name)
+        if getattr(self, "counted", False):
+            WEBSOCKET_CONNECTIONS.dec(kind="dashboard")
+
+    async def dashboard_stats(self, event):
+        await self.send_json({
+            "type": "dashboard_stats",
+            "stats": event["stats"],
+        })
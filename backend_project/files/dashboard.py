@@ -0,0 +1,68 @@
+# files/dashboard.py
+"""
+Admin dashboard counters.
+
+The counters are computed with a single conditional-aggregate query,
+cached, and pushed to every socket in the "dashboard" group whenever
+files.signals invalidates them, so dashboards no longer need to poll.
+"""
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from accounts.models import User
+from .models import DTRFile
+
+DASHBOARD_CACHE_KEY = "files:dashboard_stats"
+DASHBOARD_CACHE_TIMEOUT = 300  # seconds; invalidation normally comes first
+DASHBOARD_GROUP = "dashboard"
+
+
+def compute_dashboard_stats():
+    """DTR status counts and active users in one round trip."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT
+                COUNT(*) FILTER (WHERE status = 'pending'),
+                COUNT(*) FILTER (WHERE status = 'verified'),
+                COUNT(*) FILTER (WHERE status = 'rejected'),
+                (SELECT COUNT(*) FROM {User._meta.db_table} WHERE is_active)
+            FROM {DTRFile._meta.db_table}
+            """
+        )
+        pending, approved, rejected, active_users = cursor.fetchone()
+
+    return {
+        "filesPending": pending,
+        "filesApproved": approved,
+        "filesRejected": rejected,
+        "activeUsers": active_users,
+    }
+
+
+def get_dashboard_stats():
+    return cache.get_or_set(DASHBOARD_CACHE_KEY, compute_dashboard_stats, DASHBOARD_CACHE_TIMEOUT)
+
+
+def broadcast_dashboard_stats():
+    """Recompute, re-cache and push the counters to connected dashboards."""
+    stats = compute_dashboard_stats()
+    cache.set(DASHBOARD_CACHE_KEY, stats, DASHBOARD_CACHE_TIMEOUT)
+
+    channel_layer = get_channel_layer()
+    if channel_layer is not None:
+        async_to_sync(channel_layer.group_send)(
+            DASHBOARD_GROUP, {"type": "dashboard.stats", "stats": stats}
+        )
+    return stats
+
+
+def invalidate_dashboard_stats():
+    """
+    Drop the cached counters now and broadcast fresh ones once the
+    surrounding transaction commits.
+    """
+    cache.delete(DASHBOARD_CACHE_KEY)
+    transaction.on_commit(broadcast_dashboard_stats, robust=True)
@@ -0,0 +1,26 @@
+# files/management/commands/rebuild_attendance.py
+
+from django.core.management.base import BaseCommand
+from files.models import DTREntry
+from files.attendance import sync_attendance, ATTENDANCE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DTRAttendance fact table from DTREntry.daily_data."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", type=int, dest="dtr_file", help="Only rebuild entries of this DTR file id.")
+
+    def handle(self, *args, **options):
+        entries = DTREntry.objects.order_by("id")
+        if options["dtr_file"]:
+            entries = entries.filter(dtr_file_id=options["dtr_file"])
+
+        entry_ids = list(entries.values_list("id", flat=True))
+        written = 0
+        for start in range(0, len(entry_ids), ATTENDANCE_BATCH_SIZE):
+            written += sync_attendance(entry_ids[start:start + ATTENDANCE_BATCH_SIZE])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Rebuilt {written} attendance row(s) for {len(entry_ids)} DTR entr{'y' if len(entry_ids) == 1 else 'ies'}."
+        ))
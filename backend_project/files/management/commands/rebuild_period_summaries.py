@@ -0,0 +1,28 @@
+# files/management/commands/rebuild_period_summaries.py
+
+from django.core.management.base import BaseCommand
+from files.models import DTRFile
+from files.summaries import refresh_period_summaries
+
+FILES_PER_BATCH = 50
+
+
+class Command(BaseCommand):
+    help = "Rebuild EmployeePeriodSummary from the entries of every DTR file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", type=int, dest="dtr_file", help="Only rebuild this DTR file id.")
+
+    def handle(self, *args, **options):
+        files = DTRFile.objects.order_by("id")
+        if options["dtr_file"]:
+            files = files.filter(id=options["dtr_file"])
+
+        file_ids = list(files.values_list("id", flat=True))
+        written = 0
+        for start in range(0, len(file_ids), FILES_PER_BATCH):
+            written += refresh_period_summaries(file_ids[start:start + FILES_PER_BATCH])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Rebuilt {written} period summary row(s) from {len(file_ids)} DTR file(s)."
+        ))
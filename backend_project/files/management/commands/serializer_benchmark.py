@@ -0,0 +1,128 @@
+# files/management/commands/serializer_benchmark.py
+
+import gc
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from files.models import DTRFile, DTREntry, ParsedDTR
+from files.serializers import (
+    DTREntrySerializer,
+    ParsedDTRSerializer,
+    serialize_dtr_entry_rows,
+    serialize_parsed_dtr_rows,
+    uploader_display_name,
+)
+
+User = get_user_model()
+
+
+def best_of(fn, repeat):
+    """Fastest of ``repeat`` runs, with GC off so collection pauses don't skew it."""
+    timings = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+    finally:
+        gc.enable()
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the per-row cost of the values()-based DTREntry/ParsedDTR serializers "
+        "with the ModelSerializers they replace. Seeds throwaway rows in a transaction "
+        "that is rolled back, and fails when a fast path is less than --min-speedup faster."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=500)
+        parser.add_argument("--repeat", type=int, default=7, help="Timed runs per serializer; the fastest counts.")
+        parser.add_argument("--min-speedup", type=float, default=5)
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        if rows < 1:
+            raise CommandError("Need at least one row.")
+
+        with transaction.atomic():
+            results = self.run(rows, options["repeat"])
+            transaction.set_rollback(True)
+
+        too_slow = []
+        for name, slow_per_row, fast_per_row in results:
+            speedup = slow_per_row / fast_per_row
+            self.stdout.write(
+                f"{name}: {slow_per_row * 1e6:.1f}us -> {fast_per_row * 1e6:.1f}us per row ({speedup:.1f}x)"
+            )
+            if speedup < options["min_speedup"]:
+                too_slow.append(f"{name} ({speedup:.1f}x)")
+
+        if too_slow:
+            raise CommandError(f"Below {options['min_speedup']}x: {', '.join(too_slow)}")
+        self.stdout.write(self.style.SUCCESS("✅ Serializer benchmark finished."))
+
+    def run(self, rows, repeat):
+        user = User.objects.create_user(username="serializer_benchmark", first_name="Bench", last_name="Mark")
+        dtr_file = DTRFile.objects.create(uploaded_by=user, start_date=date(2025, 9, 1), end_date=date(2025, 9, 15))
+        DTREntry.objects.bulk_create([
+            DTREntry(
+                dtr_file=dtr_file,
+                sheet_name="Sheet1",
+                full_name=f"Employee {i}",
+                employee_no=f"{i:05d}",
+                employee_no_int=i,
+                position="Guard",
+                shift="Day",
+                time="08:00-17:00",
+                daily_data={"2025-09-01": 8, "2025-09-02": "A"},
+                total_days=Decimal("12"),
+                total_hours=Decimal("96.5"),
+                regular_ot=Decimal("1.25"),
+            )
+            for i in range(rows)
+        ])
+        ParsedDTR.objects.bulk_create([
+            ParsedDTR(
+                uploaded_by=user,
+                employee_name=f"Employee {i}",
+                employee_no=f"{i:05d}",
+                period_from=date(2025, 9, 1),
+                period_to=date(2025, 9, 15),
+                sheet_name=f"Sheet{i}",
+                days=[{"day": 1, "hours": 8}],
+                totals={"hours": 8},
+            )
+            for i in range(rows)
+        ])
+
+        entry_qs = DTREntry.objects.filter(dtr_file=dtr_file).order_by("id")
+        entry_objs = list(entry_qs)
+        entry_dicts = list(entry_qs.values(*serialize_dtr_entry_rows.values_fields))
+
+        parsed_qs = (
+            ParsedDTR.objects.filter(uploaded_by=user)
+            .annotate(uploaded_by_name=uploader_display_name())
+            .order_by("id")
+        )
+        parsed_objs = list(parsed_qs)
+        parsed_dicts = list(parsed_qs.values(*serialize_parsed_dtr_rows.values_fields))
+
+        cases = [
+            ("DTREntry", lambda: DTREntrySerializer(entry_objs, many=True).data,
+             lambda: serialize_dtr_entry_rows(entry_dicts)),
+            ("ParsedDTR", lambda: ParsedDTRSerializer(parsed_objs, many=True).data,
+             lambda: serialize_parsed_dtr_rows(parsed_dicts)),
+        ]
+        return [
+            (name, best_of(slow, repeat) / rows, best_of(fast, repeat) / rows)
+            for name, slow, fast in cases
+        ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0044_delete_dtruploadrequest'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dtrentry',
+            name='sheet_name',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.CreateModel(
+            name='ParsedDTR',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('employee_name', models.CharField(max_length=255)),
+                ('employee_no', models.CharField(db_index=True, max_length=50)),
+                ('department', models.CharField(blank=True, max_length=100, null=True)),
+                ('project', models.CharField(blank=True, max_length=255, null=True)),
+                ('period_from', models.DateField()),
+                ('period_to', models.DateField()),
+                ('time_from', models.CharField(blank=True, max_length=20, null=True)),
+                ('time_to', models.CharField(blank=True, max_length=20, null=True)),
+                ('rest_day', models.CharField(blank=True, max_length=20, null=True)),
+                ('time_shift', models.CharField(blank=True, max_length=50, null=True)),
+                ('sheet_name', models.CharField(max_length=50)),
+                ('days', models.JSONField(default=list)),
+                ('totals', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')], default='pending', max_length=20)),
+                ('remarks', models.TextField(blank=True, null=True)),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('uploaded_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='parsed_dtrs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-uploaded_at'],
+                'unique_together': {('employee_no', 'period_from', 'period_to', 'sheet_name')},
+            },
+        ),
+    ]
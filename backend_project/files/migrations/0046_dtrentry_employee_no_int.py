@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0045_dtrentry_sheet_name_parseddtr'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dtrentry',
+            name='employee_no_int',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE files_dtrentry
+                SET employee_no_int = CASE
+                    WHEN length(regexp_replace(employee_no, '\\D', '', 'g')) BETWEEN 1 AND 18
+                    THEN regexp_replace(employee_no, '\\D', '', 'g')::bigint
+                END
+                WHERE employee_no IS NOT NULL;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
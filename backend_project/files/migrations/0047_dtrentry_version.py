@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0046_dtrentry_employee_no_int'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dtrentry',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from files.attendance import ATTENDANCE_BATCH_SIZE, attendance_rows
+
+
+def backfill_attendance(apps, schema_editor):
+    """Build the fact rows of every existing entry."""
+    DTREntry = apps.get_model("files", "DTREntry")
+    DTRAttendance = apps.get_model("files", "DTRAttendance")
+
+    facts = []
+    entries = DTREntry.objects.order_by("id").values_list("id", "employee_no_int", "daily_data")
+    for entry_id, employee_no_int, daily_data in entries.iterator(chunk_size=ATTENDANCE_BATCH_SIZE):
+        # Duplicate keys for one day keep the last, as in sync_attendance
+        rows = attendance_rows(entry_id, employee_no_int, daily_data, model=DTRAttendance)
+        facts.extend({row.date: row for row in rows}.values())
+        if len(facts) >= ATTENDANCE_BATCH_SIZE:
+            DTRAttendance.objects.bulk_create(facts)
+            facts = []
+    DTRAttendance.objects.bulk_create(facts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0047_dtrentry_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DTRAttendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('employee_no_int', models.BigIntegerField(blank=True, null=True)),
+                ('date', models.DateField()),
+                ('value', models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True)),
+                ('code', models.CharField(blank=True, default='', max_length=20)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance', to='files.dtrentry')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['employee_no_int', 'date'], name='dtr_attendance_emp_date_idx')],
+                'unique_together': {('entry', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_attendance, migrations.RunPython.noop),
+    ]
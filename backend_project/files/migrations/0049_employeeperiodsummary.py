@@ -0,0 +1,55 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from files.summaries import _rebuild_summaries
+
+FILES_PER_BATCH = 50
+
+
+def backfill_period_summaries(apps, schema_editor):
+    """Summarize every DTR file that is already verified."""
+    DTRFile = apps.get_model("files", "DTRFile")
+    file_ids = list(DTRFile.objects.filter(status="verified").order_by("id").values_list("id", flat=True))
+    for start in range(0, len(file_ids), FILES_PER_BATCH):
+        _rebuild_summaries(set(file_ids[start:start + FILES_PER_BATCH]), apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0048_dtrattendance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeePeriodSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('employee_code', models.CharField(max_length=20)),
+                ('employee_no_int', models.BigIntegerField()),
+                ('employee_name', models.CharField(blank=True, max_length=150)),
+                ('project', models.CharField(blank=True, max_length=150)),
+                ('period_start', models.DateField(blank=True, null=True)),
+                ('period_end', models.DateField(blank=True, null=True)),
+                ('entries', models.PositiveIntegerField(default=0)),
+                ('total_days', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('total_hours', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('undertime_minutes', models.IntegerField(default=0)),
+                ('regular_ot', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('night_diff', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('legal_holiday', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('unworked_reg_holiday', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('special_holiday', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('absences', models.PositiveIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('dtr_file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_summaries', to='files.dtrfile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['employee_no_int', 'period_start'], name='period_summary_emp_idx'), models.Index(fields=['project', 'period_start'], name='period_summary_project_idx')],
+                'unique_together': {('dtr_file', 'employee_no_int')},
+            },
+        ),
+        migrations.RunPython(backfill_period_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:54
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction, but it
+    # doesn't lock the (large) DTR tables against writes while it builds.
+    atomic = False
+
+    dependencies = [
+        ('files', '0049_employeeperiodsummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='auditlog',
+            index=models.Index(fields=['-timestamp'], name='auditlog_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='dtrentry',
+            index=models.Index(fields=['dtr_file', 'full_name'], name='dtrentry_file_name_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='dtrfile',
+            index=models.Index(fields=['status', 'start_date', 'end_date'], name='dtrfile_status_period_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='dtrfile',
+            index=models.Index(fields=['uploaded_by', '-uploaded_at'], name='dtrfile_uploader_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='file',
+            index=models.Index(fields=['owner', 'status', '-uploaded_at'], name='file_owner_status_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='parseddtr',
+            index=models.Index(fields=['uploaded_by', 'status', 'period_from', 'period_to'], name='parseddtr_uploader_status_idx'),
+        ),
+    ]
@@ -16,6 +16,12 @@ class File(models.Model):
     status = models.CharField(max_length=20, default="pending")
     parsed_content = models.JSONField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # rejected_files and the client file list: owner (+ status), newest first
+            models.Index(fields=["owner", "status", "-uploaded_at"], name="file_owner_status_recent_idx"),
+        ]
+
     def __str__(self):
         return f"{self.file.name} ({self.owner.username})"
 
@@ -27,6 +33,12 @@ class AuditLog(models.Model):
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Audit viewer pages newest-first
+            models.Index(fields=["-timestamp"], name="auditlog_recent_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user.username if self.user else 'Unknown'} - {self.action} at {self.timestamp}"
 
@@ -115,15 +127,36 @@ class DTRFile(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
     rejection_reason = models.TextField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # sync_all_files: verified files overlapping a date range
+            models.Index(fields=["status", "start_date", "end_date"], name="dtrfile_status_period_idx"),
+            # Client DTR list: own uploads, newest first
+            models.Index(fields=["uploaded_by", "-uploaded_at"], name="dtrfile_uploader_recent_idx"),
+        ]
+
     def __str__(self):
         return f"DTR: {self.file.name}"
 
 
+def normalize_employee_no(value):
+    """
+    Integer form of an employee number ("PM00123", "00123", 123 -> 123).
+    Returns None when there are no digits to go on (or too many for a bigint).
+    """
+    if value is None:
+        return None
+    digits = "".join(filter(str.isdigit, str(value)))
+    return int(digits) if 0 < len(digits) <= 18 else None
+
+
 class DTREntry(models.Model):
     dtr_file = models.ForeignKey(DTRFile, on_delete=models.CASCADE, related_name="entries")
     sheet_name = models.CharField(max_length=100, null=True, blank=True)
     full_name = models.CharField(max_length=150)
     employee_no = models.CharField(max_length=50, null=True, blank=True)
+    # Indexed numeric copy of employee_no, kept in sync on every save/ingest
+    employee_no_int = models.BigIntegerField(null=True, blank=True, db_index=True, editable=False)
     position = models.CharField(max_length=100, blank=True, null=True)
     shift = models.CharField(max_length=50, blank=True, null=True)
     time = models.CharField(max_length=50, blank=True, null=True)
@@ -138,10 +171,95 @@ class DTREntry(models.Model):
     special_holiday = models.DecimalField(max_digits=6, decimal_places=2, default=0)
     night_diff = models.DecimalField(max_digits=6, decimal_places=2, default=0)
 
+    # Optimistic-locking counter, bumped on every write to the row
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        indexes = [
+            # Entries of one file in name order (DTREntryViewSet ?dtr_file=)
+            models.Index(fields=["dtr_file", "full_name"], name="dtrentry_file_name_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.employee_no_int = normalize_employee_no(self.employee_no)
+        if not self._state.adding:
+            self.version += 1
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = {*update_fields, "version"}
+            if "employee_no" in update_fields:
+                update_fields.add("employee_no_int")
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.employee_no} - {self.full_name}"
 
 
+class DTRAttendance(models.Model):
+    """
+    One row per (entry, day) cell of DTREntry.daily_data, so reports can
+    aggregate attendance in SQL instead of walking the JSON in Python.
+    Numeric cells land in ``value`` (hours); anything else ("A", "RD", ...)
+    lands in ``code``. Maintained by files.attendance.sync_attendance.
+    """
+
+    entry = models.ForeignKey(DTREntry, on_delete=models.CASCADE, related_name="attendance")
+    employee_no_int = models.BigIntegerField(null=True, blank=True)
+    date = models.DateField()
+    value = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
+    code = models.CharField(max_length=20, blank=True, default="")
+
+    class Meta:
+        unique_together = ("entry", "date")
+        indexes = [
+            models.Index(fields=["employee_no_int", "date"], name="dtr_attendance_emp_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_no_int} {self.date}: {self.value if self.value is not None else self.code}"
+
+
+class EmployeePeriodSummary(models.Model):
+    """
+    Precomputed totals per employee for one verified DTR file, i.e. one
+    employee x period x project (the uploader). Refreshed per file by
+    files.summaries.refresh_period_summaries whenever a DTR is verified,
+    un-verified or edited.
+    """
+
+    dtr_file = models.ForeignKey(DTRFile, on_delete=models.CASCADE, related_name="period_summaries")
+    employee_code = models.CharField(max_length=20)
+    employee_no_int = models.BigIntegerField()
+    employee_name = models.CharField(max_length=150, blank=True)
+    project = models.CharField(max_length=150, blank=True)
+    period_start = models.DateField(null=True, blank=True)
+    period_end = models.DateField(null=True, blank=True)
+
+    entries = models.PositiveIntegerField(default=0)
+    total_days = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    total_hours = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    undertime_minutes = models.IntegerField(default=0)
+    regular_ot = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    night_diff = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    legal_holiday = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    unworked_reg_holiday = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    special_holiday = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    absences = models.PositiveIntegerField(default=0)
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("dtr_file", "employee_no_int")
+        indexes = [
+            models.Index(fields=["employee_no_int", "period_start"], name="period_summary_emp_idx"),
+            models.Index(fields=["project", "period_start"], name="period_summary_project_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_code} {self.period_start} → {self.period_end} ({self.project})"
+
+
 class Employee(models.Model):
     employee_no = models.CharField(max_length=20, unique=True, db_index=True)
     employee_name = models.CharField(max_length=255)
@@ -223,6 +341,13 @@ class ParsedDTR(models.Model):
             "sheet_name",
         )
         ordering = ["-uploaded_at"]
+        indexes = [
+            # ParsedDTRViewSet: uploader / status / period filters
+            models.Index(
+                fields=["uploaded_by", "status", "period_from", "period_to"],
+                name="parseddtr_uploader_status_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.employee_no} | {self.period_from} - {self.period_to}"
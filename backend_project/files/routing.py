@@ -0,0 +1,9 @@
+# files/routing.py
+
+from django.urls import re_path
+from . import consumers
+
+websocket_urlpatterns = [
+    # Live counters for the admin dashboard
+    re_path(r"^ws/dashboard/$", consumers.DashboardConsumer.as_asgi()),
+]
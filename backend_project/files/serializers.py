@@ -1,5 +1,11 @@
 # files/serializers.py
+import logging
 from rest_framework import serializers
+from django.conf import settings
+from django.db import models
+from django.db.models import Value
+from django.utils import timezone
+from django.db.models.functions import Coalesce, Concat, NullIf, Trim
 from .models import (
     File,
     AuditLog,
@@ -7,6 +13,7 @@ from .models import (
     EmployeeDirectory,
     DTRFile,
     DTREntry,
+    EmployeePeriodSummary,
     Employee,
     PDFFile,
     ParsedDTR,
@@ -14,6 +21,8 @@ from .models import (
 from .utils import extract_pdf_pages
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 class FileSerializer(serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source="owner.username")
 
@@ -43,6 +52,12 @@ class SystemSettingsSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+EMPLOYEE_DIRECTORY_FIELDS = tuple(f.name for f in EmployeeDirectory._meta.concrete_fields)
+EMPLOYEE_DIRECTORY_NUMERIC_FIELDS = tuple(
+    f.name for f in EmployeeDirectory._meta.concrete_fields if isinstance(f, models.DecimalField)
+)
+
+
 class EmployeeDirectorySerializer(serializers.ModelSerializer):
     class Meta:
         model = EmployeeDirectory
@@ -53,19 +68,8 @@ class EmployeeDirectorySerializer(serializers.ModelSerializer):
         Format numeric fields to 2 decimal places for better readability.
         """
         data = super().to_representation(instance)
-        numeric_fields = [
-            "total_hours", "nd_reg_hrs", "absences", "tardiness", "undertime",
-            "ot_regular", "nd_ot_reg", "ot_restday", "nd_restday", "ot_rest_excess",
-            "nd_rest_excess", "ot_special_hday", "nd_special_hday", "ot_shday_excess",
-            "nd_shday_excess", "ot_legal_holiday", "special_holiday", "ot_leghol_excess",
-            "nd_leghol_excess", "ot_sh_on_rest", "nd_sh_on_rest", "ot_sh_on_rest_excess",
-            "nd_sh_on_rest_excess", "leg_h_on_rest_day", "nd_leg_h_on_restday",
-            "ot_leg_h_on_rest_excess", "nd_leg_h_on_rest_excess", "vacleave_applied",
-            "sickleave_applied", "back_pay_vl", "back_pay_sl", "ot_regular_excess",
-            "nd_ot_reg_excess", "legal_holiday", "nd_legal_holiday", "overnight_rate",
-        ]
 
-        for field in numeric_fields:
+        for field in EMPLOYEE_DIRECTORY_NUMERIC_FIELDS:
             value = data.get(field)
             if value is not None:
                 try:
@@ -76,6 +80,60 @@ class EmployeeDirectorySerializer(serializers.ModelSerializer):
         return data
 
 
+def _format_decimal(value):
+    return f"{value:.2f}"
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+def _datetime_formatter():
+    """
+    Same output as ``serializers.DateTimeField().to_representation`` with the
+    current timezone resolved once per call instead of once per value.
+    """
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+
+    def fmt(value):
+        if tz is not None and timezone.is_aware(value):
+            value = value.astimezone(tz)
+        value = value.isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+
+    return fmt
+
+
+def serialize_employee_directory_rows(rows, fields=EMPLOYEE_DIRECTORY_FIELDS):
+    """
+    Fast read path for the employee directory.
+
+    ``rows`` are tuples from ``values_list(*fields)``. Produces the same output
+    as ``EmployeeDirectorySerializer`` without building a serializer (and 40
+    field objects) per row: formatters are resolved once per column.
+    """
+    datetime_fmt = _datetime_formatter()
+    formatters = []
+    for field in fields:
+        if field in EMPLOYEE_DIRECTORY_NUMERIC_FIELDS:
+            formatters.append(_format_decimal)
+        elif field == "uploaded_at":
+            formatters.append(datetime_fmt)
+        else:
+            formatters.append(None)
+
+    columns = list(zip(fields, formatters))
+    return [
+        {
+            field: value if fmt is None or value is None else fmt(value)
+            for (field, fmt), value in zip(columns, row)
+        }
+        for row in rows
+    ]
+
+
 class DTRFileSerializer(serializers.ModelSerializer):
     filename = serializers.SerializerMethodField()
     uploaded_by = serializers.SerializerMethodField()
@@ -127,6 +185,58 @@ class EmployeeSerializer(serializers.ModelSerializer):
         fields = ["id", "employee_no", "employee_name", "created_at", "updated_at"]
         read_only_fields = ["id", "created_at", "updated_at"]
 
+
+def validate_employee_row(row):
+    """
+    Cheap stand-in for EmployeeSerializer field validation, used for bulk
+    uploads. Returns ``(employee_no, employee_name)`` or ``None`` if invalid.
+    """
+    if not isinstance(row, dict):
+        return None
+
+    cleaned = []
+    for field, max_length in (("employee_no", 20), ("employee_name", 255)):
+        value = row.get(field)
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            return None
+        value = str(value).strip()
+        if not value or len(value) > max_length:
+            return None
+        cleaned.append(value)
+
+    return tuple(cleaned)
+
+
+class EmployeeBulkListSerializer(serializers.ListSerializer):
+    """
+    Validates a whole master list in one pass. Invalid rows are counted in
+    ``skipped`` instead of failing the batch.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError({"employees": "Expected a list of employees."})
+
+        rows = []
+        self.skipped = 0
+        for item in data:
+            cleaned = validate_employee_row(item)
+            if cleaned is None:
+                self.skipped += 1
+            else:
+                rows.append({"employee_no": cleaned[0], "employee_name": cleaned[1]})
+        return rows
+
+
+class EmployeeBulkSerializer(serializers.Serializer):
+    """
+    Use with ``many=True``: rows are validated by EmployeeBulkListSerializer
+    through validate_employee_row, never field by field.
+    """
+
+    class Meta:
+        list_serializer_class = EmployeeBulkListSerializer
+
 class PDFFileSerializer(serializers.ModelSerializer):
     uploaded_by_name = serializers.SerializerMethodField()
 
@@ -149,7 +259,6 @@ class PDFFileSerializer(serializers.ModelSerializer):
         try:
             # 🧩 Wait until file is fully saved before reading
             file_path = pdf_file.file.path
-            print("DEBUG PDF PATH:", file_path)
 
             parsed = extract_pdf_pages(file_path)
             if parsed:
@@ -166,12 +275,12 @@ class PDFFileSerializer(serializers.ModelSerializer):
                     pdf_file.readable_period = self.format_period(start, end)
 
                 pdf_file.save()
-                print(f"✅ Parsed {len(parsed)} pages successfully.")
+                logger.info("Parsed %d pages from %s", len(parsed), file_path)
             else:
-                print("⚠️ No text found or failed to extract pages.")
+                logger.warning("No text found or failed to extract pages from %s", file_path)
 
-        except Exception as e:
-            print("❌ PDF parsing error:", e)
+        except Exception:
+            logger.exception("PDF parsing error for PDFFile %s", pdf_file.id)
 
         return pdf_file
 
@@ -188,7 +297,7 @@ class PDFFileSerializer(serializers.ModelSerializer):
                 # Different months → "Aug 30 – Sep 15, 2025"
                 return f"{start_dt.strftime('%b %d')} – {end_dt.strftime('%b %d, %Y')}"
         except Exception as e:
-            print("⚠️ Failed to format period:", e)
+            logger.warning("Failed to format period %r to %r: %s", start, end, e)
             return f"{start} → {end}"
         
 class ParsedDTRSerializer(serializers.ModelSerializer):
@@ -205,9 +314,85 @@ class ParsedDTRSerializer(serializers.ModelSerializer):
         ]
 
     def get_uploaded_by_name(self, obj):
+        # Prefer the uploader_display_name() annotation when the queryset has it
+        annotated = getattr(obj, "uploaded_by_name", None)
+        if annotated:
+            return annotated
+
         user = obj.uploaded_by
         if not user:
             return "N/A"
 
         full_name = f"{user.first_name} {user.last_name}".strip()
-        return full_name if full_name else user.username
\ No newline at end of file
+        return full_name if full_name else user.username
+
+
+def uploader_display_name(path="uploaded_by"):
+    """
+    SQL version of the "first + last name, else username" rule used for
+    uploaders, so list querysets can annotate it instead of touching the
+    related user per row.
+    """
+    full_name = Trim(Concat(f"{path}__first_name", Value(" "), f"{path}__last_name"))
+    return Coalesce(NullIf(full_name, Value("")), f"{path}__username", output_field=models.CharField())
+
+
+def _values_row_serializer(model, fields, extra=()):
+    """
+    Build a plain function that turns ``.values()`` dicts into the same
+    payload a ``fields = "__all__"`` ModelSerializer would produce.
+
+    Formatting is decided once per column rather than once per row, and
+    columns that need no formatting are copied with a plain ``dict()``, which
+    is what makes list/content endpoints cheap on large DTRs. ``extra`` names
+    annotated columns that are passed through as-is.
+    """
+    values_fields, formatted, datetimes, renamed = [], [], [], []
+    for name in fields:
+        field = model._meta.get_field(name)
+        values_fields.append(field.attname)
+        if field.attname != name:
+            renamed.append((field.attname, name))
+        if isinstance(field, models.DecimalField):
+            formatted.append((field.attname, f"{{:.{field.decimal_places}f}}".format))
+        elif isinstance(field, models.DateTimeField):
+            datetimes.append(field.attname)
+        elif isinstance(field, models.DateField):
+            formatted.append((field.attname, _isoformat))
+    values_fields.extend(extra)
+
+    def serialize(rows):
+        datetime_fmt = _datetime_formatter()
+        columns = formatted + [(key, datetime_fmt) for key in datetimes]
+
+        results = []
+        for row in rows:
+            item = dict(row)
+            for key, fmt in columns:
+                value = item[key]
+                if value is not None:
+                    item[key] = fmt(value)
+            for key, name in renamed:
+                item[name] = item.pop(key)
+            results.append(item)
+        return results
+
+    serialize.values_fields = tuple(values_fields)
+    return serialize
+
+
+serialize_dtr_entry_rows = _values_row_serializer(
+    DTREntry,
+    [f.name for f in DTREntry._meta.concrete_fields if not f.is_relation] + ["dtr_file"],
+)
+
+serialize_parsed_dtr_rows = _values_row_serializer(
+    ParsedDTR,
+    [f.name for f in ParsedDTR._meta.concrete_fields if not f.is_relation] + ["uploaded_by"],
+    extra=["uploaded_by_name"],
+)
+
+serialize_period_summary_rows = _values_row_serializer(
+    EmployeePeriodSummary,
+    [f.name for f in EmployeePeriodSummary._meta.concrete_fields if not f.is_relation] + ["dtr_file"],
+)
@@ -0,0 +1,38 @@
+# files/signals.py
+
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .dashboard import invalidate_dashboard_stats
+from .models import DTRFile
+
+
+def _touches(update_fields, field):
+    """True when a save may have changed ``field`` (full saves always may)."""
+    return update_fields is None or field in update_fields
+
+
+@receiver(post_save, sender=DTRFile)
+def dtr_file_saved(sender, instance, created, update_fields=None, **kwargs):
+    """
+    New DTR files and status changes move the dashboard counters.
+    """
+    if created or _touches(update_fields, "status"):
+        invalidate_dashboard_stats()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Activating or deactivating a user changes the active-user counter.
+    Login/presence saves only touch last_login / is_online and are ignored.
+    """
+    if created or _touches(update_fields, "is_active"):
+        invalidate_dashboard_stats()
+
+
+@receiver(post_delete, sender=DTRFile)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def counted_row_deleted(sender, instance, **kwargs):
+    invalidate_dashboard_stats()
@@ -0,0 +1,94 @@
+# files/summaries.py
+"""
+Maintains EmployeePeriodSummary, the per-employee totals of every verified
+DTR file, so dashboards and payroll syncs read a handful of precomputed
+rows instead of re-aggregating DTREntry on every request.
+
+The table is refreshed one DTR file at a time: whenever a file is verified,
+un-verified, re-parsed or its entries are edited, its summary rows are
+deleted and re-inserted from a single GROUP BY.
+"""
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+
+from .attendance import ABSENCE_CODES
+from .serializers import uploader_display_name
+
+SUMMARY_TOTAL_FIELDS = [
+    "total_days", "total_hours", "undertime_minutes", "regular_ot", "night_diff",
+    "legal_holiday", "unworked_reg_holiday", "special_holiday",
+]
+
+
+def employee_code_for(employee_no_int):
+    """EmployeeDirectory-style code: digits left-padded to five places."""
+    return str(employee_no_int).zfill(5)
+
+
+def refresh_period_summaries(dtr_file_ids):
+    """
+    Recompute the summary rows of the given DTR files. Files that are not
+    verified simply end up without rows. Returns the number of rows written.
+    """
+    dtr_file_ids = set(dtr_file_ids)
+    if not dtr_file_ids:
+        return 0
+
+    with transaction.atomic():
+        return _rebuild_summaries(dtr_file_ids)
+
+
+def _rebuild_summaries(dtr_file_ids, apps=global_apps):
+    """``apps`` lets migration 0049 run this against its historical models."""
+    DTREntry = apps.get_model("files", "DTREntry")
+    DTRAttendance = apps.get_model("files", "DTRAttendance")
+    EmployeePeriodSummary = apps.get_model("files", "EmployeePeriodSummary")
+
+    verified = DTREntry.objects.filter(
+        dtr_file_id__in=dtr_file_ids,
+        dtr_file__status="verified",
+        employee_no_int__isnull=False,
+    )
+
+    totals = (
+        verified.values(
+            "dtr_file_id",
+            "employee_no_int",
+            project=uploader_display_name("dtr_file__uploaded_by"),
+            period_start=F("dtr_file__start_date"),
+            period_end=F("dtr_file__end_date"),
+        )
+        .annotate(
+            employee_name=Max("full_name"),
+            entries=Count("id"),
+            **{field: Sum(field) for field in SUMMARY_TOTAL_FIELDS},
+        )
+    )
+
+    # Plain joins rather than ``entry__in=verified``: right after a bulk load
+    # the tables have no statistics yet and the planner turns the IN
+    # subquery into a nested loop per attendance row.
+    absences = {
+        (row["entry__dtr_file_id"], row["employee_no_int"]): row["count"]
+        for row in DTRAttendance.objects.filter(
+            entry__dtr_file_id__in=dtr_file_ids,
+            entry__dtr_file__status="verified",
+            employee_no_int__isnull=False,
+            code__in=ABSENCE_CODES,
+        ).values("entry__dtr_file_id", "employee_no_int").annotate(count=Count("id"))
+    }
+
+    summaries = [
+        EmployeePeriodSummary(
+            employee_code=employee_code_for(row["employee_no_int"]),
+            employee_name=(row["employee_name"] or "").strip()[:150],
+            absences=absences.get((row["dtr_file_id"], row["employee_no_int"]), 0),
+            **{key: value for key, value in row.items() if key != "employee_name"},
+        )
+        for row in totals
+    ]
+
+    EmployeePeriodSummary.objects.filter(dtr_file_id__in=dtr_file_ids).delete()
+    EmployeePeriodSummary.objects.bulk_create(summaries)
+    return len(summaries)
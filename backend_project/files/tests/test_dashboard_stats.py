@@ -0,0 +1,130 @@
+from datetime import date
+from io import BytesIO
+
+import openpyxl
+import pytest
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from files.consumers import DashboardConsumer
+from files.models import DTRFile
+
+User = get_user_model()
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+def orm_counts():
+    """What the old four count() queries returned."""
+    return {
+        "filesPending": DTRFile.objects.filter(status="pending").count(),
+        "filesApproved": DTRFile.objects.filter(status="verified").count(),
+        "filesRejected": DTRFile.objects.filter(status="rejected").count(),
+        "activeUsers": User.objects.filter(is_active=True).count(),
+    }
+
+@pytest.fixture
+def admin_user(db):
+    return User.objects.create_superuser(username="admin", email="admin@test.com", password="admin123")
+
+@pytest.mark.django_db
+def test_dashboard_stats_single_query_then_cached(api_client, admin_user, django_assert_num_queries):
+    api_client.force_authenticate(user=admin_user)
+    for status in ["pending", "pending", "verified", "rejected"]:
+        DTRFile.objects.create(uploaded_by=admin_user, status=status)
+    User.objects.create_user(username="inactive", password="x", is_active=False)
+    cache.clear()
+    expected = orm_counts()
+
+    with django_assert_num_queries(1):
+        response = api_client.get("/api/files/dashboard-stats/")
+    assert response.data == expected
+    assert (expected["filesPending"], expected["filesApproved"], expected["filesRejected"]) == (2, 1, 1)
+
+    with django_assert_num_queries(0):
+        api_client.get("/api/files/dashboard-stats/")
+
+@pytest.mark.django_db
+def test_dashboard_stats_invalidated_on_status_and_activation(api_client, admin_user):
+    api_client.force_authenticate(user=admin_user)
+    dtr_file = DTRFile.objects.create(uploaded_by=admin_user)
+    assert api_client.get("/api/files/dashboard-stats/").data["filesPending"] == 1
+
+    api_client.patch(f"/api/files/dtr/files/{dtr_file.id}/status/", {"status": "verified"}, format="json")
+    stats = api_client.get("/api/files/dashboard-stats/").data
+    assert (stats["filesPending"], stats["filesApproved"]) == (0, 1)
+
+    active = stats["activeUsers"]
+    other = User.objects.create_user(username="clerk", password="x")
+    assert api_client.get("/api/files/dashboard-stats/").data["activeUsers"] == active + 1
+
+    other.is_active = False
+    other.save(update_fields=["is_active"])
+    assert api_client.get("/api/files/dashboard-stats/").data["activeUsers"] == active
+
+    other.last_login = None
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("files.signals.invalidate_dashboard_stats", lambda: pytest.fail("login saves must not invalidate"))
+        other.save(update_fields=["last_login"])
+
+@pytest.mark.django_db
+def test_parse_refreshes_dashboard_once(api_client, admin_user):
+    api_client.force_authenticate(user=admin_user)
+    wb = openpyxl.Workbook()
+    for n in range(3):
+        ws = wb.active if n == 0 else wb.create_sheet()
+        ws["D9"], ws["D10"] = date(2025, 9, 1), date(2025, 9, 15)
+        ws["C15"], ws["D15"], ws["H15"] = f"Employee {n}", f"PM{n + 1}", 8
+    workbook = BytesIO()
+    wb.save(workbook)
+    dtr_file = DTRFile.objects.create(uploaded_by=admin_user, file=ContentFile(workbook.getvalue(), "sheets.xlsx"))
+
+    calls = []
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("files.signals.invalidate_dashboard_stats", lambda: calls.append(1))
+        response = api_client.post(f"/api/files/dtr/files/{dtr_file.id}/parse/")
+    assert response.status_code == 200, response.data
+    assert dtr_file.entries.count() == 3
+    dtr_file.refresh_from_db()
+    assert (dtr_file.start_date, dtr_file.end_date) == (date(2025, 9, 1), date(2025, 9, 15))
+    # Saving the parsed dates doesn't touch the counters
+    assert calls == []
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_dashboard_consumer_receives_pushed_counters():
+    user = await sync_to_async(User.objects.create_superuser)(username="admin", email="a@test.com", password="x")
+
+    communicator = WebsocketCommunicator(DashboardConsumer.as_asgi(), "/ws/dashboard/")
+    communicator.scope["user"] = user
+    connected, _ = await communicator.connect()
+    assert connected
+
+    initial = await communicator.receive_json_from()
+    assert initial == {"type": "dashboard_stats", "stats": await sync_to_async(orm_counts)()}
+
+    await sync_to_async(DTRFile.objects.create)(uploaded_by=user)
+
+    pushed = await communicator.receive_json_from()
+    assert pushed["stats"]["filesPending"] == initial["stats"]["filesPending"] + 1
+    await communicator.disconnect()
+
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_dashboard_consumer_rejects_anonymous():
+    from django.contrib.auth.models import AnonymousUser
+
+    communicator = WebsocketCommunicator(DashboardConsumer.as_asgi(), "/ws/dashboard/")
+    communicator.scope["user"] = AnonymousUser()
+    connected, _ = await communicator.connect()
+    assert not connected
@@ -0,0 +1,151 @@
+import importlib
+import pytest
+from datetime import date
+from decimal import Decimal
+from rest_framework.test import APIClient
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from files.models import DTRFile, DTREntry, DTRAttendance
+from files.attendance import parse_attendance_cell, parse_attendance_day
+
+User = get_user_model()
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+@pytest.fixture
+def admin_user(db):
+    return User.objects.create_superuser(username="admin", email="admin@test.com", password="admin123")
+
+def create_manual_dtr(api_client, rows, start="2025-09-01", end="2025-09-15"):
+    response = api_client.post(
+        "/api/files/dtr/files/manual/",
+        {"start_date": start, "end_date": end, "rows": rows},
+        format="json",
+    )
+    assert response.status_code == 201
+    return DTRFile.objects.get(id=response.data["id"])
+
+def manual_row(employee_no, daily_data):
+    return {
+        "full_name": f"Employee {employee_no}",
+        "employee_no": employee_no,
+        "daily_data": daily_data,
+        "total_days": 0, "total_hours": 0, "undertime_minutes": 0, "regular_ot": 0,
+        "legal_holiday": 0, "unworked_reg_holiday": 0, "special_holiday": 0, "night_diff": 0,
+    }
+
+def facts(entry):
+    return {
+        (f.date.isoformat(), f.value, f.code)
+        for f in DTRAttendance.objects.filter(entry=entry)
+    }
+
+def test_parse_attendance_cells():
+    assert parse_attendance_cell(8) == (Decimal("8.00"), "")
+    assert parse_attendance_cell(" 7.5 ") == (Decimal("7.50"), "")
+    assert parse_attendance_cell("a") == (None, "A")
+    assert parse_attendance_cell("") is None
+    assert parse_attendance_cell(None) is None
+    assert parse_attendance_day("2025-09-01 00:00:00") == date(2025, 9, 1)
+    assert parse_attendance_day("Total") is None
+
+@pytest.mark.django_db
+def test_attendance_follows_manual_create_and_edits(api_client, admin_user):
+    api_client.force_authenticate(user=admin_user)
+    dtr_file = create_manual_dtr(api_client, [
+        manual_row("00123", {"2025-09-01": 8, "2025-09-02": "A", "2025-09-03": None}),
+    ])
+    entry = dtr_file.entries.get()
+    assert facts(entry) == {("2025-09-01", Decimal("8.00"), ""), ("2025-09-02", None, "A")}
+
+    api_client.patch(
+        f"/api/files/dtr/files/{dtr_file.id}/patch-cells/",
+        {"entries": [{"id": entry.id, "cells": {"2025-09-02": 10, "2025-09-03": "RD"}}]},
+        format="json",
+    )
+    assert facts(entry) == {
+        ("2025-09-01", Decimal("8.00"), ""),
+        ("2025-09-02", Decimal("10.00"), ""),
+        ("2025-09-03", None, "RD"),
+    }
+
+    api_client.post(
+        f"/api/files/dtr/files/{dtr_file.id}/update-rows/",
+        {"rows": [{"id": entry.id, "employee_no": "00456"}]},
+        format="json",
+    )
+    assert set(DTRAttendance.objects.filter(entry=entry).values_list("employee_no_int", flat=True)) == {456}
+
+@pytest.mark.django_db
+def test_attendance_summary_aggregates_verified_dtrs(api_client, admin_user, django_assert_max_num_queries):
+    api_client.force_authenticate(user=admin_user)
+    first = create_manual_dtr(api_client, [
+        manual_row("00123", {"2025-09-01": 8, "2025-09-02": 10, "2025-09-03": "A"}),
+        manual_row("00200", {"2025-09-01": 9.5}),
+    ])
+    second = create_manual_dtr(api_client, [
+        manual_row("123", {"2025-09-16": 12, "2025-09-17": "absent"}),
+    ], start="2025-09-16", end="2025-09-30")
+    pending = create_manual_dtr(api_client, [manual_row("00123", {"2025-10-01": 8})], start="2025-10-01", end="2025-10-15")
+    DTRFile.objects.filter(id__in=[first.id, second.id]).update(status="verified")
+
+    with django_assert_max_num_queries(2):
+        response = api_client.get("/api/files/dtr/entries/attendance-summary/")
+
+    assert response.status_code == 200
+    assert response.data == [
+        {
+            "employee_no_int": 123,
+            "days_worked": 3,
+            "absences": 2,
+            "total_hours": "30.00",
+            "overtime_hours": "6.00",
+            "first_day": date(2025, 9, 1),
+            "last_day": date(2025, 9, 17),
+        },
+        {
+            "employee_no_int": 200,
+            "days_worked": 1,
+            "absences": 0,
+            "total_hours": "9.50",
+            "overtime_hours": "1.50",
+            "first_day": date(2025, 9, 1),
+            "last_day": date(2025, 9, 1),
+        },
+    ]
+    assert DTRAttendance.objects.filter(entry__dtr_file=pending).count() == 1
+
+    response = api_client.get(
+        "/api/files/dtr/entries/attendance-summary/",
+        {"employee_code": "PM-123", "start_date": "2025-09-16"},
+    )
+    assert [(row["employee_no_int"], row["total_hours"]) for row in response.data] == [(123, "12.00")]
+
+@pytest.mark.django_db
+def test_rebuild_attendance_command(admin_user):
+    dtr_file = DTRFile.objects.create(uploaded_by=admin_user, start_date=date(2025, 9, 1), end_date=date(2025, 9, 15))
+    DTREntry.objects.bulk_create([
+        DTREntry(dtr_file=dtr_file, full_name="Bulk", employee_no="7", employee_no_int=7,
+                 daily_data={"2025-09-01": 8, "2025-09-02": "OB"}),
+    ])
+    assert not DTRAttendance.objects.exists()
+
+    call_command("rebuild_attendance")
+
+    assert DTRAttendance.objects.filter(employee_no_int=7).count() == 2
+
+@pytest.mark.django_db
+def test_migration_backfills_existing_entries(admin_user):
+    dtr_file = DTRFile.objects.create(uploaded_by=admin_user, start_date=date(2025, 9, 1), end_date=date(2025, 9, 15))
+    DTREntry.objects.bulk_create([
+        DTREntry(dtr_file=dtr_file, full_name="Old", employee_no="8", employee_no_int=8,
+                 daily_data={"2025-09-01": 8, "2025-09-01 00:00:00": 9, "2025-09-02": "A", "2025-09-03": None}),
+    ])
+
+    migration = importlib.import_module("files.migrations.0048_dtrattendance")
+    migration.backfill_attendance(apps, None)
+
+    assert facts(DTREntry.objects.get()) == {("2025-09-01", Decimal("9.00"), ""), ("2025-09-02", None, "A")}
@@ -0,0 +1,108 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from files.models import DTRFile, DTREntry, normalize_employee_no
+
+User = get_user_model()
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+@pytest.fixture
+def admin_user(db):
+    return User.objects.create_superuser(
+        username="admin", email="admin@test.com", password="admin123", first_name="Ana", last_name="Reyes"
+    )
+
+def make_dtr(user, start, end, status="verified"):
+    return DTRFile.objects.create(
+        file=ContentFile(b"dummy content", "dtr.xlsx"),
+        uploaded_by=user,
+        start_date=start,
+        end_date=end,
+        status=status,
+    )
+
+def make_entry(dtr_file, employee_no, **totals):
+    return DTREntry.objects.create(
+        dtr_file=dtr_file,
+        full_name="Juan Dela Cruz",
+        employee_no=employee_no,
+        daily_data={"2025-09-01": 8},
+        **totals,
+    )
+
+@pytest.fixture
+def history(admin_user):
+    first = make_dtr(admin_user, date(2025, 9, 1), date(2025, 9, 15))
+    second = make_dtr(admin_user, date(2025, 9, 16), date(2025, 9, 30))
+    pending = make_dtr(admin_user, date(2025, 10, 1), date(2025, 10, 15), status="pending")
+
+    make_entry(first, "00123", total_days=Decimal("10"), total_hours=Decimal("80.5"))
+    make_entry(first, "PM-123", total_days=Decimal("1"), total_hours=Decimal("8"), undertime_minutes=15)
+    make_entry(second, "123", total_days=Decimal("12"), total_hours=Decimal("96"))
+    make_entry(second, "00999", total_days=Decimal("5"))
+    make_entry(pending, "00123", total_days=Decimal("7"))
+    return first, second
+
+def test_normalize_employee_no():
+    assert normalize_employee_no("PM-00123") == 123
+    assert normalize_employee_no(123) == 123
+    assert normalize_employee_no("N/A") is None
+    assert normalize_employee_no(None) is None
+    assert normalize_employee_no("9" * 19) is None
+
+@pytest.mark.django_db
+def test_save_keeps_employee_no_int_in_sync(admin_user):
+    entry = make_entry(make_dtr(admin_user, date(2025, 9, 1), date(2025, 9, 15)), "00042")
+    assert entry.employee_no_int == 42
+
+    entry.employee_no = "00043"
+    entry.save(update_fields=["employee_no"])
+    entry.refresh_from_db()
+    assert entry.employee_no_int == 43
+
+@pytest.mark.django_db
+def test_by_employee_groups_verified_periods(api_client, admin_user, history, django_assert_max_num_queries):
+    api_client.force_authenticate(user=admin_user)
+
+    with django_assert_max_num_queries(2):
+        response = api_client.get("/api/files/dtr/entries/employee/", {"employee_code": "00123"})
+
+    assert response.status_code == 200
+    assert [(g["start_date"], g["end_date"]) for g in response.data] == [
+        (date(2025, 9, 1), date(2025, 9, 15)),
+        (date(2025, 9, 16), date(2025, 9, 30)),
+    ]
+    assert response.data[0]["project"] == "Ana Reyes"
+    assert [row["employee_no"] for row in response.data[0]["rows"]] == ["00123", "PM-123"]
+    assert response.data[0]["rows"][0]["total_hours"] == "80.50"
+    assert response.data[0]["rows"][0]["project"] == "Ana Reyes"
+
+@pytest.mark.django_db
+def test_employee_history_aggregates_in_sql(api_client, admin_user, history, django_assert_max_num_queries):
+    api_client.force_authenticate(user=admin_user)
+    first, second = history
+
+    with django_assert_max_num_queries(2):
+        response = api_client.get("/api/files/dtr/entries/employee/history/", {"employee_code": "123"})
+
+    assert response.status_code == 200
+    assert [period["dtr_file_id"] for period in response.data] == [first.id, second.id]
+    assert response.data[0]["entries"] == 2
+    assert response.data[0]["total_days"] == "11.00"
+    assert response.data[0]["total_hours"] == "88.50"
+    assert response.data[0]["undertime_minutes"] == 15
+    assert response.data[1]["total_hours"] == "96.00"
+
+@pytest.mark.django_db
+def test_by_employee_rejects_codes_without_digits(api_client, admin_user):
+    api_client.force_authenticate(user=admin_user)
+
+    response = api_client.get("/api/files/dtr/entries/employee/", {"employee_code": "abc"})
+
+    assert response.status_code == 400
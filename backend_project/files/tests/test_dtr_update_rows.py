@@ -0,0 +1,169 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from files.models import DTRFile, DTREntry
+
+User = get_user_model()
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+@pytest.fixture
+def admin_user(db):
+    return User.objects.create_superuser(username="admin", email="admin@test.com", password="admin123")
+
+@pytest.fixture
+def dtr_file(admin_user):
+    return DTRFile.objects.create(
+        file=ContentFile(b"dummy content", "dtr.xlsx"),
+        uploaded_by=admin_user,
+        start_date=date(2025, 9, 1),
+        end_date=date(2025, 9, 15),
+    )
+
+def make_entries(dtr_file, count):
+    return DTREntry.objects.bulk_create([
+        DTREntry(
+            dtr_file=dtr_file,
+            full_name=f"Employee {i}",
+            employee_no=f"{i:05d}",
+            daily_data={"2025-09-01": 8},
+            total_hours=Decimal("80"),
+        )
+        for i in range(count)
+    ])
+
+@pytest.mark.django_db
+def test_update_rows_applies_only_changed_fields(api_client, admin_user, dtr_file):
+    api_client.force_authenticate(user=admin_user)
+    first, second, third = make_entries(dtr_file, 3)
+    other_file = DTRFile.objects.create(uploaded_by=admin_user, start_date=date(2025, 9, 1), end_date=date(2025, 9, 15))
+    foreign = make_entries(other_file, 1)[0]
+
+    payload = {"rows": [
+        {"id": first.id, "total_hours": "88.5", "employee_no": "PM-777"},
+        {"id": second.id, "total_hours": "80.00", "full_name": "Employee 1"},
+        {"id": third.id, "total_days": "abc"},
+        {"id": foreign.id, "full_name": "Hijack"},
+        {"full_name": "New Hire", "employee_no": "00900", "daily_data": {"2025-09-02": 4}},
+    ]}
+    response = api_client.post(f"/api/files/dtr/files/{dtr_file.id}/update-rows/", payload, format="json")
+
+    assert response.status_code == 200
+    assert response.data["message"] == "Some DTR entries were not updated; see conflicts."
+    assert (response.data["created"], response.data["updated"], response.data["unchanged"]) == (1, 1, 1)
+    assert [(c["index"], c["error"]) for c in response.data["conflicts"]] == [
+        (2, "invalid value"),
+        (3, "not found"),
+    ]
+    assert "total_days" in response.data["conflicts"][0]["fields"]
+
+    first.refresh_from_db()
+    assert first.total_hours == Decimal("88.50")
+    assert first.employee_no_int == 777
+    assert DTREntry.objects.get(id=foreign.id).full_name == "Employee 0"
+
+    new_hire = dtr_file.entries.get(full_name="New Hire")
+    assert new_hire.employee_no_int == 900
+    assert new_hire.daily_data == {"2025-09-02": 4}
+
+@pytest.mark.django_db
+def test_update_rows_query_count_is_flat(api_client, admin_user, dtr_file, django_assert_max_num_queries):
+    api_client.force_authenticate(user=admin_user)
+    entries = make_entries(dtr_file, 300)
+
+    rows = [{"id": e.id, "total_hours": "90", "regular_ot": "1.5"} for e in entries[:150]]
+    rows += [{"id": e.id, "full_name": e.full_name.upper()} for e in entries[150:]]
+
+    # auth + get_object + savepoint/lock + two bulk_update groups
+    with django_assert_max_num_queries(8):
+        response = api_client.post(f"/api/files/dtr/files/{dtr_file.id}/update-rows/", {"rows": rows}, format="json")
+
+    assert response.status_code == 200
+    assert response.data["updated"] == 300
+    assert dtr_file.entries.filter(total_hours=Decimal("90")).count() == 150
+    assert dtr_file.entries.filter(full_name="EMPLOYEE 299").exists()
+
+@pytest.mark.django_db
+def test_update_rows_honors_version(api_client, admin_user, dtr_file):
+    api_client.force_authenticate(user=admin_user)
+    entry = make_entries(dtr_file, 1)[0]
+    url = f"/api/files/dtr/files/{dtr_file.id}/update-rows/"
+
+    response = api_client.post(url, {"rows": [{"id": entry.id, "version": 1, "total_days": "10"}]}, format="json")
+    assert response.data["versions"] == {entry.id: 2}
+
+    assert response.data["message"] == "DTR entries updated successfully!"
+
+    stale = api_client.post(url, {"rows": [{"id": entry.id, "version": 1, "total_days": "11"}]}, format="json")
+    assert stale.status_code == 409
+    assert stale.data["message"] == "No DTR entries were updated."
+    assert stale.data["conflicts"] == [{"index": 0, "id": entry.id, "error": "version mismatch", "version": 2}]
+    entry.refresh_from_db()
+    assert entry.total_days == Decimal("10.00")
+
+@pytest.mark.django_db
+def test_patch_cells_merges_days_and_detects_conflicts(api_client, admin_user, dtr_file, django_assert_max_num_queries):
+    api_client.force_authenticate(user=admin_user)
+    first, second = make_entries(dtr_file, 2)
+    url = f"/api/files/dtr/files/{dtr_file.id}/patch-cells/"
+
+    payload = {"entries": [
+        {"id": first.id, "version": 1, "cells": {"2025-09-02": "A", "2025-09-03": 4}},
+        {"id": second.id, "cells": {"2025-09-01": 6}},
+        {"id": 999999, "cells": {"2025-09-01": 6}},
+    ]}
+    # get_object + one UPDATE for all patches + attendance resync + conflicting rows
+    with django_assert_max_num_queries(12):
+        response = api_client.patch(url, payload, format="json")
+
+    assert response.status_code == 200
+    assert response.data["message"] == "Some DTR cells were not updated; see conflicts."
+    assert response.data["updated"] == [{"id": first.id, "version": 2}, {"id": second.id, "version": 2}]
+    assert response.data["conflicts"] == [{"index": 2, "id": 999999, "error": "not found"}]
+
+    first.refresh_from_db()
+    assert first.daily_data == {"2025-09-01": 8, "2025-09-02": "A", "2025-09-03": 4}
+
+    stale = api_client.patch(url, {"entries": [{"id": first.id, "version": 1, "cells": {"2025-09-01": 0}}]}, format="json")
+    assert stale.status_code == 409
+    assert stale.data["message"] == "No DTR cells were updated."
+    conflict = stale.data["conflicts"][0]
+    assert (conflict["error"], conflict["version"]) == ("version mismatch", 2)
+    assert conflict["daily_data"]["2025-09-01"] == 8
+    assert stale.data["updated"] == []
+
+@pytest.mark.django_db
+def test_patch_cells_query_count_is_flat(api_client, admin_user, dtr_file):
+    api_client.force_authenticate(user=admin_user)
+    entries = make_entries(dtr_file, 20)
+    url = f"/api/files/dtr/files/{dtr_file.id}/patch-cells/"
+
+    def patch(batch):
+        payload = {"entries": [{"id": e.id, "cells": {"2025-09-04": 2}} for e in batch]}
+        with CaptureQueriesContext(connection) as captured:
+            assert api_client.patch(url, payload, format="json").status_code == 200
+        return len(captured)
+
+    assert patch(entries[:1]) == patch(entries)
+
+@pytest.mark.django_db
+def test_patch_cells_merges_repeated_ids_in_order(api_client, admin_user, dtr_file):
+    api_client.force_authenticate(user=admin_user)
+    entry, = make_entries(dtr_file, 1)
+    url = f"/api/files/dtr/files/{dtr_file.id}/patch-cells/"
+
+    response = api_client.patch(url, {"entries": [
+        {"id": entry.id, "version": 1, "cells": {"2025-09-02": 1, "2025-09-03": 1}},
+        {"id": entry.id, "cells": {"2025-09-03": 5}},
+    ]}, format="json")
+
+    assert response.data["updated"] == [{"id": entry.id, "version": 2}]
+    entry.refresh_from_db()
+    assert (entry.daily_data["2025-09-02"], entry.daily_data["2025-09-03"]) == (1, 5)
@@ -0,0 +1,68 @@
+import pytest
+from decimal import Decimal
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from files.models import EmployeeDirectory
+from files.serializers import (
+    EmployeeDirectorySerializer,
+    EMPLOYEE_DIRECTORY_FIELDS,
+    serialize_employee_directory_rows,
+)
+
+User = get_user_model()
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+@pytest.fixture
+def admin_user(db):
+    return User.objects.create_superuser(username="admin", email="admin@test.com", password="admin123")
+
+@pytest.fixture
+def directory(db):
+    return [
+        EmployeeDirectory.objects.create(
+            employee_code=f"{i:05d}",
+            employee_name=f"Employee {i}",
+            project="LRT" if i % 2 else "MRT",
+            total_hours=Decimal("80.5") + i,
+            ot_regular=Decimal("1.25"),
+        )
+        for i in range(1, 26)
+    ]
+
+@pytest.mark.django_db
+def test_fast_path_matches_model_serializer(directory):
+    expected = EmployeeDirectorySerializer(EmployeeDirectory.objects.order_by("id"), many=True).data
+    rows = EmployeeDirectory.objects.order_by("id").values_list(*EMPLOYEE_DIRECTORY_FIELDS)
+
+    assert serialize_employee_directory_rows(rows) == [dict(row) for row in expected]
+
+@pytest.mark.django_db
+def test_list_employees_paginated_search(api_client, admin_user, directory):
+    api_client.force_authenticate(user=admin_user)
+
+    response = api_client.get("/api/files/employees/", {"search": "MRT", "page": 2, "page_size": 5})
+
+    assert response.status_code == 200
+    assert response.data["count"] == 12
+    assert len(response.data["results"]) == 5
+    assert all(row["project"] == "MRT" for row in response.data["results"])
+
+@pytest.mark.django_db
+def test_list_employees_sparse_fields(api_client, admin_user, directory):
+    api_client.force_authenticate(user=admin_user)
+
+    response = api_client.get("/api/files/employees/", {"fields": "employee_code,total_hours", "search": "00003"})
+
+    assert response.status_code == 200
+    assert response.data == [{"employee_code": "00003", "total_hours": "83.50"}]
+
+@pytest.mark.django_db
+def test_list_employees_rejects_unknown_fields(api_client, admin_user):
+    api_client.force_authenticate(user=admin_user)
+
+    response = api_client.get("/api/files/employees/", {"fields": "employee_code,password"})
+
+    assert response.status_code == 400
@@ -0,0 +1,111 @@
+import pytest
+from decimal import Decimal
+from io import BytesIO
+import openpyxl
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from files.models import EmployeeDirectory, Employee
+
+User = get_user_model()
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+@pytest.fixture
+def admin_user(db):
+    return User.objects.create_superuser(username="admin", email="admin@test.com", password="admin123")
+
+def make_payroll_excel(rows):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Employee Code", "EmployeeName", "Total Hours", "OTRegular", "PROJECT"])
+    for row in rows:
+        ws.append(row)
+    buffer = BytesIO()
+    wb.save(buffer)
+    return SimpleUploadedFile(
+        "payroll.xlsx",
+        buffer.getvalue(),
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+
+@pytest.mark.django_db
+def test_upload_employee_excel_bulk_upsert(api_client, admin_user):
+    api_client.force_authenticate(user=admin_user)
+    EmployeeDirectory.objects.create(employee_code="00001", employee_name="Old Name", date_covered="Sep 01")
+
+    upload = make_payroll_excel([
+        ["1", "Alice", "88.5", "4", "LRT"],
+        ["2", "Bob", "", "abc", "MRT"],
+        ["2", "Bob Updated", "40", None, "MRT"],
+        [None, "No Code", "8", None, None],
+    ])
+    response = api_client.post("/api/files/upload-employee-excel/", {"file": upload}, format="multipart")
+
+    assert response.status_code == 200
+    assert response.data["detail"] == "2 new employees added, 2 employees updated."
+
+    alice = EmployeeDirectory.objects.get(employee_code="00001")
+    assert alice.employee_name == "Alice"
+    assert alice.total_hours == Decimal("88.50")
+    assert alice.ot_regular == Decimal("4.00")
+    assert alice.project == "LRT"
+    assert alice.date_covered == "Sep 01"  # untouched by the import
+
+    bob = EmployeeDirectory.objects.get(employee_code="00002")
+    assert bob.employee_name == "Bob Updated"
+    assert bob.total_hours == Decimal("40.00")
+    assert bob.ot_regular is None
+
+    assert EmployeeDirectory.objects.get(employee_code="").employee_name == "No Code"
+
+@pytest.mark.django_db
+def test_upload_employee_excel_query_count(api_client, admin_user, django_assert_max_num_queries):
+    api_client.force_authenticate(user=admin_user)
+    upload = make_payroll_excel([[str(i), f"Employee {i}", "8", "1", "LRT"] for i in range(1, 301)])
+
+    with django_assert_max_num_queries(10):
+        response = api_client.post("/api/files/upload-employee-excel/", {"file": upload}, format="multipart")
+
+    assert response.status_code == 200
+    assert EmployeeDirectory.objects.count() == 300
+
+@pytest.mark.django_db
+def test_upload_basic_employees_bulk(api_client, admin_user, django_assert_max_num_queries):
+    api_client.force_authenticate(user=admin_user)
+    Employee.objects.create(employee_no="100", employee_name="Existing")
+
+    payload = {"employees": [
+        {"employee_no": "100", "employee_name": "Existing Renamed"},
+        {"employee_no": 101, "employee_name": "  Carla  "},
+        {"employee_no": "101", "employee_name": "Carla Cruz"},
+        {"employee_no": "", "employee_name": "Blank Number"},
+        {"employee_no": "102"},
+        {"employee_no": "x" * 21, "employee_name": "Too Long"},
+        "not-a-dict",
+    ]}
+    with django_assert_max_num_queries(6):
+        response = api_client.post("/api/files/upload-basic-employees/", payload, format="json")
+
+    assert response.status_code == 200
+    assert response.data["detail"] == "1 created, 2 updated, 4 skipped"
+    assert Employee.objects.get(employee_no="100").employee_name == "Existing Renamed"
+    assert Employee.objects.get(employee_no="101").employee_name == "Carla Cruz"
+    assert Employee.objects.count() == 2
+
+@pytest.mark.django_db
+def test_upload_basic_employees_in_batches(api_client, admin_user, monkeypatch):
+    monkeypatch.setattr("files.bulk.BULK_BATCH_SIZE", 2)
+    api_client.force_authenticate(user=admin_user)
+
+    payload = {"employees": [{"employee_no": str(n), "employee_name": f"Employee {n}"} for n in range(5)]}
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.post("/api/files/upload-basic-employees/", payload, format="json")
+
+    assert response.data["detail"] == "5 created, 0 updated, 0 skipped"
+    assert sum(q["sql"].startswith('INSERT INTO "files_employee"') for q in queries) == 3
+    assert Employee.objects.count() == 5
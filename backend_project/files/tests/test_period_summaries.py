@@ -0,0 +1,135 @@
+import importlib
+import pytest
+from datetime import date
+from decimal import Decimal
+from rest_framework.test import APIClient
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from files.models import DTRFile, DTREntry, EmployeeDirectory, EmployeePeriodSummary
+
+User = get_user_model()
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+@pytest.fixture
+def admin_user(db):
+    return User.objects.create_superuser(
+        username="admin", email="admin@test.com", password="admin123", first_name="LRT", last_name="Line 1"
+    )
+
+def make_dtr(user, start, end, entries):
+    dtr_file = DTRFile.objects.create(uploaded_by=user, start_date=start, end_date=end)
+    for employee_no, hours, daily_data in entries:
+        DTREntry.objects.create(
+            dtr_file=dtr_file,
+            full_name=f"Employee {employee_no}",
+            employee_no=employee_no,
+            daily_data=daily_data,
+            total_days=Decimal("10"),
+            total_hours=Decimal(hours),
+            regular_ot=Decimal("2"),
+            night_diff=Decimal("1.5"),
+            undertime_minutes=30,
+        )
+    return dtr_file
+
+def verify(api_client, dtr_file, new_status="verified"):
+    response = api_client.patch(f"/api/files/dtr/files/{dtr_file.id}/status/", {"status": new_status}, format="json")
+    assert response.status_code == 200
+
+@pytest.mark.django_db
+def test_summaries_follow_verification_and_edits(api_client, admin_user):
+    api_client.force_authenticate(user=admin_user)
+    dtr_file = make_dtr(admin_user, date(2025, 9, 1), date(2025, 9, 15), [
+        ("123", "80", {"2025-09-01": 8, "2025-09-02": "A"}),
+        ("00123", "8", {"2025-09-03": "A"}),
+        ("456", "40", {}),
+    ])
+    call_command("rebuild_attendance")
+    assert not EmployeePeriodSummary.objects.exists()
+
+    verify(api_client, dtr_file)
+
+    summary = EmployeePeriodSummary.objects.get(dtr_file=dtr_file, employee_no_int=123)
+    assert summary.employee_code == "00123"
+    assert summary.project == "LRT Line 1"
+    assert (summary.period_start, summary.period_end) == (date(2025, 9, 1), date(2025, 9, 15))
+    assert summary.entries == 2
+    assert summary.total_hours == Decimal("88.00")
+    assert summary.regular_ot == Decimal("4.00")
+    assert summary.undertime_minutes == 60
+    assert summary.absences == 2
+    assert EmployeePeriodSummary.objects.filter(dtr_file=dtr_file).count() == 2
+
+    entry = dtr_file.entries.get(employee_no="456")
+    api_client.post(
+        f"/api/files/dtr/files/{dtr_file.id}/update-rows/",
+        {"rows": [{"id": entry.id, "total_hours": "44"}]},
+        format="json",
+    )
+    assert EmployeePeriodSummary.objects.get(employee_no_int=456).total_hours == Decimal("44.00")
+
+    verify(api_client, dtr_file, "rejected")
+    assert not EmployeePeriodSummary.objects.exists()
+
+@pytest.mark.django_db
+def test_sync_all_files_reads_period_summaries(api_client, admin_user, django_assert_max_num_queries):
+    api_client.force_authenticate(user=admin_user)
+    first = make_dtr(admin_user, date(2025, 9, 1), date(2025, 9, 15), [("123", "80", {}), ("456", "40", {})])
+    second = make_dtr(admin_user, date(2025, 9, 16), date(2025, 9, 30), [("123", "72", {})])
+    make_dtr(admin_user, date(2025, 10, 1), date(2025, 10, 15), [("123", "99", {})])
+    DTRFile.objects.filter(id__in=[first.id, second.id]).update(status="verified")
+    call_command("rebuild_period_summaries")
+
+    EmployeeDirectory.objects.create(employee_code="00123", employee_name="Old", absences=Decimal("3"))
+
+    with django_assert_max_num_queries(8):
+        response = api_client.post("/api/files/dtr/files/sync-all/", {}, format="json")
+
+    assert response.status_code == 200
+    assert response.data["detail"] == "Synced 1 new, 1 updated (verified only)."
+
+    synced = EmployeeDirectory.objects.get(employee_code="00123")
+    assert synced.employee_name == "Employee 123"
+    assert synced.project == "LRT Line 1"
+    assert synced.total_hours == Decimal("152.00")
+    assert synced.undertime == Decimal("60.00")
+    assert synced.nd_reg_hrs == Decimal("3.00")
+    assert synced.date_covered == "Sep 01, 2025 → Sep 30, 2025"
+    assert synced.absences == Decimal("3.00")  # not part of the sync, left untouched
+
+    response = api_client.post("/api/files/dtr/files/sync-all/", {"start_date": "2025-09-16"}, format="json")
+    assert response.data["detail"] == "Synced 0 new, 1 updated (verified only)."
+    assert EmployeeDirectory.objects.get(employee_code="00123").total_hours == Decimal("72.00")
+
+@pytest.mark.django_db
+def test_period_summaries_endpoint(api_client, admin_user):
+    api_client.force_authenticate(user=admin_user)
+    dtr_file = make_dtr(admin_user, date(2025, 9, 1), date(2025, 9, 15), [("123", "80", {}), ("456", "40", {})])
+    verify(api_client, dtr_file)
+
+    response = api_client.get("/api/files/dtr/files/period-summaries/", {"employee_code": "PM-456"})
+
+    assert response.status_code == 200
+    assert response.data["count"] == 1
+    row = response.data["results"][0]
+    assert (row["employee_code"], row["total_hours"], row["dtr_file"]) == ("00456", "40.00", dtr_file.id)
+
+@pytest.mark.django_db
+def test_migration_backfills_verified_files(admin_user):
+    verified = make_dtr(admin_user, date(2025, 9, 1), date(2025, 9, 15), [("123", "80", {"2025-09-02": "A"})])
+    pending = make_dtr(admin_user, date(2025, 9, 16), date(2025, 9, 30), [("123", "72", {})])
+    DTRFile.objects.filter(id=verified.id).update(status="verified")
+    call_command("rebuild_attendance")
+    assert not EmployeePeriodSummary.objects.exists()
+
+    migration = importlib.import_module("files.migrations.0049_employeeperiodsummary")
+    migration.backfill_period_summaries(apps, None)
+
+    summary = EmployeePeriodSummary.objects.get()
+    assert (summary.dtr_file_id, summary.total_hours, summary.absences) == (verified.id, Decimal("80.00"), 1)
+    assert summary.project == "LRT Line 1"
+    assert not EmployeePeriodSummary.objects.filter(dtr_file=pending).exists()
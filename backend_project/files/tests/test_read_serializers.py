@@ -0,0 +1,120 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from files.models import DTRFile, DTREntry, ParsedDTR
+from files.serializers import (
+    DTREntrySerializer,
+    ParsedDTRSerializer,
+    serialize_dtr_entry_rows,
+    serialize_parsed_dtr_rows,
+    uploader_display_name,
+)
+
+User = get_user_model()
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+@pytest.fixture
+def admin_user(db):
+    return User.objects.create_superuser(
+        username="admin", email="admin@test.com", password="admin123", first_name="Ana", last_name="Reyes"
+    )
+
+@pytest.fixture
+def dtr_file(admin_user):
+    return DTRFile.objects.create(
+        file=ContentFile(b"dummy content", "dtr.xlsx"),
+        uploaded_by=admin_user,
+        start_date=date(2025, 9, 1),
+        end_date=date(2025, 9, 15),
+    )
+
+def make_entries(dtr_file, count):
+    DTREntry.objects.bulk_create([
+        DTREntry(
+            dtr_file=dtr_file,
+            sheet_name="Sheet1",
+            full_name=f"Employee {i}",
+            employee_no=f"{i:05d}",
+            position="Guard",
+            shift="Day",
+            time="08:00-17:00",
+            daily_data={"2025-09-01": 8, "2025-09-02": "A"},
+            total_days=Decimal("12"),
+            total_hours=Decimal("96.5"),
+            regular_ot=Decimal("1.25"),
+        )
+        for i in range(count)
+    ])
+
+def make_parsed_dtrs(user, count):
+    ParsedDTR.objects.bulk_create([
+        ParsedDTR(
+            uploaded_by=user,
+            employee_name=f"Employee {i}",
+            employee_no=f"{i:05d}",
+            period_from=date(2025, 9, 1),
+            period_to=date(2025, 9, 15),
+            sheet_name=f"Sheet{i}",
+            days=[{"day": 1, "hours": 8}],
+            totals={"hours": 8},
+        )
+        for i in range(count)
+    ])
+
+@pytest.mark.django_db
+def test_dtr_entry_rows_match_model_serializer(dtr_file):
+    make_entries(dtr_file, 3)
+    entries = DTREntry.objects.order_by("id")
+
+    expected = DTREntrySerializer(entries, many=True).data
+    fast = serialize_dtr_entry_rows(entries.values(*serialize_dtr_entry_rows.values_fields))
+
+    assert fast == [dict(row) for row in expected]
+
+@pytest.mark.django_db
+def test_parsed_dtr_rows_match_model_serializer(admin_user):
+    make_parsed_dtrs(admin_user, 3)
+    queryset = ParsedDTR.objects.order_by("id")
+
+    expected = ParsedDTRSerializer(queryset, many=True).data
+    fast = serialize_parsed_dtr_rows(
+        queryset.annotate(uploaded_by_name=uploader_display_name()).values(*serialize_parsed_dtr_rows.values_fields)
+    )
+
+    assert fast == [dict(row) for row in expected]
+    assert fast[0]["uploaded_by_name"] == "Ana Reyes"
+
+@pytest.mark.django_db
+def test_dtr_content_and_lists_use_fixed_queries(api_client, admin_user, dtr_file, django_assert_max_num_queries):
+    api_client.force_authenticate(user=admin_user)
+    make_entries(dtr_file, 50)
+    make_parsed_dtrs(admin_user, 20)
+
+    with django_assert_max_num_queries(3):
+        response = api_client.get(f"/api/files/dtr/files/{dtr_file.id}/content/")
+    assert len(response.data["rows"]) == 50
+
+    with django_assert_max_num_queries(3):
+        response = api_client.get("/api/files/dtr/files/")
+    assert response.data["results"][0]["uploaded_by"]["username"] == "admin"
+
+    with django_assert_max_num_queries(3):
+        response = api_client.get("/api/files/parsed-dtrs/")
+    assert response.data["count"] == 20
+
+@pytest.mark.django_db
+def test_serializer_benchmark_command():
+    """Timing is not asserted here; run ``manage.py serializer_benchmark`` for the 5x check."""
+    out = StringIO()
+    call_command("serializer_benchmark", rows=20, repeat=1, min_speedup=0, stdout=out)
+
+    assert "DTREntry:" in out.getvalue() and "ParsedDTR:" in out.getvalue()
+    assert not User.objects.filter(username="serializer_benchmark").exists()  # rolled back
@@ -23,10 +23,6 @@ def get_client_ip(request) -> Optional[str]:
 
 
 def log_action(user, action: str, status: str = "success", ip: Optional[str] = None) -> None:
-    if getattr(user, "is_authenticated", False):
-        print(f"Logging action for {user.username}")
-    else:
-        print("Logging action for anonymous user")
     AuditLog.objects.create(
         user=user if getattr(user, "is_authenticated", False) else None,
         action=action,
@@ -50,8 +46,7 @@ def send_rejection_sms(phone_number: str, file_name: str, use_mock: bool = True)
     message = f"Your uploaded file '{file_name}' has been rejected. Please check your account for details."
 
     if use_mock:
-        logger.info(f"[MOCK SMS] To: {phone_number} | Message: {message}")
-        print(f"[MOCK SMS] To: {phone_number} | Message: {message}")
+        logger.info("[MOCK SMS] To: %s | Message: %s", phone_number, message)
         return True
 
     # Twilio credentials from environment
@@ -83,7 +78,7 @@ def extract_pdf_pages(file_path):
 
     try:
         with pdfplumber.open(file_path) as pdf:
-            print(f"📘 Extracting DTR data from {len(pdf.pages)} pages...")
+            logger.debug("Extracting DTR data from %d pages of %s", len(pdf.pages), file_path)
 
             for i, page in enumerate(pdf.pages, start=1):
                 page_data = {"header_text": [], "tables": []}
@@ -134,10 +129,10 @@ def extract_pdf_pages(file_path):
                             page_data["tables"].append(t)
 
                 pages[str(i)] = page_data
-                print(f"✅ Page {i}: {len(page_data['header_text'])} headers, {len(page_data['tables'])} tables.")
+                logger.debug("Page %d: %d headers, %d tables", i, len(page_data["header_text"]), len(page_data["tables"]))
 
     except Exception as e:
-        print("❌ PDF extraction failed:", e)
+        logger.warning("PDF extraction failed for %s: %s", file_path, e)
         return None
 
     return pages
@@ -1,20 +1,29 @@
 #files/views.py
 from rest_framework import viewsets, permissions, status
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from .models import File, AuditLog, SystemSettings, EmployeeDirectory, DTRFile, DTREntry, Employee, PDFFile, ParsedDTR
-from .serializers import FileSerializer, FileStatusSerializer, AuditLogSerializer, SystemSettingsSerializer, EmployeeDirectorySerializer, DTREntrySerializer, DTRFileSerializer, EmployeeSerializer, PDFFileSerializer, ParsedDTRSerializer
+from .models import File, AuditLog, SystemSettings, EmployeeDirectory, DTRFile, DTREntry, DTRAttendance, EmployeePeriodSummary, Employee, PDFFile, ParsedDTR, normalize_employee_no
+from .serializers import FileSerializer, FileStatusSerializer, AuditLogSerializer, SystemSettingsSerializer, EmployeeDirectorySerializer, DTREntrySerializer, DTRFileSerializer, EmployeeSerializer, EmployeeBulkSerializer, PDFFileSerializer, ParsedDTRSerializer
+from .serializers import EMPLOYEE_DIRECTORY_FIELDS, EMPLOYEE_DIRECTORY_NUMERIC_FIELDS, serialize_employee_directory_rows
+from .serializers import serialize_dtr_entry_rows, serialize_parsed_dtr_rows, serialize_period_summary_rows, uploader_display_name
 from accounts.permissions import ReadOnlyForViewer, IsOwnerOrAdmin, CanEditStatus, IsAdmin
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
+from rest_framework.pagination import PageNumberPagination
 from django.http import FileResponse, Http404, HttpResponse
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from openpyxl import load_workbook, Workbook
-import io, re, logging, csv, math, traceback, os, numbers
+import io, re, logging, csv, math, os, numbers, time
 from accounts.models import User
 from reportlab.pdfgen import canvas
-from django.db.models import Count, Q, IntegerField
-from django.db.models.functions import TruncDay, TruncWeek, TruncMonth, Cast
+from django.db.models import Count, Q, F, Sum, Min, Max
+from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
 from .utils import log_action, get_client_ip
+from .attendance import sync_attendance, attendance_summary
+from .summaries import refresh_period_summaries
+from .dashboard import get_dashboard_stats
+from backend_project.profiling import profile_stage
+from backend_project.metrics import PARSE_DURATION, DTR_ROWS_INGESTED
+from .bulk import employee_frame_from_excel, bulk_upsert_employee_directory, upsert_employee_directory_records, DIRECTORY_SYNC_FIELDS, bulk_upsert_employees, bulk_update_dtr_entries, patch_dtr_cells, BULK_BATCH_SIZE
 from django.core.exceptions import ValidationError
 import pandas as pd
 from decimal import Decimal, InvalidOperation
@@ -26,6 +35,8 @@ from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.drawing.image import Image
 from openpyxl.utils import get_column_letter
 
+logger = logging.getLogger(__name__)
+
 def log_action(user, action, status="success", ip_address=None):
     AuditLog.objects.create(
         user=user if user.is_authenticated else None,
@@ -50,13 +61,15 @@ class FileViewSet(viewsets.ModelViewSet):
         user = self.request.user
 
         # 🔓 Allow full access for status updates
+        queryset = File.objects.select_related("owner").order_by("-uploaded_at")
+
         if self.action == "update_status" and user.role in ["admin", "viewer"]:
-            return File.objects.all().order_by("-uploaded_at")
+            return queryset
 
         if user.role == "client":
-            return File.objects.filter(owner=user).order_by("-uploaded_at")
+            return queryset.filter(owner=user)
 
-        return File.objects.all().order_by("-uploaded_at")
+        return queryset
 
     def get_permissions(self):
         if self.action == "destroy":
@@ -146,7 +159,6 @@ class FileViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["get"], url_path="content")
     def get_content(self, request, pk=None):
         file_obj = self.get_object()
-        print(f"User: {request.user}, Role: {request.user.role}, File: {file_obj.file.name}")
 
         if request.user.role not in ["admin", "viewer" , "client"]:
             return Response({"detail": "Forbidden"}, status=403)
@@ -300,8 +312,7 @@ class FileViewSet(viewsets.ModelViewSet):
                 return Response({"detail": "Unsupported file type"}, status=400)
 
         except Exception as e:
-            import traceback
-            traceback.print_exc()
+            logger.exception("Failed to read file %s", file_obj.id)
             return Response({"detail": f"Failed to read file: {str(e)}"}, status=400)
 
     @action(detail=True, methods=["patch"], url_path="update-content")
@@ -532,23 +543,14 @@ class FileViewSet(viewsets.ModelViewSet):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def dashboard_stats(request):
-    files_pending = DTRFile.objects.filter(status="pending").count()
-    files_rejected = DTRFile.objects.filter(status="rejected").count()
-    files_approved = DTRFile.objects.filter(status="verified").count()
-    active_users = User.objects.filter(is_active=True).count()
-    
-    return Response({
-        "filesPending": files_pending,
-        "filesApproved": files_approved,
-        "filesRejected": files_rejected,
-        "activeUsers": active_users
-    })
+    # One cached conditional-aggregate query; live updates go out over ws/dashboard/
+    return Response(get_dashboard_stats())
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def export_files_report(request):
     format = request.GET.get("format", "csv")
-    files = File.objects.all().order_by("-uploaded_at")
+    files = File.objects.select_related("owner").order_by("-uploaded_at")
     
     if format == "csv":
         response = HttpResponse(content_type="text/csv")
@@ -577,7 +579,7 @@ def export_files_report(request):
         return Response({"detail": "Unsupported format"}, status=400)
     
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = AuditLog.objects.all().order_by("-timestamp")
+    queryset = AuditLog.objects.select_related("user").order_by("-timestamp")
     serializer_class = AuditLogSerializer
     permission_classes = [IsAdmin]  
 
@@ -616,16 +618,10 @@ def file_stats(request):
 @permission_classes([IsAuthenticated])
 def rejected_files(request):
     user = request.user
-    files = File.objects.filter(owner=user, status="rejected").order_by("-uploaded_at")
+    files = File.objects.filter(owner=user, status="rejected").select_related("owner").order_by("-uploaded_at")
     serializer = FileSerializer(files, many=True)
     return Response(serializer.data)
 
-def clean_value(value):
-    """Convert NaN or missing values to None for JSON storage."""
-    if pd.isna(value) or (isinstance(value, float) and math.isnan(value)):
-        return None
-    return value
-
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
 def upload_employee_excel(request):
@@ -634,84 +630,11 @@ def upload_employee_excel(request):
         return Response({"detail": "No file uploaded."}, status=400)
     
     try:
-        df = pd.read_excel(file, header=0, dtype=str)
-        df.columns = [col.strip() for col in df.columns]  
-        df_cleaned = df.applymap(clean_value)
-
-        added_count = 0
-        updated_count = 0
-
-        def to_float(val):
-            try:
-                return float(val)
-            except (ValueError, TypeError):
-                return None
-
-        for _, row in df_cleaned.iterrows():
-            employee_code_raw = row.get('Employee Code')
-            employee_code = str(employee_code_raw).strip().zfill(5) if employee_code_raw else ""
-
-            data = {
-                'employee_code': employee_code,
-                'employee_name': str(row.get('EmployeeName', '')).strip(),
-                'total_hours': to_float(row.get('Total Hours')),
-                'nd_reg_hrs': to_float(row.get('ND Reg Hrs')),
-                'absences': to_float(row.get('Absences')),
-                'tardiness': to_float(row.get('Tardiness')),
-                'undertime': to_float(row.get('Undertime')),
-                'ot_regular': to_float(row.get('OTRegular')),
-                'nd_ot_reg': to_float(row.get('ND OT Reg')),
-                'ot_restday': to_float(row.get('OT Restday')),
-                'nd_restday': to_float(row.get('ND Restday')),
-                'ot_rest_excess': to_float(row.get('OT RestExcess')),
-                'nd_rest_excess': to_float(row.get('ND Restday Excess')),
-                'ot_special_hday': to_float(row.get('OTSpecialHday')),
-                'nd_special_hday': to_float(row.get('ND SpecialHday')),
-                'ot_shday_excess': to_float(row.get('OT SHdayExcess')),
-                'nd_shday_excess': to_float(row.get('ND SHday Excess')),
-                'ot_legal_holiday': to_float(row.get('OT LegalHoliday')),
-                'special_holiday': to_float(row.get('Special Holiday')),
-                'ot_leghol_excess': to_float(row.get('OTLegHol Excess')),
-                'nd_leghol_excess': to_float(row.get('ND LegHol Excess')),
-                'ot_sh_on_rest': to_float(row.get('OT SHday on Rest')),
-                'nd_sh_on_rest': to_float(row.get('ND SH on Rest')),
-                'ot_sh_on_rest_excess': to_float(row.get('OT SH on Rest Excess')),
-                'nd_sh_on_rest_excess': to_float(row.get('ND SH on Rest Excess')),
-                'leg_h_on_rest_day': to_float(row.get('LegH on Rest Day')),
-                'nd_leg_h_on_restday': to_float(row.get('ND LegH on Restday')),
-                'ot_leg_h_on_rest_excess': to_float(row.get('OT LegH on Rest Excess')),
-                'nd_leg_h_on_rest_excess': to_float(row.get('ND LegH on Rest Excess')),
-                'vacleave_applied': to_float(row.get('VacLeave_Applied')),
-                'sickleave_applied': to_float(row.get('SickLeave_Applied')),
-                'back_pay_vl': to_float(row.get('Back Pay VL')),
-                'back_pay_sl': to_float(row.get('Back Pay SL')),
-                'ot_regular_excess': to_float(row.get('OTRegular Excess')),
-                'nd_ot_reg_excess': to_float(row.get('ND OT Reg Excess')),
-                'legal_holiday': to_float(row.get('Legal Holiday')),
-                'nd_legal_holiday': to_float(row.get('ND Legal Holiday')),
-                'overnight_rate': to_float(row.get('Overnight Rate')),
-                'project': str(row.get('PROJECT', '')).strip(),
-            }
-
-            if employee_code:
-                obj, created = EmployeeDirectory.objects.update_or_create(
-                    employee_code=employee_code,
-                    defaults=data
-                )
-                if created:
-                    added_count += 1
-                else:
-                    updated_count += 1
-            else:
-                obj = EmployeeDirectory.objects.filter(employee_name=data['employee_name'], employee_code="").first()
-                if obj:
-                    for key, value in data.items():
-                        setattr(obj, key, value)
-                    obj.save()
-                    updated_count += 1
-                else:
-                    EmployeeDirectory.objects.create(**data)
-                    added_count += 1
+        with profile_stage("read_excel"):
+            df = pd.read_excel(file, header=0, dtype=str)
+        frame = employee_frame_from_excel(df)
+        with profile_stage("upsert_employees"):
+            added_count, updated_count = bulk_upsert_employee_directory(frame)
 
         return Response({
             "detail": f"{added_count} new employees added, {updated_count} employees updated."
@@ -720,12 +643,54 @@ def upload_employee_excel(request):
     except Exception as e:
         return Response({"detail": str(e)}, status=400)
     
+class EmployeeDirectoryPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def list_employees(request):
+    """
+    List EmployeeDirectory rows.
+
+    Query params (all optional):
+        search     -> matches employee code, name or project
+        project    -> exact project filter
+        fields     -> comma-separated sparse fieldset, e.g. fields=employee_code,employee_name
+        page, page_size -> paginate; without them the full list is returned
+    """
+    params = request.query_params
     employees = EmployeeDirectory.objects.all().order_by("id")
-    serializer = EmployeeDirectorySerializer(employees, many=True)
-    return Response(serializer.data)
+
+    search = params.get("search", "").strip()
+    if search:
+        employees = employees.filter(
+            Q(employee_code__icontains=search)
+            | Q(employee_name__icontains=search)
+            | Q(project__icontains=search)
+        )
+
+    project = params.get("project")
+    if project:
+        employees = employees.filter(project=project)
+
+    fields = EMPLOYEE_DIRECTORY_FIELDS
+    if params.get("fields"):
+        fields = tuple(f.strip() for f in params["fields"].split(",") if f.strip())
+        invalid = [f for f in fields if f not in EMPLOYEE_DIRECTORY_FIELDS]
+        if invalid:
+            return Response({"detail": f"Unknown fields: {', '.join(invalid)}"}, status=400)
+
+    rows = employees.values_list(*fields)
+
+    if "page" in params or "page_size" in params:
+        paginator = EmployeeDirectoryPagination()
+        page = paginator.paginate_queryset(rows, request)
+        return paginator.get_paginated_response(serialize_employee_directory_rows(page, fields))
+
+    return Response(serialize_employee_directory_rows(rows, fields))
 
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
@@ -795,21 +760,9 @@ def update_employee(request, employee_code):
     except EmployeeDirectory.DoesNotExist:
         return Response({"detail": "Employee not found"}, status=404)
 
-    numeric_fields = [
-        "total_hours", "nd_reg_hrs", "absences", "tardiness", "undertime",
-        "ot_regular", "nd_ot_reg", "ot_restday", "nd_restday", "ot_rest_excess",
-        "nd_rest_excess", "ot_special_hday", "nd_special_hday", "ot_shday_excess",
-        "nd_shday_excess", "ot_legal_holiday", "special_holiday", "ot_leghol_excess",
-        "nd_leghol_excess", "ot_sh_on_rest", "nd_sh_on_rest", "ot_sh_on_rest_excess",
-        "nd_sh_on_rest_excess", "leg_h_on_rest_day", "nd_leg_h_on_restday",
-        "ot_leg_h_on_rest_excess", "nd_leg_h_on_rest_excess", "vacleave_applied",
-        "sickleave_applied", "back_pay_vl", "back_pay_sl", "ot_regular_excess",
-        "nd_ot_reg_excess", "legal_holiday", "nd_legal_holiday", "overnight_rate",
-    ]
-
     for field, value in request.data.items():
         if hasattr(employee, field):
-            if field in numeric_fields:
+            if field in EMPLOYEE_DIRECTORY_NUMERIC_FIELDS:
                 if value in ["", None]:
                     setattr(employee, field, None)
                 else:
@@ -838,6 +791,13 @@ def safe_string(val):
         return None
     return str(val).strip()
 
+def longest_cell_lengths(ws, columns):
+    """Length of the longest value in each of the first ``columns`` worksheet columns."""
+    return [
+        max((len(str(cell.value)) for cell in column if cell.value is not None), default=0)
+        for column in ws.iter_cols(min_col=1, max_col=columns)
+    ]
+
 class DTRFileViewSet(viewsets.ModelViewSet):
     queryset = DTRFile.objects.all().order_by("-uploaded_at")
     serializer_class = DTRFileSerializer
@@ -845,11 +805,12 @@ class DTRFileViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
+        queryset = DTRFile.objects.select_related("uploaded_by").order_by("-uploaded_at")
 
         if hasattr(user, "role") and user.role in ["admin", "viewer"]:
-            return DTRFile.objects.all().order_by("-uploaded_at")
+            return queryset
 
-        return DTRFile.objects.filter(uploaded_by=user).order_by("-uploaded_at")
+        return queryset.filter(uploaded_by=user)
 
     def perform_create(self, serializer):
         # 1️⃣ Save the file and capture the instance
@@ -862,6 +823,10 @@ class DTRFileViewSet(viewsets.ModelViewSet):
             ip_address=self.request.META.get("REMOTE_ADDR")
         )
 
+    def perform_update(self, serializer):
+        dtr_file = serializer.save()
+        refresh_period_summaries([dtr_file.id])
+
     @action(detail=True, methods=["post"])
     def parse(self, request, pk=None):
         dtr_file = self.get_object()
@@ -887,12 +852,15 @@ class DTRFileViewSet(viewsets.ModelViewSet):
             except:
                 return None
 
+        started = time.perf_counter()
         try:
             # 🔥 READ ALL SHEETS
-            all_sheets = pd.read_excel(file_path, sheet_name=None, header=None)
+            with profile_stage("read_excel"):
+                all_sheets = pd.read_excel(file_path, sheet_name=None, header=None)
 
             start_date_val = None
             end_date_val = None
+            entries = []
 
             for sheet_name, df in all_sheets.items():
 
@@ -915,12 +883,11 @@ class DTRFileViewSet(viewsets.ModelViewSet):
                         if end_date_val:
                             break
 
-                # Save dates once
+                # Rows below need the start date; it is saved after the loop
                 if start_date_val and not dtr_file.start_date:
                     dtr_file.start_date = start_date_val
                 if end_date_val and not dtr_file.end_date:
                     dtr_file.end_date = end_date_val
-                dtr_file.save()
 
                 # --------------------------------
                 # Employee rows start at row 15
@@ -946,11 +913,12 @@ class DTRFileViewSet(viewsets.ModelViewSet):
                             val = row[col] if col < len(row) else None
                             daily_data[str(day)] = None if pd.isna(val) else val
 
-                    DTREntry.objects.create(
+                    entries.append(DTREntry(
                         dtr_file=dtr_file,
                         sheet_name=sheet_name,
                         full_name=safe_string(name),
                         employee_no=emp_code,
+                        employee_no_int=normalize_employee_no(emp_code),
                         position=safe_string(row[4]) if len(row) > 4 else None,
                         shift=safe_string(row[5]) if len(row) > 5 else None,
                         time=safe_string(row[6]) if len(row) > 6 else None,
@@ -963,23 +931,36 @@ class DTRFileViewSet(viewsets.ModelViewSet):
                         unworked_reg_holiday=safe_number(row[28]) if len(row) > 28 else 0,
                         special_holiday=safe_number(row[29]) if len(row) > 29 else 0,
                         night_diff=safe_number(row[30]) if len(row) > 30 else 0,
-                    )
+                    ))
+
+            # Dates only: a full save per sheet refreshed the dashboard once per sheet
+            dtr_file.save(update_fields=["start_date", "end_date"])
 
+            # One INSERT per batch instead of one per employee row
+            with profile_stage("insert_entries"):
+                DTREntry.objects.bulk_create(entries, batch_size=BULK_BATCH_SIZE)
+            with profile_stage("sync_attendance"):
+                sync_attendance(dtr_file.entries.values_list("id", flat=True))
+            with profile_stage("refresh_summaries"):
+                refresh_period_summaries([dtr_file.id])
+
+            PARSE_DURATION.observe(time.perf_counter() - started, outcome="ok")
+            DTR_ROWS_INGESTED.inc(len(entries), source="parse")
             return Response({"message": "DTR file parsed successfully."})
 
         except Exception as e:
-            traceback.print_exc()
+            PARSE_DURATION.observe(time.perf_counter() - started, outcome="error")
+            logger.exception("Failed to parse DTR file %s", dtr_file.id)
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=["get"])
     def content(self, request, pk=None):
         dtr_file = self.get_object()
-        entries = dtr_file.entries.all()
-        serializer = DTREntrySerializer(entries, many=True)
+        entries = dtr_file.entries.order_by("id").values(*serialize_dtr_entry_rows.values_fields)
         return Response({
             "start_date": dtr_file.start_date,
             "end_date": dtr_file.end_date,
-            "rows": serializer.data
+            "rows": serialize_dtr_entry_rows(entries)
         })
     
     @action(
@@ -1008,6 +989,8 @@ class DTRFileViewSet(viewsets.ModelViewSet):
         serializer.save()
 
         new_status = serializer.validated_data.get("status")
+        if new_status != previous_status:
+            refresh_period_summaries([file.id])
         rejection_reason = serializer.validated_data.get("rejection_reason")
 
         file_name = os.path.basename(file.file.name) if file.file and file.file.name else f"Manual DTR ({file.id})"
@@ -1084,121 +1067,140 @@ class DTRFileViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        aggregated = {}
-        for dtr_file in dtr_files:
-            uploader = dtr_file.uploaded_by 
-            project_name = (
-                f"{uploader.first_name} {uploader.last_name}".strip()
-                if uploader and (uploader.first_name or uploader.last_name)
-                else uploader.username if uploader else "Unknown Project"
-            )
+        # Totals come precomputed from EmployeePeriodSummary (one row per
+        # employee per verified file), so this is two aggregate queries.
+        summaries = EmployeePeriodSummary.objects.filter(dtr_file__in=dtr_files).exclude(employee_name="")
 
-            for entry in dtr_file.entries.all():
-                code = str(entry.employee_no).zfill(5) if entry.employee_no else None
-                name = entry.full_name.strip() if entry.full_name else None
-                if not code or not name:
-                    continue
-
-                if code not in aggregated:
-                    aggregated[code] = {
-                        "employee_name": name,
-                        "project": project_name,
-                        "total_hours": 0,
-                        "undertime": 0,
-                        "ot_regular": 0,
-                        "legal_holiday": 0,
-                        "special_holiday": 0,
-                        "nd_reg_hrs": 0,
-                        "date_covered_start": dtr_file.start_date,
-                        "date_covered_end": dtr_file.end_date,
-                    }
-
-                aggregated[code]["total_hours"] += entry.total_hours or 0
-                aggregated[code]["undertime"] += entry.undertime_minutes or 0
-                aggregated[code]["ot_regular"] += entry.regular_ot or 0
-                aggregated[code]["legal_holiday"] += entry.legal_holiday or 0
-                aggregated[code]["special_holiday"] += entry.special_holiday or 0
-                aggregated[code]["nd_reg_hrs"] += entry.night_diff or 0
-
-                if dtr_file.start_date and (
-                    aggregated[code]["date_covered_start"] is None
-                    or dtr_file.start_date < aggregated[code]["date_covered_start"]
-                ):
-                    aggregated[code]["date_covered_start"] = dtr_file.start_date
-
-                if dtr_file.end_date and (
-                    aggregated[code]["date_covered_end"] is None
-                    or dtr_file.end_date > aggregated[code]["date_covered_end"]
-                ):
-                    aggregated[code]["date_covered_end"] = dtr_file.end_date
-
-        created, updated = 0, 0
-        for code, data in aggregated.items():
+        first_seen = {
+            row["employee_code"]: row
+            for row in summaries.order_by("employee_code", "period_start", "dtr_file_id")
+            .distinct("employee_code")
+            .values("employee_code", "employee_name", "project")
+        }
+        totals = summaries.values("employee_code").annotate(
+            total_hours=Sum("total_hours"),
+            undertime=Sum("undertime_minutes"),
+            ot_regular=Sum("regular_ot"),
+            legal_holiday=Sum("legal_holiday"),
+            special_holiday=Sum("special_holiday"),
+            nd_reg_hrs=Sum("night_diff"),
+            date_covered_start=Min("period_start"),
+            date_covered_end=Max("period_end"),
+        ).order_by("employee_code")
+
+        records = []
+        for row in totals:
             date_covered = None
-            if data.get("date_covered_start") and data.get("date_covered_end"):
-                start_str = data["date_covered_start"].strftime("%b %d, %Y")
-                end_str = data["date_covered_end"].strftime("%b %d, %Y")
+            if row["date_covered_start"] and row["date_covered_end"]:
+                start_str = row.pop("date_covered_start").strftime("%b %d, %Y")
+                end_str = row.pop("date_covered_end").strftime("%b %d, %Y")
                 date_covered = f"{start_str} → {end_str}"
-
-            # 🔧 Handle duplicates safely
-            matches = EmployeeDirectory.objects.filter(employee_code=code)
-            if matches.count() > 1:
-                keep = matches.first()
-                matches.exclude(id=keep.id).delete()
-                emp = keep
-                is_created = False
             else:
-                emp, is_created = EmployeeDirectory.objects.update_or_create(
-                    employee_code=code,
-                    defaults={
-                        **{k: v for k, v in data.items() if k not in ["date_covered_start", "date_covered_end"]},
-                        "date_covered": date_covered,
-                    },
-                )
+                row.pop("date_covered_start")
+                row.pop("date_covered_end")
+
+            first = first_seen[row["employee_code"]]
+            records.append({
+                **row,
+                "employee_name": first["employee_name"],
+                "project": first["project"],
+                "date_covered": date_covered,
+            })
 
-            if is_created:
-                created += 1
-            else:
-                updated += 1
+        created, updated = upsert_employee_directory_records(records, DIRECTORY_SYNC_FIELDS)
 
         return Response({
             "detail": f"Synced {created} new, {updated} updated (verified only)."
         })
 
-        
+
+    @action(detail=False, methods=["get"], url_path="period-summaries")
+    def period_summaries(self, request):
+        """
+        Precomputed employee x period x project totals of verified DTRs.
+        Optional: ?employee_code=&project=&start_date=&end_date=
+        """
+        summaries = EmployeePeriodSummary.objects.filter(
+            dtr_file__in=self.get_queryset()
+        ).order_by("-period_start", "employee_code", "id")
+
+        employee_code = request.query_params.get("employee_code")
+        if employee_code:
+            numeric_code = normalize_employee_no(employee_code)
+            if numeric_code is None:
+                return Response({"detail": "Invalid employee_code"}, status=400)
+            summaries = summaries.filter(employee_no_int=numeric_code)
+
+        project = request.query_params.get("project")
+        if project:
+            summaries = summaries.filter(project=project)
+
+        try:
+            start_date = request.query_params.get("start_date")
+            end_date = request.query_params.get("end_date")
+            if start_date:
+                summaries = summaries.filter(period_end__gte=pd.to_datetime(start_date).date())
+            if end_date:
+                summaries = summaries.filter(period_start__lte=pd.to_datetime(end_date).date())
+        except (ValueError, TypeError):
+            return Response({"detail": "Invalid date range"}, status=400)
+
+        rows = summaries.values(*serialize_period_summary_rows.values_fields)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serialize_period_summary_rows(page))
+        return Response(serialize_period_summary_rows(rows))
+
     @action(detail=True, methods=["post"], url_path="update-rows")
     def update_rows(self, request, pk=None):
         dtr_file = self.get_object()
         rows = request.data.get("rows", [])
 
-        for row in rows:
-            entry_id = row.get("id")
-            if entry_id:
-                try:
-                    entry = dtr_file.entries.get(id=entry_id)
-                except DTREntry.DoesNotExist:
-                    continue
-            else:
-                entry = DTREntry(dtr_file=dtr_file)
+        if not isinstance(rows, list):
+            return Response({"detail": "rows must be a list"}, status=status.HTTP_400_BAD_REQUEST)
 
-            entry.full_name = row.get("full_name", entry.full_name)
-            entry.employee_no = row.get("employee_no", entry.employee_no)
+        result = bulk_update_dtr_entries(dtr_file, rows)
+        DTR_ROWS_INGESTED.inc(result["created"], source="update_rows")
 
-            entry.daily_data = row.get("daily_data", entry.daily_data)
+        if result["conflicts"] and not (result["created"] or result["updated"]):
+            # Nothing was written: every row conflicted, was missing or was invalid
+            return Response(
+                {"message": "No DTR entries were updated.", **result},
+                status=status.HTTP_409_CONFLICT,
+            )
+        message = (
+            "Some DTR entries were not updated; see conflicts."
+            if result["conflicts"] else "DTR entries updated successfully!"
+        )
+        return Response({"message": message, **result}, status=status.HTTP_200_OK)
+    
+    @action(detail=True, methods=["patch"], url_path="patch-cells")
+    def patch_cells(self, request, pk=None):
+        """
+        Apply per-day daily_data changes without resending whole rows.
+        Body: {"entries": [{"id": 1, "version": 3, "cells": {"2025-09-01": 8}}]}
+        409 if no patch could be applied (conflicts lists why).
+        """
+        dtr_file = self.get_object()
+        patches = request.data.get("entries", [])
 
-            entry.total_days = row.get("total_days", entry.total_days)
-            entry.total_hours = row.get("total_hours", entry.total_hours)
-            entry.regular_ot = row.get("regular_ot", entry.regular_ot)
-            entry.legal_holiday = row.get("legal_holiday", entry.legal_holiday)
-            entry.unworked_reg_holiday = row.get("unworked_reg_holiday", entry.unworked_reg_holiday)
-            entry.special_holiday = row.get("special_holiday", entry.special_holiday)
-            entry.night_diff = row.get("night_diff", entry.night_diff)
-            entry.undertime_minutes = row.get("undertime_minutes", entry.undertime_minutes)
+        if not isinstance(patches, list) or not patches:
+            return Response({"detail": "entries must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
 
-            entry.save()
+        result = patch_dtr_cells(dtr_file, patches)
+
+        if not result["updated"]:
+            # Nothing was written: every patch conflicted or was invalid
+            return Response(
+                {"message": "No DTR cells were updated.", **result},
+                status=status.HTTP_409_CONFLICT,
+            )
+        message = (
+            "Some DTR cells were not updated; see conflicts."
+            if result["conflicts"] else "DTR cells updated successfully!"
+        )
+        return Response({"message": message, **result}, status=status.HTTP_200_OK)
 
-        return Response({"message": "DTR entries updated successfully!"}, status=status.HTTP_200_OK)
-    
     @action(detail=False, methods=["post"], url_path="manual")
     def manual(self, request):
         data = request.data
@@ -1225,12 +1227,13 @@ class DTRFileViewSet(viewsets.ModelViewSet):
             ip_address=request.META.get("REMOTE_ADDR")
         )
 
-        # 2️⃣ Create DTREntry rows (same fields parse() fills)
-        for row in rows:
-            DTREntry.objects.create(
+        # 2️⃣ Create DTREntry rows (same fields parse() fills) in one INSERT
+        DTREntry.objects.bulk_create([
+            DTREntry(
                 dtr_file=dtr_file,
                 full_name=row.get("full_name"),
                 employee_no=row.get("employee_no"),
+                employee_no_int=normalize_employee_no(row.get("employee_no")),
                 position=row.get("position"),
                 shift=row.get("shift"),
                 time=row.get("time"),
@@ -1244,6 +1247,11 @@ class DTRFileViewSet(viewsets.ModelViewSet):
                 special_holiday=row.get("special_holiday"),
                 night_diff=row.get("night_diff"),
             )
+            for row in rows
+        ], batch_size=BULK_BATCH_SIZE)
+
+        sync_attendance(dtr_file.entries.values_list("id", flat=True))
+        DTR_ROWS_INGESTED.inc(len(rows), source="manual")
 
         return Response(
             {"message": "Manual DTR created successfully", "id": dtr_file.id},
@@ -1263,6 +1271,24 @@ class DTRFileViewSet(viewsets.ModelViewSet):
             response["Content-Disposition"] = f'attachment; filename="{os.path.basename(dtr.file.name)}"'
             return response
 
+        with profile_stage("export_build"):
+            wb = self._attendance_workbook(dtr)
+
+        # ----------------------------
+        # 📥 RESPONSE
+        # ----------------------------
+        response = HttpResponse(
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="Attendance_{dtr.start_date}_to_{dtr.end_date}.xlsx"'
+        )
+        with profile_stage("export_save"):
+            wb.save(response)
+        return response
+
+    def _attendance_workbook(self, dtr):
+        """Attendance summary workbook for a DTR that has no uploaded file."""
         wb = Workbook()
         ws = wb.active
         ws.title = "Attendance Summary"
@@ -1519,6 +1545,7 @@ class DTRFileViewSet(viewsets.ModelViewSet):
         row_idx = table_start + 2
         daily_col_start = 7
         daily_col_end = daily_col_start + len(dates) - 1
+        totals = [0] * total_columns  # GRAND TOTAL row: day counts, then sums
 
         for idx, entry in enumerate(dtr.entries.all(), start=1):
             daily_vals = [entry.daily_data.get(d.strftime("%Y-%m-%d"), "") for d in dates]
@@ -1559,6 +1586,9 @@ class DTRFileViewSet(viewsets.ModelViewSet):
                     elif str(v).upper() == "D":
                         cell.fill = dayoff_fill
 
+                if c >= daily_col_start and is_number(v):
+                    totals[c - 1] += 1 if c <= daily_col_end else float(v)
+
             ws.row_dimensions[row_idx].height = 18
             row_idx += 1
 
@@ -1567,6 +1597,7 @@ class DTRFileViewSet(viewsets.ModelViewSet):
         # ----------------------------
         # Adjust column 4 (Position) width based on max content length
         position_col_index = 4
+        max_col_lengths = longest_cell_lengths(ws, total_columns)
         ws.column_dimensions[get_column_letter(position_col_index)].width = max_col_lengths[position_col_index - 1] + 2
 
        # ----------------------------
@@ -1687,82 +1718,181 @@ class DTRFileViewSet(viewsets.ModelViewSet):
         # ----------------------------
         # 📏 AUTO WIDTH
         # ----------------------------
+        max_col_lengths = longest_cell_lengths(ws, total_columns)
         for col_idx, max_len in enumerate(max_col_lengths, start=1):
             letter = get_column_letter(col_idx)
             ws.column_dimensions[letter].width = max(max_len + 2, 8)
 
         ws.freeze_panes = f"A{table_start + 2}"
 
-        # ----------------------------
-        # 📥 RESPONSE
-        # ----------------------------
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-        response["Content-Disposition"] = (
-            f'attachment; filename="Attendance_{dtr.start_date}_to_{dtr.end_date}.xlsx"'
-        )
-        wb.save(response)
-        return response
+        return wb
+
+EMPLOYEE_HISTORY_DECIMAL_TOTALS = [
+    "total_days", "total_hours", "regular_ot", "legal_holiday",
+    "unworked_reg_holiday", "special_holiday", "night_diff",
+]
+EMPLOYEE_HISTORY_TOTALS = EMPLOYEE_HISTORY_DECIMAL_TOTALS + ["undertime_minutes"]
+
 
 class DTREntryViewSet(viewsets.ModelViewSet):
     queryset = DTREntry.objects.all().order_by("full_name")
     serializer_class = DTREntrySerializer
     permission_classes = [IsAuthenticated]
 
-    @action(detail=False, methods=["get"], url_path="employee")
-    def by_employee(self, request):
-        raw = request.query_params.get("employee_code")
+    def get_queryset(self):
+        queryset = super().get_queryset()
 
-        if not raw:
-            return Response({"detail": "employee_code is required"}, status=400)
+        # 🔎 Optional: entries of a single DTR file
+        dtr_file = self.request.query_params.get("dtr_file")
+        if dtr_file and dtr_file.isdigit():
+            queryset = queryset.filter(dtr_file_id=dtr_file)
 
-        try:
-            numeric_code = int("".join(filter(str.isdigit, raw)))
-        except ValueError:
-            return Response({"detail": "Invalid employee_code"}, status=400)
-
-        qs = (
-            self.get_queryset()
-            .annotate(emp_no_int=Cast("employee_no", IntegerField()))
-            .filter(
-                emp_no_int=numeric_code,
-                dtr_file__status="verified",
-            )
-            .select_related("dtr_file__uploaded_by")
-        )
+        return queryset
 
-        if not qs.exists():
-            return Response([], status=200)
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).values(*serialize_dtr_entry_rows.values_fields)
 
-        grouped = {}
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serialize_dtr_entry_rows(page))
+
+        return Response(serialize_dtr_entry_rows(queryset))
+
+    def perform_create(self, serializer):
+        entry = serializer.save()
+        sync_attendance([entry.id])
+        refresh_period_summaries([entry.dtr_file_id])
 
-        for entry in qs:
-            dtr_file = entry.dtr_file
-            uploader = getattr(dtr_file, "uploaded_by", None)
+    def perform_update(self, serializer):
+        previous_file_id = serializer.instance.dtr_file_id
+        entry = serializer.save()
+        sync_attendance([entry.id])
+        refresh_period_summaries({previous_file_id, entry.dtr_file_id})
 
-            project_name = (
-                f"{uploader.first_name} {uploader.last_name}".strip()
-                if uploader and (uploader.first_name or uploader.last_name)
-                else uploader.username if uploader else "Unknown Project"
+    def perform_destroy(self, instance):
+        dtr_file_id = instance.dtr_file_id
+        instance.delete()
+        refresh_period_summaries([dtr_file_id])
+
+    def _verified_entries_for_employee(self, request):
+        """
+        Resolve ?employee_code= to the indexed employee_no_int column.
+        Returns (queryset, error_response).
+        """
+        raw = request.query_params.get("employee_code")
+
+        if not raw:
+            return None, Response({"detail": "employee_code is required"}, status=400)
+
+        numeric_code = normalize_employee_no(raw)
+        if numeric_code is None:
+            return None, Response({"detail": "Invalid employee_code"}, status=400)
+
+        qs = self.get_queryset().filter(
+            employee_no_int=numeric_code,
+            dtr_file__status="verified",
+        )
+        return qs, None
+
+    @action(detail=False, methods=["get"], url_path="employee")
+    def by_employee(self, request):
+        qs, error = self._verified_entries_for_employee(request)
+        if error:
+            return error
+
+        rows = serialize_dtr_entry_rows(
+            qs.order_by("dtr_file__start_date", "id").values(
+                *serialize_dtr_entry_rows.values_fields,
+                project=uploader_display_name("dtr_file__uploaded_by"),
+                start_date=F("dtr_file__start_date"),
+                end_date=F("dtr_file__end_date"),
             )
+        )
 
-            key = f"{dtr_file.start_date} → {dtr_file.end_date}"
+        grouped = {}
+        for row in rows:
+            start_date = row.pop("start_date")
+            end_date = row.pop("end_date")
+            key = f"{start_date} → {end_date}"
 
             if key not in grouped:
                 grouped[key] = {
-                    "project": project_name,
-                    "start_date": dtr_file.start_date,
-                    "end_date": dtr_file.end_date,
+                    "project": row["project"],
+                    "start_date": start_date,
+                    "end_date": end_date,
                     "rows": [],
                 }
-
-            row = DTREntrySerializer(entry).data
-            row["project"] = project_name
             grouped[key]["rows"].append(row)
 
         return Response(list(grouped.values()))
 
+    @action(detail=False, methods=["get"], url_path="employee/history")
+    def employee_history(self, request):
+        """
+        Per-period totals for one employee across all verified DTRs,
+        aggregated in a single GROUP BY query.
+        """
+        qs, error = self._verified_entries_for_employee(request)
+        if error:
+            return error
+
+        periods = (
+            qs.values(
+                "dtr_file_id",
+                start_date=F("dtr_file__start_date"),
+                end_date=F("dtr_file__end_date"),
+                project=uploader_display_name("dtr_file__uploaded_by"),
+            )
+            .annotate(
+                entries=Count("id"),
+                **{field: Sum(field) for field in EMPLOYEE_HISTORY_TOTALS},
+            )
+            .order_by("start_date", "dtr_file_id")
+        )
+
+        return Response([
+            {
+                **period,
+                **{field: f"{period[field] or 0:.2f}" for field in EMPLOYEE_HISTORY_DECIMAL_TOTALS},
+            }
+            for period in periods
+        ])
+
+    @action(detail=False, methods=["get"], url_path="attendance-summary")
+    def attendance_summary(self, request):
+        """
+        Day counts, absences, hours and overtime per employee across verified
+        DTRs, aggregated in SQL from the DTRAttendance fact table.
+        Optional: ?start_date=&end_date=&employee_code=
+        """
+        facts = DTRAttendance.objects.filter(entry__dtr_file__status="verified")
+
+        try:
+            start_date = request.query_params.get("start_date")
+            end_date = request.query_params.get("end_date")
+            if start_date:
+                facts = facts.filter(date__gte=pd.to_datetime(start_date).date())
+            if end_date:
+                facts = facts.filter(date__lte=pd.to_datetime(end_date).date())
+        except (ValueError, TypeError):
+            return Response({"detail": "Invalid date range"}, status=400)
+
+        employee_code = request.query_params.get("employee_code")
+        if employee_code:
+            numeric_code = normalize_employee_no(employee_code)
+            if numeric_code is None:
+                return Response({"detail": "Invalid employee_code"}, status=400)
+            facts = facts.filter(employee_no_int=numeric_code)
+
+        return Response([
+            {
+                **row,
+                "total_hours": f"{row['total_hours'] or 0:.2f}",
+                "overtime_hours": f"{row['overtime_hours'] or 0:.2f}",
+            }
+            for row in attendance_summary(facts)
+        ])
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def upload_basic_employees(request):
@@ -1770,32 +1900,17 @@ def upload_basic_employees(request):
     if not employees:
         return Response({"detail": "No employees provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-    created, updated, skipped = 0, 0, 0
+    serializer = EmployeeBulkSerializer(data=employees, many=True)
+    serializer.is_valid(raise_exception=True)
+    skipped = serializer.skipped
 
-    for emp in employees:
-        serializer = EmployeeSerializer(data=emp)
-        if serializer.is_valid():
-            emp_no = serializer.validated_data["employee_no"]
-            emp_name = serializer.validated_data["employee_name"]
-
-            obj, created_flag = Employee.objects.update_or_create(
-                employee_no=emp_no,
-                defaults={"employee_name": emp_name}
-            )
-            if created_flag:
-                created += 1
-            else:
-                updated += 1
-        else:
-            skipped += 1
+    created, updated = bulk_upsert_employees(serializer.validated_data)
 
     return Response(
         {"detail": f"{created} created, {updated} updated, {skipped} skipped"},
         status=status.HTTP_200_OK
     )
 
-logger = logging.getLogger(__name__)
-
 def normalize_name(s):
     if not s:
         return ""
@@ -1950,7 +2065,7 @@ def flush_employee_data(request):
             EmployeeDirectory._meta.get_field(col)
             valid_fields.append(col)
         except FieldDoesNotExist:
-            print(f"Skipping invalid field: {col}")  
+            logger.info("Skipping invalid field: %s", col)
 
     if not valid_fields:
         return Response({"detail": "No valid fields to flush."}, status=400)
@@ -2033,8 +2148,7 @@ def restore_employee_directory(request):
         }, status=200)
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Employee directory restore failed")
         return Response({
             "detail": f"Restore failed: {str(e)}"
         }, status=400)
@@ -2045,9 +2159,10 @@ class PDFFileViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
+        queryset = PDFFile.objects.select_related("uploaded_by").order_by("-uploaded_at")
         if user.is_superuser:
-            return PDFFile.objects.all().order_by("-uploaded_at")
-        return PDFFile.objects.filter(uploaded_by=user).order_by("-uploaded_at")
+            return queryset
+        return queryset.filter(uploaded_by=user)
 
     @action(detail=True, methods=["put"], url_path="update-parsed")
     def update_parsed(self, request, pk=None):
@@ -2078,7 +2193,7 @@ class ParsedDTRViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
 
-        queryset = ParsedDTR.objects.all()
+        queryset = ParsedDTR.objects.annotate(uploaded_by_name=uploader_display_name())
 
         # 🔐 Non-admin users only see their own uploads
         if not user.is_staff:
@@ -2104,6 +2219,15 @@ class ParsedDTRViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).values(*serialize_parsed_dtr_rows.values_fields)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serialize_parsed_dtr_rows(page))
+
+        return Response(serialize_parsed_dtr_rows(queryset))
+
     def perform_create(self, serializer):
         serializer.save(uploaded_by=self.request.user)
 
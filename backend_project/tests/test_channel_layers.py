@@ -0,0 +1,32 @@
+import pytest
+from channels_redis.core import RedisChannelLayer
+from backend_project.channel_layers import channel_layers_config, parse_hosts
+
+
+def test_sharded_config_spreads_groups_over_hosts():
+    hosts = parse_hosts("redis://a:6379/0, redis://b:6379/0,,redis://c:6379/0")
+    layers = channel_layers_config(hosts, capacity=500)
+
+    assert layers["default"]["BACKEND"] == "channels_redis.core.RedisChannelLayer"
+    assert layers["default"]["CONFIG"] == {"hosts": hosts, "capacity": 500}
+
+    layer = RedisChannelLayer(**layers["default"]["CONFIG"])
+    shards = {layer.consistent_hash(f"chat_room{i}") for i in range(100)}
+    assert shards == {0, 1, 2}
+    # A group always maps to the same shard
+    assert layer.consistent_hash("rooms") == RedisChannelLayer(hosts=hosts).consistent_hash("rooms")
+
+
+def test_pubsub_config_has_no_capacity():
+    layers = channel_layers_config(["redis://a:6379/0"], backend="pubsub", capacity=500)
+    assert layers["default"] == {
+        "BACKEND": "channels_redis.pubsub.RedisPubSubChannelLayer",
+        "CONFIG": {"hosts": ["redis://a:6379/0"]},
+    }
+
+
+def test_invalid_config_is_rejected():
+    with pytest.raises(ValueError):
+        channel_layers_config(["redis://a:6379/0"], backend="kafka")
+    with pytest.raises(ValueError):
+        channel_layers_config(parse_hosts(" , "))
@@ -0,0 +1,66 @@
+import io
+import json
+import logging
+
+from backend_project.log import JsonFormatter, QueueStreamHandler, logging_config, parse_module_levels
+
+def make_logger(handler):
+    logger = logging.getLogger(f"tests.logging.{id(handler)}")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+    return logger
+
+def test_json_formatter_includes_extra_and_exceptions():
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    logger = make_logger(handler)
+
+    logger.info("parsed %d rows", 3, extra={"profile": {"db_queries": 2}})
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        logger.exception("boom")
+
+    first, second = (json.loads(line) for line in stream.getvalue().splitlines())
+    assert first["message"] == "parsed 3 rows"
+    assert first["level"] == "INFO"
+    assert first["profile"] == {"db_queries": 2}
+    assert "ZeroDivisionError" in second["exc_info"]
+
+def test_queue_handler_writes_on_listener_thread():
+    stream = io.StringIO()
+    handler = QueueStreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    logger = make_logger(handler)
+
+    args = ["before"]
+    logger.warning("value=%s", args)
+    args.append("after")  # mutated after the call: the record must not change
+    handler.close()
+
+    record = json.loads(stream.getvalue())
+    assert record["message"] == "value=['before']"
+
+def test_full_queue_drops_instead_of_blocking():
+    stream = io.StringIO()
+    handler = QueueStreamHandler(stream, maxsize=1)
+    handler.listener.stop()  # nothing drains the queue
+    logger = make_logger(handler)
+
+    for i in range(5):
+        logger.info("record %d", i)
+    assert handler.dropped == 4
+
+    handler.listener.start()
+    handler.close()
+    assert "4 log records dropped" in stream.getvalue()
+
+def test_module_levels_from_settings():
+    assert parse_module_levels("chat.middleware=debug, files=WARNING,bad") == {
+        "chat.middleware": "DEBUG", "files": "WARNING",
+    }
+    config = logging_config("INFO", "text", {"chat.middleware": "DEBUG"})
+    assert config["loggers"]["chat.middleware"] == {"level": "DEBUG"}
+    assert config["handlers"]["console"]["formatter"] == "text"
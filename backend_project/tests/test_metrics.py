@@ -0,0 +1,144 @@
+import urllib.request
+from datetime import date, timedelta
+
+import pytest
+from channels.testing import WebsocketCommunicator
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from backend_project.metrics import (
+    WEBSOCKET_CONNECTIONS, Counter, Histogram, MetricsRegistry, start_metrics_server,
+)
+from chat.consumers import RoomConsumer
+
+User = get_user_model()
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+@pytest.fixture
+def admin_user(db):
+    return User.objects.create_superuser(username="admin", email="admin@test.com", password="admin123", role="admin")
+
+def sample(text, series):
+    """Value of one exposition line, e.g. ``'dtr_rows_ingested_total{source="manual"}'``."""
+    for line in text.splitlines():
+        if line.startswith(series + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+def test_render_uses_the_text_exposition_format():
+    registry = MetricsRegistry()
+    rows = Counter("rows_total", "Rows.", ["source"], registry=registry)
+    latency = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1), registry=registry)
+
+    rows.inc(3, source='a"b')
+    latency.observe(0.5)
+
+    text = registry.render()
+    assert "# TYPE rows_total counter" in text
+    assert 'rows_total{source="a\\"b"} 3.0' in text
+    assert 'latency_seconds_bucket{le="0.1"} 0.0' in text
+    assert 'latency_seconds_bucket{le="1.0"} 1.0' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 1.0' in text
+    assert "latency_seconds_sum 0.5" in text
+    assert "latency_seconds_count 1.0" in text
+
+    with pytest.raises(ValueError):
+        rows.inc(source="a", extra="b")
+
+def test_failing_collector_is_skipped():
+    registry = MetricsRegistry()
+    Counter("ok_total", "Still rendered.", registry=registry)
+
+    @registry.add_collector
+    def broker_down():
+        raise ConnectionError("broker unreachable")
+        yield
+
+    assert "# TYPE ok_total counter" in registry.render()
+
+@pytest.mark.django_db
+def test_metrics_endpoint_reports_latency_rows_and_db(api_client, admin_user, settings):
+    settings.METRICS_CELERY_QUEUES = []  # no broker in tests
+    api_client.force_authenticate(user=admin_user)
+    api_client.force_login(admin_user)  # /metrics/ is a plain Django view: admin session
+    before = api_client.get("/metrics/").content.decode()
+
+    start = date(2025, 9, 1)
+    response = api_client.post("/api/files/dtr/files/manual/", {
+        "start_date": str(start),
+        "end_date": str(start + timedelta(days=14)),
+        "rows": [
+            {
+                "full_name": f"Employee {i}", "employee_no": str(i), "daily_data": {str(start): 8},
+                "total_days": 1, "total_hours": 8, "undertime_minutes": 0, "regular_ot": 0,
+                "legal_holiday": 0, "unworked_reg_holiday": 0, "special_holiday": 0, "night_diff": 0,
+            }
+            for i in range(3)
+        ],
+    }, format="json")
+    assert response.status_code == 201
+
+    response = api_client.get("/metrics/")
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    after = response.content.decode()
+
+    rows = 'dtr_rows_ingested_total{source="manual"}'
+    assert sample(after, rows) - sample(before, rows) == 3
+
+    latency = 'http_request_duration_seconds_count{route="dtrfile-manual",method="POST",status="201"}'
+    assert sample(after, latency) - sample(before, latency) == 1
+
+    assert "# TYPE db_connections gauge" in after
+    assert 'db_connections{state="active"}' in after
+
+@pytest.mark.django_db
+def test_metrics_token(api_client, settings):
+    settings.METRICS_TOKEN = "s3cret"
+    settings.METRICS_CELERY_QUEUES = []
+
+    assert api_client.get("/metrics/").status_code == 401
+    assert api_client.get("/metrics/", HTTP_AUTHORIZATION="Bearer s3cret").status_code == 200
+
+@pytest.mark.django_db
+def test_metrics_closed_by_default(api_client, admin_user, settings):
+    settings.METRICS_TOKEN = ""
+    settings.METRICS_PUBLIC = False
+    settings.METRICS_CELERY_QUEUES = []
+
+    assert api_client.get("/metrics/").status_code == 403
+    client = User.objects.create_user(username="metrics_client", password="x", role="client")
+    api_client.force_login(client)
+    assert api_client.get("/metrics/").status_code == 403
+    api_client.force_login(admin_user)
+    assert api_client.get("/metrics/").status_code == 200
+
+    api_client.logout()
+    settings.METRICS_PUBLIC = True
+    assert api_client.get("/metrics/").status_code == 200
+
+@pytest.mark.asyncio
+async def test_websocket_connections_gauge():
+    labels = {"kind": "rooms"}
+    before = WEBSOCKET_CONNECTIONS._values.get(WEBSOCKET_CONNECTIONS._key(labels), 0)
+
+    communicator = WebsocketCommunicator(RoomConsumer.as_asgi(), "/ws/rooms/")
+    connected, _ = await communicator.connect()
+    assert connected
+    assert WEBSOCKET_CONNECTIONS._values[WEBSOCKET_CONNECTIONS._key(labels)] == before + 1
+
+    await communicator.disconnect()
+    assert WEBSOCKET_CONNECTIONS._values[WEBSOCKET_CONNECTIONS._key(labels)] == before
+
+def test_worker_scrape_server():
+    server = start_metrics_server(0, "127.0.0.1")
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as response:
+            body = response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert "# TYPE celery_task_duration_seconds histogram" in body
@@ -0,0 +1,92 @@
+import logging
+import tracemalloc
+from datetime import date
+
+import pytest
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from backend_project.profiling import profile_stage
+from files.models import DTREntry, DTRFile
+
+User = get_user_model()
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+@pytest.fixture
+def admin_user(db):
+    return User.objects.create_superuser(username="admin", email="admin@test.com", password="admin123", role="admin")
+
+@pytest.mark.django_db
+def test_unsampled_requests_are_left_alone(api_client, admin_user, settings):
+    settings.PROFILING_SAMPLE_RATE = 0
+    api_client.force_authenticate(user=admin_user)
+
+    response = api_client.get("/api/files/dashboard-stats/")
+
+    assert response.status_code == 200
+    assert "Server-Timing" not in response
+
+@pytest.mark.django_db
+def test_sampled_request_reports_sql_and_timing(api_client, admin_user, settings, caplog):
+    settings.PROFILING_SAMPLE_RATE = 100
+    api_client.force_authenticate(user=admin_user)
+    cache.clear()
+
+    with caplog.at_level(logging.INFO, logger="backend_project.profiling"):
+        response = api_client.get("/api/files/dashboard-stats/")
+
+    timing = response["Server-Timing"]
+    assert timing.startswith("total;dur=")
+    assert 'db;dur=' in timing and 'desc="1 queries"' in timing
+
+    record, = caplog.records
+    assert record.profile["path"] == "/api/files/dashboard-stats/"
+    assert record.profile["status"] == 200
+    assert record.profile["db_queries"] == 1
+    assert record.profile["peak_memory_bytes"] is None
+
+@pytest.fixture
+def trace_memory(settings):
+    settings.PROFILING_TRACE_MEMORY = True
+    assert not tracemalloc.is_tracing()
+    yield
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+@pytest.mark.django_db
+def test_export_stages_and_peak_memory(api_client, admin_user, settings, caplog, trace_memory):
+    settings.PROFILING_SAMPLE_RATE = 100
+    api_client.force_authenticate(user=admin_user)
+    dtr_file = DTRFile.objects.create(uploaded_by=admin_user, start_date=date(2025, 9, 1), end_date=date(2025, 9, 15))
+    DTREntry.objects.create(dtr_file=dtr_file, full_name="Employee 1", employee_no="1", daily_data={"2025-09-01": 8})
+
+    with caplog.at_level(logging.INFO, logger="backend_project.profiling"):
+        response = api_client.get(f"/api/files/dtr/files/{dtr_file.id}/export/")
+
+    assert response.status_code == 200
+    assert "export_build;dur=" in response["Server-Timing"]
+    assert "export_save;dur=" in response["Server-Timing"]
+    assert 'mem;desc="peak' in response["Server-Timing"]
+
+    profile = caplog.records[-1].profile
+    assert set(profile["stages_ms"]) == {"export_build", "export_save"}
+    assert profile["peak_memory_bytes"] > 0
+    # Tracing ran for the sampled request only
+    assert not tracemalloc.is_tracing()
+
+@pytest.mark.django_db
+def test_trace_memory_skips_unsampled_requests(api_client, admin_user, settings, trace_memory):
+    settings.PROFILING_SAMPLE_RATE = 0
+    api_client.force_authenticate(user=admin_user)
+
+    response = api_client.get("/api/files/dashboard-stats/")
+
+    assert "Server-Timing" not in response
+    assert not tracemalloc.is_tracing()
+
+def test_profile_stage_outside_a_request_is_a_noop():
+    with profile_stage("anything"):
+        pass
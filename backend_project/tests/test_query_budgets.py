@@ -0,0 +1,442 @@
+"""
+Query budgets for every API route.
+
+Each route declared in files/urls.py, accounts/urls.py and chat/urls.py is
+called against a seeded dataset (several users, dozens of files, DTRs,
+rooms and messages) and must stay within its declared number of SQL
+queries. The dataset is larger than any budget, so an N+1 pattern - one
+query per file, room or user - blows the budget instead of hiding in a
+small fixture.
+
+Query counts and wall time are recorded per call with ``record_property``
+(run with ``--junitxml`` to collect them); only the query budget fails.
+A route added to one of the urlconfs without a budget here fails
+``test_every_route_has_a_budget``.
+"""
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO
+from types import SimpleNamespace
+
+import openpyxl
+import pytest
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from chat.models import ChatMessage, Room
+from chat.pagination import encode_cursor
+from files.attendance import sync_attendance
+from files.models import (
+    AuditLog, DTREntry, DTRFile, EmployeeDirectory, File, ParsedDTR, PDFFile, SystemSettings,
+)
+from files.summaries import refresh_period_summaries
+
+User = get_user_model()
+
+SCALE = 25
+PERIOD_START = date(2025, 9, 1)
+
+# urlconf -> prefix it is mounted under in backend_project/urls.py
+URLCONFS = {
+    "files.urls": "/api/files",
+    "accounts.urls": "/api/auth",
+    "chat.urls": "/api/chat",
+}
+SKIPPED_ROUTES = {"api-root"}
+
+# kwargs/data may be callables taking the seeded dataset; user is "admin", "client" or None
+Call = namedtuple("Call", "method budget kwargs data format user", defaults=(None, None, "json", "admin"))
+
+
+def xlsx_upload(rows, name="upload.xlsx"):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for row in rows:
+        ws.append(row)
+    buffer = BytesIO()
+    wb.save(buffer)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+def dtr_template(employees=5):
+    """The fixed DTR layout DTRFileViewSet.parse expects: dates in D9/D10, rows from 15."""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.cell(row=9, column=4, value=PERIOD_START)
+    ws.cell(row=10, column=4, value=PERIOD_START + timedelta(days=14))
+    for i in range(employees):
+        row = 15 + i
+        ws.cell(row=row, column=3, value=f"Employee {i}")
+        ws.cell(row=row, column=4, value=f"PM{i:05d}")
+        for col in range(8, 23):
+            ws.cell(row=row, column=col, value=8)
+        ws.cell(row=row, column=25, value=120)
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def dtr_row(i):
+    return {
+        "full_name": f"Manual {i}",
+        "employee_no": f"{900 + i}",
+        "daily_data": {str(PERIOD_START): 8, str(PERIOD_START + timedelta(days=1)): "A"},
+        "total_days": 1,
+        "total_hours": 8,
+        "undertime_minutes": 0,
+        "regular_ot": 0,
+        "legal_holiday": 0,
+        "unworked_reg_holiday": 0,
+        "special_holiday": 0,
+        "night_diff": 0,
+    }
+
+
+BUDGETS = {
+    # ---------- files.urls ----------
+    "file-list": [
+        Call("get", 2),
+        Call("post", 4, data=lambda d: {"file": SimpleUploadedFile("new.csv", b"a,b\n1,2\n")}, format="multipart"),
+    ],
+    "file-detail": [
+        Call("get", 1, kwargs=lambda d: {"pk": d.file.id}),
+        Call("patch", 2, kwargs=lambda d: {"pk": d.file.id}, data={"status": "verified"}),
+        Call("delete", 4, kwargs=lambda d: {"pk": d.file.id}),
+    ],
+    "file-download": [Call("get", 2, kwargs=lambda d: {"pk": d.file.id})],
+    "file-get-content": [Call("get", 1, kwargs=lambda d: {"pk": d.file.id})],
+    "file-update-content": [
+        Call("patch", 3, kwargs=lambda d: {"pk": d.file.id}, data={"content": [["a", "b"], ["1", "2"]]}),
+    ],
+    "auditlog-list": [Call("get", 2)],
+    "auditlog-detail": [Call("get", 1, kwargs=lambda d: {"pk": d.audit_log.id})],
+    "systemsettings-list": [
+        Call("get", 2),
+        Call("post", 1, data={"site_name": "Budget", "allowed_types": ["csv"]}),
+    ],
+    "systemsettings-detail": [
+        Call("get", 1, kwargs=lambda d: {"pk": d.settings.id}),
+        Call("patch", 2, kwargs=lambda d: {"pk": d.settings.id}, data={"log_downloads": True}),
+    ],
+    "dtrfile-list": [
+        Call("get", 2),
+        Call("get", 2, user="client"),
+        Call("post", 2, data=lambda d: {"file": SimpleUploadedFile("new.xlsx", dtr_template())}, format="multipart"),
+    ],
+    "dtrfile-detail": [
+        Call("get", 1, kwargs=lambda d: {"pk": d.dtr_file.id}),
+        Call("patch", 8, kwargs=lambda d: {"pk": d.dtr_file.id}, data={"rejection_reason": "Checked"}),
+        Call("delete", 9, kwargs=lambda d: {"pk": d.dtr_file.id}),
+    ],
+    "dtrfile-parse": [Call("post", 15, kwargs=lambda d: {"pk": d.template.id})],
+    "dtrfile-content": [Call("get", 2, kwargs=lambda d: {"pk": d.dtr_file.id})],
+    "dtrfile-status": [
+        Call("get", 1, kwargs=lambda d: {"pk": d.dtr_file.id}),
+        Call("patch", 9, kwargs=lambda d: {"pk": d.dtr_file.id}, data={"status": "verified"}),
+    ],
+    "dtrfile-log-update": [Call("post", 2, kwargs=lambda d: {"pk": d.dtr_file.id}, data={"message": "Edited"})],
+    "dtrfile-download": [Call("get", 2, kwargs=lambda d: {"pk": d.template.id})],
+    "dtrfile-export": [
+        Call("get", 2, kwargs=lambda d: {"pk": d.dtr_file.id}),
+        Call("get", 1, kwargs=lambda d: {"pk": d.template.id}),
+    ],
+    "dtrfile-sync-all-files": [Call("post", 7, data={})],
+    "dtrfile-period-summaries": [Call("get", 2)],
+    "dtrfile-update-rows": [
+        Call("post", 17, kwargs=lambda d: {"pk": d.dtr_file.id}, data=lambda d: {"rows": [
+            {"id": entry.id, "total_hours": "99"} for entry in d.dtr_file.entries.all()
+        ] + [dtr_row(0)]}),
+    ],
+    "dtrfile-patch-cells": [
+        # One UPDATE for all patches, then the attendance and summary refresh
+        Call("patch", 15, kwargs=lambda d: {"pk": d.dtr_file.id}, data=lambda d: {"entries": [
+            {"id": entry.id, "version": entry.version, "cells": {str(PERIOD_START): 4}}
+            for entry in d.dtr_file.entries.all()
+        ]}),
+    ],
+    "dtrfile-manual": [
+        Call("post", 9, data={
+            "start_date": str(PERIOD_START),
+            "end_date": str(PERIOD_START + timedelta(days=14)),
+            "rows": [dtr_row(i) for i in range(SCALE)],
+        }),
+    ],
+    "dtrentry-list": [
+        Call("get", 2),
+        Call("get", 2, data=lambda d: {"dtr_file": d.dtr_file.id}),
+    ],
+    "dtrentry-detail": [
+        Call("get", 1, kwargs=lambda d: {"pk": d.entry.id}),
+        Call("patch", 13, kwargs=lambda d: {"pk": d.entry.id}, data={"total_hours": "42.00"}),
+        Call("delete", 10, kwargs=lambda d: {"pk": d.entry.id}),
+    ],
+    "dtrentry-by-employee": [Call("get", 1, data={"employee_code": "PM-00001"})],
+    "dtrentry-employee-history": [Call("get", 1, data={"employee_code": "PM-00001"})],
+    "dtrentry-attendance-summary": [Call("get", 1)],
+    "pdffile-list": [Call("get", 2)],
+    "pdffile-detail": [Call("get", 1, kwargs=lambda d: {"pk": d.pdf.id})],
+    "pdffile-update-parsed": [
+        Call("put", 2, kwargs=lambda d: {"pk": d.pdf.id}, data={"parsed_pages": {"1": {"text": "edited"}}}),
+    ],
+    "parseddtr-list": [
+        Call("get", 2),
+        Call("get", 2, user="client", data={"status": "pending"}),
+        Call("post", 2, data=lambda d: dict(d.parsed_payload, sheet_name="New")),
+    ],
+    "parseddtr-detail": [
+        Call("get", 1, kwargs=lambda d: {"pk": d.parsed.id}),
+        Call("patch", 2, kwargs=lambda d: {"pk": d.parsed.id}, data={"project": "MRT"}),
+    ],
+    "parseddtr-bulk-upload": [
+        Call("post", 2 * 5, data=lambda d: [dict(d.parsed_payload, sheet_name=f"S{i}") for i in range(5)]),
+    ],
+    "parseddtr-approve": [Call("post", 2, kwargs=lambda d: {"pk": d.parsed.id})],
+    "parseddtr-reject": [Call("post", 2, kwargs=lambda d: {"pk": d.parsed.id}, data={"remarks": "Blurry"})],
+    "dashboard-stats": [Call("get", 1)],
+    "files-report": [Call("get", 1)],
+    "file-stats": [Call("get", 1)],
+    "rejected-files": [Call("get", 1, user="client")],
+    "upload-employee-excel": [
+        Call("post", 4, format="multipart", data=lambda d: {"file": xlsx_upload(
+            [["Employee Code", "EmployeeName", "Total Hours"]]
+            + [[str(i), f"Employee {i}", "80"] for i in range(SCALE * 2)]
+        )}),
+    ],
+    "list-employees": [
+        Call("get", 1),
+        Call("get", 2, data={"page": 1, "page_size": 10}),
+    ],
+    "add-employee": [Call("post", 4, data={"employee_code": "777", "employee_name": "New Hire"})],
+    "update-employee": [Call("put", 2, kwargs={"employee_code": "00001"}, data={"total_hours": "10"})],
+    "delete-employee": [Call("delete", 4, kwargs={"employee_code": "00001"})],
+    "upload-basic-employees": [
+        Call("post", 4, data={"employees": [
+            {"employee_no": f"PM{i:05d}", "employee_name": f"Employee {i}"} for i in range(SCALE * 2)
+        ]}),
+    ],
+    "flush-employee-data": [Call("post", 1, data={"flush_columns": ["total_hours", "absences"]})],
+    "backup-employee-directory": [Call("get", 2)],
+    "restore-employee-directory": [
+        Call("post", 4, format="multipart", data=lambda d: {"file": xlsx_upload(
+            [["employee_code", "employee_name"]] + [[f"{i:05d}", f"Employee {i}"] for i in range(SCALE)]
+        )}),
+    ],
+
+    # ---------- accounts.urls ----------
+    "register": [
+        Call("post", 3, user=None, data={
+            "username": "newcomer", "email": "newcomer@test.com",
+            "password": "Str0ng!Passw0rd", "password2": "Str0ng!Passw0rd", "role": "client",
+        }),
+    ],
+    "custom_login": [Call("post", 4, user=None, data={"username": "client0", "password": "client123"})],
+    "custom_logout": [Call("post", 1, user="client")],
+    "token_obtain_pair": [Call("post", 4, user=None, data={"username": "client0", "password": "client123"})],
+    "token_refresh": [Call("post", 1, user=None, data=lambda d: {"refresh": str(RefreshToken.for_user(d.client))})],
+    "me": [Call("get", 0)],
+    "ping": [Call("post", 1, user="client")],
+    "list_users": [Call("get", 1)],
+    "user_detail": [
+        Call("get", 1, kwargs=lambda d: {"pk": d.client.id}),
+        Call("patch", 3, kwargs=lambda d: {"pk": d.client.id}, data={"phone_number": "+639170000000"}),
+        Call("delete", 21, kwargs=lambda d: {"pk": d.others[-1].id}),
+    ],
+    "user_stats": [Call("get", 1)],
+    "create_test_admin": [Call("get", 3, user=None)],
+
+    # ---------- chat.urls ----------
+    "chat-messages": [Call("get", 2, kwargs=lambda d: {"room_name": d.room.name})],
+    "chat-messages-alt": [Call("get", 1, kwargs=lambda d: {"room_name": d.room.name})],
+    "chat-message-history": [
+        Call("get", 2, kwargs=lambda d: {"room_name": d.room.name}),
+        Call("get", 2, kwargs=lambda d: {"room_name": d.room.name},
+             data=lambda d: {"before": encode_cursor(d.message.timestamp, d.message.id)}),
+    ],
+    "chat-message-sync": [
+        Call("get", 3, kwargs=lambda d: {"room_name": d.room.name}, data=lambda d: {"since_id": d.message.id}),
+        Call("get", 3, kwargs=lambda d: {"room_name": d.room.name}, data=lambda d: {"since_uid": d.message.uid}),
+    ],
+    # participants.add() checks for existing rows first now that chat.signals
+    # listens to m2m_changed (membership cache invalidation)
+    "room-list": [
+        Call("get", 2),  # COUNT + the annotated page
+        Call("post", 6, data={"name": "budget-room"}),
+    ],
+    "room-detail": [
+        Call("get", 2, kwargs=lambda d: {"pk": d.room.id}),
+        Call("delete", 8, kwargs=lambda d: {"pk": d.room.id}),
+    ],
+    "room-join": [Call("post", 3, user="client", kwargs=lambda d: {"pk": d.private_room.id}, data=lambda d: {"passkey": d.private_room.passkey})],
+    "room-leave": [Call("post", 2, user="client", kwargs=lambda d: {"pk": d.room.id})],
+    "room-participants": [Call("get", 3, kwargs=lambda d: {"pk": d.room.id})],
+    "room-remove-user": [Call("post", 6, kwargs=lambda d: {"pk": d.room.id}, data=lambda d: {"user_id": d.client.id})],
+    "room-read": [
+        Call("post", 4, kwargs=lambda d: {"pk": d.room.id}, data=lambda d: {"message_id": d.message.id}),
+        Call("post", 4, kwargs=lambda d: {"pk": d.room.id}),
+    ],
+}
+
+
+def _route_names(patterns):
+    for pattern in patterns:
+        if hasattr(pattern, "url_patterns"):
+            yield from _route_names(pattern.url_patterns)
+        elif pattern.name:
+            yield pattern.name
+
+
+def _url(name, kwargs):
+    for urlconf, prefix in URLCONFS.items():
+        if name in set(_route_names(get_resolver(urlconf).url_patterns)):
+            return prefix + reverse(name, urlconf=urlconf, kwargs=kwargs)
+    raise LookupError(name)
+
+
+def _resolve(value, data):
+    return value(data) if callable(value) else value
+
+
+@pytest.fixture
+def dataset(db, settings):
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+    cache.clear()
+
+    admin = User.objects.create_superuser(
+        username="admin", email="admin@test.com", password="admin123",
+        role="admin", first_name="LRT", last_name="Line 1",
+    )
+    client = User.objects.create_user(username="client0", password="client123", role="client")
+    others = [User.objects.create_user(username=f"client{i}", password="x", role="client") for i in range(1, 5)]
+    users = [admin, client, *others]
+
+    system_settings = SystemSettings.objects.create(allowed_types=["csv", "xlsx", "pdf"])
+
+    file = File.objects.create(owner=client, file=ContentFile(b"a,b\n1,2\n", name="report.csv"))
+    File.objects.bulk_create([
+        File(owner=users[i % len(users)], file=f"user_{i}/seed_{i}.csv", status=["pending", "verified", "rejected"][i % 3])
+        for i in range(SCALE)
+    ])
+    AuditLog.objects.bulk_create([AuditLog(user=users[i % len(users)], action=f"Seed {i}") for i in range(SCALE)])
+
+    dtr_files = DTRFile.objects.bulk_create([
+        DTRFile(
+            uploaded_by=users[i % len(users)],
+            status="verified" if i % 2 else "pending",
+            start_date=PERIOD_START + timedelta(days=15 * (i % 4)),
+            end_date=PERIOD_START + timedelta(days=15 * (i % 4) + 14),
+        )
+        for i in range(SCALE)
+    ])
+    DTREntry.objects.bulk_create([
+        DTREntry(
+            dtr_file=dtr_file,
+            full_name=f"Employee {n}",
+            employee_no=f"{n:05d}",
+            employee_no_int=n,
+            daily_data={str(dtr_file.start_date): 8, str(dtr_file.start_date + timedelta(days=1)): "A"},
+            total_days=Decimal("1"),
+            total_hours=Decimal("8"),
+        )
+        for dtr_file in dtr_files
+        for n in range(1, 5)
+    ])
+    sync_attendance(DTREntry.objects.values_list("id", flat=True))
+    refresh_period_summaries(f.id for f in dtr_files)
+
+    template = DTRFile.objects.create(uploaded_by=admin)
+    template.file.save("template.xlsx", ContentFile(dtr_template()))
+
+    EmployeeDirectory.objects.bulk_create([
+        EmployeeDirectory(employee_code=f"{i:05d}", employee_name=f"Employee {i}", project="LRT")
+        for i in range(1, SCALE + 1)
+    ])
+    PDFFile.objects.bulk_create([
+        PDFFile(uploaded_by=users[i % len(users)], file=f"pdfs/seed_{i}.pdf", parsed_pages={"1": {}})
+        for i in range(SCALE)
+    ])
+
+    parsed_payload = {
+        "employee_name": "Employee 1", "employee_no": "00001", "sheet_name": "Sheet1",
+        "period_from": str(PERIOD_START), "period_to": str(PERIOD_START + timedelta(days=14)),
+    }
+    ParsedDTR.objects.bulk_create([
+        ParsedDTR(uploaded_by=users[i % 2], **dict(parsed_payload, sheet_name=f"Sheet{i}"))
+        for i in range(SCALE)
+    ])
+
+    rooms = [Room.objects.create(name=f"team-{i}", created_by=admin) for i in range(5)]
+    for room in rooms:
+        room.participants.add(*users)
+    private_room = Room.objects.create(name="ops", created_by=admin)
+    ChatMessage.objects.bulk_create([
+        ChatMessage(room=rooms[0], sender=users[i % len(users)], message=f"Message {i}") for i in range(SCALE)
+    ])
+
+    return SimpleNamespace(
+        admin=admin,
+        client=client,
+        others=others,
+        settings=system_settings,
+        file=file,
+        audit_log=AuditLog.objects.first(),
+        dtr_file=dtr_files[1],
+        entry=dtr_files[1].entries.first(),
+        template=template,
+        pdf=PDFFile.objects.first(),
+        parsed=ParsedDTR.objects.first(),
+        parsed_payload=parsed_payload,
+        room=rooms[0],
+        message=ChatMessage.objects.order_by("-id")[SCALE // 2],
+        private_room=private_room,
+    )
+
+
+def test_every_route_has_a_budget():
+    routes = {
+        name
+        for urlconf in URLCONFS
+        for name in _route_names(get_resolver(urlconf).url_patterns)
+    } - SKIPPED_ROUTES
+
+    assert sorted(routes - BUDGETS.keys()) == [], "routes without a query budget"
+    assert sorted(BUDGETS.keys() - routes) == [], "budgets for routes that no longer exist"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "name,call",
+    [(name, call) for name, calls in BUDGETS.items() for call in calls],
+    ids=[f"{name}-{call.method}-{i}" for name, calls in BUDGETS.items() for i, call in enumerate(calls)],
+)
+def test_query_budget(name, call, dataset, record_property):
+    api_client = APIClient()
+    if call.user:
+        api_client.force_authenticate(user=getattr(dataset, call.user))
+
+    url = _url(name, _resolve(call.kwargs, dataset))
+    data = _resolve(call.data, dataset)
+
+    with CaptureQueriesContext(connection) as captured:
+        started = time.perf_counter()
+        if call.method == "get":
+            response = api_client.get(url, data)
+        else:
+            response = getattr(api_client, call.method)(url, data, format=call.format)
+        elapsed = time.perf_counter() - started
+
+    record_property("queries", len(captured))
+    record_property("seconds", round(elapsed, 4))
+
+    assert response.status_code < 400, getattr(response, "data", response.content)
+    assert len(captured) <= call.budget, (
+        f"{call.method.upper()} {url} ran {len(captured)} queries (budget {call.budget}):\n"
+        + "\n".join(q["sql"] for q in captured.captured_queries)
+    )
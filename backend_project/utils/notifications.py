@@ -15,7 +15,7 @@ def send_rejection_sms(phone_number, file_name, user=None):
     message = f"Your uploaded file '{file_name}' has been rejected. Please check your account for details."
 
     if MOCK_SMS:
-        print(f"[MOCK SMS] To: {phone_number} | Message: {message}")
+        logger.info("[MOCK SMS] To: %s | Message: %s", phone_number, message)
         SMSLog.objects.create(user=user, phone_number=phone_number, message=message, mock=True)
         return
 
@@ -119,8 +119,12 @@ export default function DTRTable({ role , fileId}) {
   const handleSave = async () => {
     setSaving(true);
     try {
-      await api.post(`/files/dtr/files/${selectedFile}/update-rows/`, { rows: fileContents });
-      toast.success("DTR updated successfully!");
+      const { data } = await api.post(`/files/dtr/files/${selectedFile}/update-rows/`, { rows: fileContents });
+      if (data.conflicts?.length) {
+        toast.warn(data.message);
+      } else {
+        toast.success("DTR updated successfully!");
+      }
       await handleViewFile();
 
       // 🔹 Audit log
@@ -129,7 +133,7 @@ export default function DTRTable({ role , fileId}) {
       });
 
     } catch (err) {
-      toast.error("Failed to save changes.");
+      toast.error(err.response?.data?.message || "Failed to save changes.");
     } finally {
       setSaving(false);
     }
@@ -160,8 +164,12 @@ export default function DTRTable({ role , fileId}) {
       setSaving(true);
       const rowToSave = fileContents[rIdx];
 
-      await api.post(`/files/dtr/files/${selectedFile}/update-rows/`, { rows: [rowToSave] });
-      toast.success("Row updated successfully!");
+      const { data } = await api.post(`/files/dtr/files/${selectedFile}/update-rows/`, { rows: [rowToSave] });
+      if (data.conflicts?.length) {
+        toast.warn(data.message);
+      } else {
+        toast.success("Row updated successfully!");
+      }
       await handleViewFile(selectedFile);
 
       // 🔹 Audit log for single row
@@ -173,7 +181,7 @@ export default function DTRTable({ role , fileId}) {
       setEditableRow(null);
     } catch (err) {
       console.error("Failed to save row:", err);
-      toast.error("Failed to save row.");
+      toast.error(err.response?.data?.message || "Failed to save row.");
     } finally {
       setSaving(false);
     }
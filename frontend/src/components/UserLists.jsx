@@ -1,6 +1,7 @@
 /* components/UserLists.jsx */
 import { useEffect, useState } from "react";
 import api from "../api";
+import useHeartbeat, { applyPresence } from "../hooks/useHeartBeat";
 import "./styles/UserList.css";
 
 export default function UserList({ currentUser, onSelectRoom, unreadCounts = {}, isVisible }) {
@@ -23,6 +24,9 @@ export default function UserList({ currentUser, onSelectRoom, unreadCounts = {},
     fetchUsers();
   }, [currentUser]);
 
+  // Admins get online/offline changes pushed on the presence socket
+  useHeartbeat((data) => setUsers((prev) => applyPresence(prev, data)));
+
   const getPrivateRoomName = (id1, id2) => `room_${[id1, id2].sort().join("_")}`;
 
   if (!isVisible) return null;
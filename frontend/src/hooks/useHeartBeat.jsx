@@ -1,46 +1,91 @@
 // src/hooks/useHeartbeat.jsx
 import { useEffect, useRef } from "react";
-import api from "../api";
+import { getWsBase } from "../utils/hosts";
 
-export default function useHeartbeat() {
-  const intervalRef = useRef(null);
+// One presence socket (ws/presence/) per tab, shared by every component using
+// the hook. The user is online while it is open; heartbeats keep them online,
+// and admin sockets also receive presence snapshots and changes.
+const HEARTBEAT_INTERVAL = 60 * 1000;
+const RECONNECT_DELAY = 5 * 1000;
 
-  useEffect(() => {
-    const startPing = () => {
-      if (intervalRef.current) return; // already running
-      intervalRef.current = setInterval(async () => {
-        const token = localStorage.getItem("access_token");
-        if (!token) return;
-        try {
-          await api.post("/auth/ping/");
-        } catch (err) {
-          console.warn("Ping failed:", err);
-        }
-      }, 60 * 1000);
-    };
+const listeners = new Set();
+let subscribers = 0;
+let socket = null;
+let heartbeat = null;
+let reconnect = null;
 
-    const stopPing = () => {
-      if (intervalRef.current) {
-        clearInterval(intervalRef.current);
-        intervalRef.current = null;
-      }
-    };
+function openSocket() {
+  const token = localStorage.getItem("access_token");
+  if (!token || socket) return;
 
-    // start on login
-    if (localStorage.getItem("access_token")) {
-      startPing();
+  socket = new WebSocket(`${getWsBase()}/ws/presence/?token=${token}`);
+  socket.onopen = () => {
+    heartbeat = setInterval(() => {
+      if (socket?.readyState === WebSocket.OPEN) {
+        socket.send(JSON.stringify({ type: "heartbeat" }));
+      }
+    }, HEARTBEAT_INTERVAL);
+  };
+  socket.onmessage = (event) => {
+    const data = JSON.parse(event.data);
+    listeners.forEach((listener) => listener(data));
+  };
+  socket.onclose = (event) => {
+    clearInterval(heartbeat);
+    heartbeat = null;
+    socket = null;
+    // 4001: not signed in, retrying won't help
+    if (subscribers > 0 && event.code !== 4001) {
+      reconnect = setTimeout(() => {
+        reconnect = null;
+        openSocket();
+      }, RECONNECT_DELAY);
     }
+  };
+}
+
+function closeSocket() {
+  clearTimeout(reconnect);
+  reconnect = null;
+  clearInterval(heartbeat);
+  heartbeat = null;
+  if (socket) {
+    socket.onclose = null;
+    socket.close();
+    socket = null;
+  }
+}
+
+// Merge a presence_snapshot/presence message into a list of users
+export function applyPresence(users, data) {
+  if (data.type !== "presence_snapshot" && data.type !== "presence") return users;
+  const changed = new Map(data.users.map((u) => [u.id, u]));
+  return users.map((user) => {
+    if (changed.has(user.id)) return { ...user, ...changed.get(user.id) };
+    // The snapshot lists everyone online; the rest are offline
+    return data.type === "presence_snapshot" ? { ...user, is_online: false } : user;
+  });
+}
+
+export default function useHeartbeat(onPresence) {
+  const handlerRef = useRef(onPresence);
+  handlerRef.current = onPresence;
+
+  useEffect(() => {
+    const listener = (data) => handlerRef.current?.(data);
+    listeners.add(listener);
+    subscribers += 1;
+    openSocket();
 
     // clean up on unmount
-    return () => stopPing();
+    return () => {
+      listeners.delete(listener);
+      subscribers -= 1;
+      if (subscribers === 0) closeSocket();
+    };
   }, []);
 
   return {
-    stopHeartbeat: () => {
-      if (intervalRef.current) {
-        clearInterval(intervalRef.current);
-        intervalRef.current = null;
-      }
-    },
+    stopHeartbeat: closeSocket,
   };
 }
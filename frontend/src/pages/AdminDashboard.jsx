@@ -26,6 +26,7 @@ import EmployeeDirectory from '../components/EmployeeDirectory';
 import "../components/styles/AdminDashboard.css";
 import UploaderReviewModal from "../components/UploaderReviewModal";
 import UsageSummary from "../components/UsageSummary";
+import useHeartbeat, { applyPresence } from "../hooks/useHeartBeat";
 import api from "../api";
 import jsPDF from "jspdf";
 import "jspdf-autotable";
@@ -540,6 +541,9 @@ export default function AdminDashboard() {
     fetchAuditLogs();
   }, []);
 
+  // Online status updates pushed on the presence socket, instead of refetching users
+  useHeartbeat((data) => setUsers((prev) => applyPresence(prev, data)));
+
   useEffect(() => {
     fetchDashboardStats();
     fetchUsers();
@@ -5,7 +5,11 @@ export function getApiBase() {
 }
 
 export function getWsBase() {
+  const wsHost = import.meta.env.VITE_WS_HOST;
+  if (!wsHost) {
+    // Sockets are served by the API host: http(s)://host/api -> ws(s)://host
+    return getApiBase().replace(/^http/, "ws").replace(/\/api$/, "");
+  }
   const wsScheme = window.location.protocol === "https:" ? "wss" : "ws";
-  const wsHost = import.meta.env.VITE_WS_HOST || window.location.host;
   return `${wsScheme}://${wsHost}`;
 }
\ No newline at end of file